@@ -1,24 +1,32 @@
-from fastapi import FastAPI, Request
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import ORJSONResponse, Response
 import os
 from loguru import logger
-import threading
-from routes.bot.raw import bot
 
-from routes.api import user, movie_service
+from routes.api import user, movie_service, movie
 from routes.web.ui import web_ui
-from database.database import init_db
+from database.database import engine, new_async_session
+from sqlmodel import Session
+from services.crud.movie import refresh_title_index, start_title_index_refresh
 from database.config import get_settings
+from middleware import CompressionMiddleware, SecurityMiddleware, TimingMiddleware, TracingMiddleware
+from services.metrics import render_metrics
+from services.tracing import setup_tracing
+from services.admission import get_admission_controller
+from auth.token import get_token_signer
+from services.crud.aio.job import purge_expired_jobs
+from services.jobs import job_ttl_seconds
 
 def create_application() -> FastAPI:
     """Создает и настраивает FastAPI приложение"""
     app = FastAPI(
         title="Movie Recommendation Service",
         description="ML-powered movie recommendation service with user management and balance system",
-        version="1.0.0"
+        version="1.0.0",
+        default_response_class=ORJSONResponse
     )
     
     # Add CORS middleware
@@ -28,8 +36,12 @@ def create_application() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor"],
     )
     
+    # gzip/brotli для JSON, HTML и статики; небольшие ответы не сжимаются
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+    
     # Mount static files
     app.mount("/static", StaticFiles(directory="static"), name="static")
     
@@ -39,77 +51,25 @@ def create_application() -> FastAPI:
     # Include API routers
     app.include_router(user.user_route, prefix="/api/users", tags=["Users"])
     app.include_router(movie_service.movie_service_route, prefix="/api/events", tags=["Movies"])
+    app.include_router(movie.movie_route, prefix="/api/movies", tags=["Catalog"])
     
     # Include Web UI router
     app.include_router(web_ui, tags=['Web'])
     
-    # Security middleware for logging
-    @app.middleware("http")
-    async def security_logging_middleware(request: Request, call_next):
-        """Логирует доступ к защищенным endpoint'ам и попытки аутентификации"""
-        # Log the request
-        logger.info(f"Request: {request.method} {request.url.path}")
-        
-        # Check if this is an authentication endpoint
-        if request.url.path in ["/api/users/signin", "/api/users/signup"]:
-            logger.info(f"Authentication attempt: {request.method} {request.url.path}")
-        
-        response = await call_next(request)
-        return response
-    
-    # Security headers middleware
-    @app.middleware("http")
-    async def add_security_headers(request: Request, call_next):
-        """Добавляет заголовки безопасности к ответам"""
-        response = await call_next(request)
-        
-        # Add security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        
-        return response
+    # Проверка запроса, журнал и заголовки безопасности одним проходом; 0 выключает журнал обычных запросов
+    log_sample_rate = get_settings().REQUEST_LOG_SAMPLE_RATE
+    app.add_middleware(SecurityMiddleware, log_sample_rate=1.0 if log_sample_rate is None else log_sample_rate)
     
-    # Attack prevention middleware
-    @app.middleware("http")
-    async def attack_prevention_middleware(request: Request, call_next):
-        """Предотвращает распространенные паттерны атак"""
-        # Block suspicious headers
-        suspicious_headers = ["x-forwarded-for", "x-real-ip", "x-forwarded-proto"]
-        for header in suspicious_headers:
-            if header in request.headers:
-                logger.warning(f"Suspicious header detected: {header}")
-                return HTMLResponse(content="Suspicious request", status_code=400)
-        
-        # Block overly long paths
-        if len(request.url.path) > 200:
-            logger.warning(f"Path too long: {len(request.url.path)} characters")
-            return HTMLResponse(content="Path too long", status_code=400)
-        
-        # Block overly long query parameters
-        if len(str(request.query_params)) > 1000:
-            logger.warning(f"Query parameters too long: {len(str(request.query_params))} characters")
-            return HTMLResponse(content="Query parameters too long", status_code=400)
-        
-        response = await call_next(request)
-        return response
+    # Server-Timing, гистограммы задержек и число SQL запросов; внешний слой, чтобы учитывать все остальные
+    app.add_middleware(
+        TimingMiddleware,
+        query_count_warning=get_settings().SQL_QUERY_COUNT_WARNING or 0,
+        sql_debug_header=bool(get_settings().SQL_DEBUG_HEADER),
+        timing_detail=bool(get_settings().SERVER_TIMING_DETAIL),
+    )
     
-    # Start Telegram bot in background thread
-    def start_bot():
-        """Запускает Telegram бота в фоновом потоке"""
-        try:
-            if bot:  # Check if bot object was initialized (i.e., BOT_TOKEN was set)
-                logger.info("Starting Telegram bot...")
-                bot.polling(none_stop=True, timeout=60)
-            else:
-                logger.warning("Telegram bot not available - BOT_TOKEN not set")
-        except Exception as e:
-            logger.error(f"Error starting Telegram bot: {e}")
-
-    bot_thread = threading.Thread(target=start_bot, daemon=True)
-    bot_thread.start()
-    logger.info("Telegram bot thread started")
+    # Span запроса; RPC к ML сервису и ml_worker продолжают ту же трассу
+    app.add_middleware(TracingMiddleware)
     
     return app
 
@@ -117,14 +77,49 @@ app = create_application()
 
 @app.on_event("startup")
 async def startup_event():
-    """Инициализирует базу данных при запуске приложения."""
+    """
+    Подготовка воркера при запуске.
+
+    Схема базы создается один раз до запуска воркеров (python main.py), здесь
+    строится только индекс названий в памяти процесса и запускается его
+    периодическая сверка с каталогом, а также удаляются задачи рекомендаций,
+    истекшие пока API не работал.
+    """
+    setup_tracing("movie-api")
+    # Ключ-заглушка или короткий SECRET_KEY останавливает воркер при запуске, а не при первом входе
+    get_token_signer()
     try:
-        init_db()
-        logger.info("Database initialized successfully")
+        with Session(engine) as session:
+            refresh_title_index(session)
     except Exception as e:
-        logger.error(f"Failed to initialize database: {e}")
+        logger.error(f"Failed to build title autocomplete index: {e}")
+    # Каталог меняют другие процессы (воркеры API, CLI ingest): индекс сверяется с ним периодически
+    start_title_index_refresh(engine, get_settings().TITLE_INDEX_REFRESH_SECONDS)
+    try:
+        async with new_async_session() as session:
+            await purge_expired_jobs(job_ttl_seconds(), session)
+    except Exception as e:
+        logger.error(f"Failed to purge expired recommendation jobs: {e}")
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {"status": "healthy"}
\ No newline at end of file
+    return {"status": "healthy"}
+
+@app.get("/ready")
+async def readiness_check():
+    """
+    Готовность принимать запросы рекомендаций.
+
+    Отдает сигналы контроля допуска: глубину очереди ML задач, число
+    запросов в работе и занятость пула соединений; 503 если запрос
+    рекомендации сейчас был бы отклонен.
+    """
+    signals = (await get_admission_controller().signals()).to_dict()
+    return ORJSONResponse(signals, status_code=200 if signals["ready"] else 503)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Метрики задержек и кэшей в формате Prometheus."""
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
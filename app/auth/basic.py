@@ -1,21 +1,23 @@
 import re
-import time
-from collections import defaultdict
 from fastapi import Depends, HTTPException, status
-from fastapi.security import HTTPBasic, HTTPBasicCredentials
-from sqlmodel import Session
-from services.crud import user as UserService
-from database.database import get_session
+from typing import Callable, Optional
+from fastapi.security import HTTPBasic, HTTPBasicCredentials, HTTPBearer, HTTPAuthorizationCredentials
+from sqlmodel.ext.asyncio.session import AsyncSession
+from services.crud.aio import user as UserService
+from database.database import get_async_session
+from models import Principal
+from models.user import User
+from auth.token import get_token_signer
+from auth.credential_cache import get_credential_cache
+from auth.rate_limit import get_login_rate_limiter
+from services.metrics import phase, record_cache
 import logging
 
 logger = logging.getLogger(__name__)
 
-security = HTTPBasic()
-
-# Rate limiting storage (in production use Redis)
-login_attempts = defaultdict(list)
-MAX_ATTEMPTS = 5
-WINDOW_SECONDS = 300  # 5 minutes
+# Оба способа необязательны по отдельности: get_current_user принимает любой из них
+security = HTTPBasic(auto_error=False)
+bearer_security = HTTPBearer(auto_error=False)
 
 def validate_password_strength(password: str) -> bool:
     """
@@ -50,14 +52,7 @@ def check_rate_limit(identifier: str) -> bool:
     Returns:
         bool: True если лимит превышен
     """
-    now = time.time()
-    attempts = login_attempts[identifier]
-    
-    # Remove old attempts outside the window
-    attempts = [t for t in attempts if now - t < WINDOW_SECONDS]
-    login_attempts[identifier] = attempts
-    
-    return len(attempts) >= MAX_ATTEMPTS
+    return get_login_rate_limiter().is_limited(identifier)
 
 def record_login_attempt(identifier: str, success: bool):
     """
@@ -68,25 +63,50 @@ def record_login_attempt(identifier: str, success: bool):
         success: Успешность входа
     """
     if not success:
-        login_attempts[identifier].append(time.time())
+        get_login_rate_limiter().hit(identifier)
     
     # Log the attempt
     log_level = logging.INFO if success else logging.WARNING
     logger.log(log_level, f"Login attempt for {identifier}: {'SUCCESS' if success else 'FAILED'}")
 
-def get_current_user(
-    creds: HTTPBasicCredentials = Depends(security),
-    session: Session = Depends(get_session),
-):
+async def authenticate_token(token: str, session: AsyncSession):
     """
-    Получает текущего аутентифицированного пользователя с усиленной безопасностью.
+    Аутентификация по токену доступа: HMAC подписи вместо bcrypt.
+    
+    Args:
+        token: токен из заголовка Authorization: Bearer
+        session: Асинхронная сессия базы данных
+        
+    Returns:
+        Principal: Аутентифицированный пользователь
+        
+    Raises:
+        HTTPException: Если токен поддельный, истек или пароль был изменен
+    """
+    signer = get_token_signer()
+    claims = signer.verify(token)
+    row = await UserService.get_auth_row_by_id(claims.user_id, session) if claims else None
+    if not row or signer.fingerprint(row.password_hash) != claims.fingerprint:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return Principal.model_validate(row)
+
+async def authenticate_basic(creds: HTTPBasicCredentials, session: AsyncSession):
+    """
+    Аутентификация по HTTP Basic с проверкой пароля bcrypt.
+    
+    Недавно подтвержденные учетные данные берутся из кэша процесса, так что
+    bcrypt выполняется раз в TTL кэша, а не на каждый запрос.
     
     Args:
         creds: HTTP Basic учетные данные
-        session: Сессия базы данных
+        session: Асинхронная сессия базы данных
         
     Returns:
-        User: Объект аутентифицированного пользователя
+        Principal: Аутентифицированный пользователь
         
     Raises:
         HTTPException: Если аутентификация не удалась или превышен лимит попыток
@@ -101,8 +121,14 @@ def get_current_user(
         )
     
     try:
-        user = UserService.get_user_by_email(creds.username, session)
-        if not user or not UserService.verify_password(creds.password, user.password_hash):
+        cache = get_credential_cache()
+        row = await UserService.get_auth_row_by_email(creds.username, session)
+        cached = bool(row) and cache.check(creds.username, creds.password, row.password_hash)
+        record_cache("basic_auth", cached)
+        if cached:
+            return Principal.model_validate(row)
+        
+        if not row or not await UserService.check_password(creds.password, row.password_hash):
             record_login_attempt(creds.username, False)
             logger.warning(f"Failed login attempt for user: {creds.username}")
             raise HTTPException(
@@ -112,9 +138,10 @@ def get_current_user(
             )
         
         # Successful login
+        cache.add(creds.username, creds.password, row.password_hash)
         record_login_attempt(creds.username, True)
         logger.info(f"Successful login for user: {creds.username}")
-        return user
+        return Principal.model_validate(row)
         
     except HTTPException:
         raise
@@ -124,4 +151,66 @@ def get_current_user(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Authentication error",
             headers={"WWW-Authenticate": "Basic"},
-        )
\ No newline at end of file
+        )
+
+async def get_current_user(
+    bearer: Optional[HTTPAuthorizationCredentials] = Depends(bearer_security),
+    creds: Optional[HTTPBasicCredentials] = Depends(security),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    Получает текущего аутентифицированного пользователя.
+    
+    Принимает токен из /api/users/signin (Authorization: Bearer) или
+    HTTP Basic для клиентов, которые не могут перейти на токены. Пользователь
+    и кошелек читаются одним запросом; связи не загружаются.
+    
+    Args:
+        bearer: Токен доступа
+        creds: HTTP Basic учетные данные
+        session: Асинхронная сессия базы данных
+        
+    Returns:
+        Principal: id, email, is_admin, wallet_id и баланс пользователя
+        
+    Raises:
+        HTTPException: Если аутентификация не удалась или превышен лимит попыток
+    """
+    if bearer:
+        with phase("auth.token"):
+            return await authenticate_token(bearer.credentials, session)
+    if creds:
+        with phase("auth.basic"):
+            return await authenticate_basic(creds, session)
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Not authenticated",
+        headers={"WWW-Authenticate": "Bearer, Basic"},
+    )
+
+def current_user_with(*relationships: str) -> Callable:
+    """
+    Зависимость для endpoint'ов, которым нужен ORM объект User со связями.
+    
+    Пример: Depends(current_user_with("wallet")) - пользователь с кошельком
+    для списания средств. Остальные endpoint'ы используют get_current_user.
+    
+    Args:
+        relationships: имена связей User для загрузки
+        
+    Returns:
+        Callable: Зависимость FastAPI, возвращающая User
+    """
+    async def dependency(
+        principal: Principal = Depends(get_current_user),
+        session: AsyncSession = Depends(get_async_session),
+    ) -> User:
+        user = await UserService.get_user_by_id(principal.id, session, relationships)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found",
+            )
+        return user
+    
+    return dependency
@@ -0,0 +1,143 @@
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, NamedTuple, Optional, Set
+from auth.token import TokenSigner
+from database.config import get_settings
+
+DEFAULT_CACHE_TTL_SECONDS = 60
+DEFAULT_CACHE_SIZE = 1024
+
+
+class _CacheEntry(NamedTuple):
+    email: str
+    fingerprint: str
+    expires_at: float
+
+
+class VerifiedCredentialCache:
+    """
+    Кэш недавно проверенных учетных данных HTTP Basic.
+
+    Позволяет не запускать bcrypt на каждый запрос клиентов, которые не могут
+    перейти на токены. Ключ записи - HMAC от email и пароля на случайном ключе
+    процесса, поэтому пароли в памяти не хранятся даже в виде быстрого хеша.
+
+    Запись действительна, пока не истек TTL и пока хеш пароля пользователя в
+    базе совпадает с запомненным: смена пароля в любом процессе сразу делает
+    записи недействительными. Размер ограничен, вытесняются давно не
+    использованные записи.
+
+    Args:
+        key: ключ HMAC
+        ttl_seconds: время жизни записи
+        max_entries: максимальное количество записей
+    """
+
+    def __init__(
+        self,
+        key: bytes,
+        ttl_seconds: float = DEFAULT_CACHE_TTL_SECONDS,
+        max_entries: int = DEFAULT_CACHE_SIZE
+    ) -> None:
+        self._key = key
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, _CacheEntry]" = OrderedDict()
+        self._by_email: Dict[str, Set[bytes]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _cache_key(self, email: str, password: str) -> bytes:
+        message = email.encode() + b"\0" + password.encode()
+        return hmac.new(self._key, message, hashlib.sha256).digest()
+
+    def check(self, email: str, password: str, password_hash: str, now: Optional[float] = None) -> bool:
+        """
+        Проверяет, были ли эти учетные данные недавно подтверждены bcrypt.
+
+        Args:
+            email: email из запроса
+            password: пароль из запроса
+            password_hash: текущий хеш пароля пользователя из базы
+            now: текущее время (для тестов)
+
+        Returns:
+            bool: True если проверку bcrypt можно пропустить
+        """
+        now = time.monotonic() if now is None else now
+        cache_key = self._cache_key(email, password)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is None:
+                return False
+            if entry.expires_at <= now or entry.fingerprint != TokenSigner.fingerprint(password_hash):
+                self._discard_locked(cache_key)
+                return False
+            self._entries.move_to_end(cache_key)
+            return True
+
+    def add(self, email: str, password: str, password_hash: str, now: Optional[float] = None) -> None:
+        """
+        Запоминает учетные данные, успешно проверенные bcrypt.
+
+        Args:
+            email: email из запроса
+            password: пароль из запроса
+            password_hash: хеш пароля пользователя, с которым прошла проверка
+            now: текущее время (для тестов)
+        """
+        now = time.monotonic() if now is None else now
+        cache_key = self._cache_key(email, password)
+        entry = _CacheEntry(email, TokenSigner.fingerprint(password_hash), now + self.ttl_seconds)
+        with self._lock:
+            self._discard_locked(cache_key)
+            self._entries[cache_key] = entry
+            self._by_email.setdefault(email, set()).add(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._discard_locked(next(iter(self._entries)))
+
+    def invalidate(self, email: str) -> None:
+        """
+        Удаляет все записи пользователя (смена пароля, удаление пользователя).
+
+        Args:
+            email: email пользователя
+        """
+        with self._lock:
+            for cache_key in list(self._by_email.get(email, ())):
+                self._discard_locked(cache_key)
+
+    def clear(self) -> None:
+        """Удаляет все записи"""
+        with self._lock:
+            self._entries.clear()
+            self._by_email.clear()
+
+    def _discard_locked(self, cache_key: bytes) -> None:
+        """Удаляет запись; вызывается под блокировкой"""
+        entry = self._entries.pop(cache_key, None)
+        if entry is None:
+            return
+        keys = self._by_email.get(entry.email)
+        if keys is not None:
+            keys.discard(cache_key)
+            if not keys:
+                del self._by_email[entry.email]
+
+
+@lru_cache()
+def get_credential_cache() -> VerifiedCredentialCache:
+    """Получает кэш проверенных учетных данных процесса по настройкам приложения"""
+    settings = get_settings()
+    return VerifiedCredentialCache(
+        secrets.token_bytes(32),
+        settings.BASIC_AUTH_CACHE_TTL_SECONDS or DEFAULT_CACHE_TTL_SECONDS,
+        settings.BASIC_AUTH_CACHE_SIZE or DEFAULT_CACHE_SIZE,
+    )
@@ -0,0 +1,251 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import lru_cache
+from typing import NamedTuple, Optional
+from database.config import get_settings
+
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_WINDOW_SECONDS = 300
+DEFAULT_MAX_KEYS = 10000
+DEFAULT_SQLITE_PATH = os.path.join(tempfile.gettempdir(), "login_rate_limit.sqlite3")
+
+
+class WindowState(NamedTuple):
+    """Счетчики скользящего окна: начало текущего окна и попытки в текущем и предыдущем окнах"""
+    window_start: float
+    current: int
+    previous: int
+
+
+def advance_window(state: Optional[WindowState], window_seconds: float, now: float) -> WindowState:
+    """
+    Сдвигает окно ключа к текущему моменту.
+
+    Args:
+        state: сохраненные счетчики или None для нового ключа
+        window_seconds: длина окна
+        now: текущее время
+
+    Returns:
+        WindowState: Счетчики, в которых текущее окно содержит now
+    """
+    window_start = now - now % window_seconds
+    if state is None or state.window_start <= window_start - 2 * window_seconds:
+        return WindowState(window_start, 0, 0)
+    if state.window_start < window_start:
+        return WindowState(window_start, 0, state.current)
+    return state
+
+
+def estimate_count(state: WindowState, window_seconds: float, now: float) -> float:
+    """
+    Оценка количества попыток за последние window_seconds.
+
+    Попытки предыдущего окна учитываются пропорционально тому, какая его
+    часть еще попадает в скользящее окно.
+
+    Args:
+        state: счетчики, сдвинутые к now
+        window_seconds: длина окна
+        now: текущее время
+
+    Returns:
+        float: Оценка количества попыток
+    """
+    overlap = 1 - (now - state.window_start) / window_seconds
+    return state.current + state.previous * overlap
+
+
+class RateLimiter(ABC):
+    """
+    Ограничение частоты событий по ключу (email, IP) скользящим окном.
+
+    На каждый ключ хранится постоянный объем данных - два счетчика и начало
+    окна, а не список отметок времени. Неактивные ключи вытесняются, когда
+    их количество превышает max_keys.
+
+    Args:
+        limit: допустимое количество событий за окно
+        window_seconds: длина окна
+        max_keys: максимальное количество хранимых ключей
+    """
+
+    def __init__(
+        self,
+        limit: int = DEFAULT_MAX_ATTEMPTS,
+        window_seconds: float = DEFAULT_WINDOW_SECONDS,
+        max_keys: int = DEFAULT_MAX_KEYS
+    ) -> None:
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.max_keys = max_keys
+
+    @abstractmethod
+    def is_limited(self, key: str, now: Optional[float] = None) -> bool:
+        """
+        Проверяет, исчерпан ли лимит ключа.
+
+        Args:
+            key: ключ
+            now: текущее время (для тестов)
+
+        Returns:
+            bool: True если лимит превышен
+        """
+
+    @abstractmethod
+    def hit(self, key: str, now: Optional[float] = None) -> None:
+        """
+        Учитывает событие ключа.
+
+        Args:
+            key: ключ
+            now: текущее время (для тестов)
+        """
+
+    @abstractmethod
+    def reset(self, key: str) -> None:
+        """
+        Сбрасывает счетчики ключа.
+
+        Args:
+            key: ключ
+        """
+
+
+class MemoryRateLimiter(RateLimiter):
+    """Ограничитель в памяти процесса с LRU вытеснением ключей"""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._states: "OrderedDict[str, WindowState]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def is_limited(self, key: str, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        with self._lock:
+            state = self._states.get(key)
+        if state is None:
+            return False
+        state = advance_window(state, self.window_seconds, now)
+        return estimate_count(state, self.window_seconds, now) >= self.limit
+
+    def hit(self, key: str, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        with self._lock:
+            state = advance_window(self._states.get(key), self.window_seconds, now)
+            self._states[key] = state._replace(current=state.current + 1)
+            self._states.move_to_end(key)
+            while len(self._states) > self.max_keys:
+                self._states.popitem(last=False)
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._states.pop(key, None)
+
+
+class SQLiteRateLimiter(RateLimiter):
+    """
+    Ограничитель в файле SQLite, общий для всех процессов хоста.
+
+    Используется, когда API запущен в нескольких воркерах uvicorn: счетчики
+    читаются и обновляются в транзакции BEGIN IMMEDIATE, поэтому попытки из
+    разных процессов не теряются.
+
+    Args:
+        path: путь к файлу базы SQLite
+    """
+
+    def __init__(self, path: str = DEFAULT_SQLITE_PATH, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.path = path
+        self._connection = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limit ("
+                "key TEXT PRIMARY KEY, window_start REAL NOT NULL, "
+                "current INTEGER NOT NULL, previous INTEGER NOT NULL, touched REAL NOT NULL)"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS ix_rate_limit_touched ON rate_limit (touched)")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT count(*) FROM rate_limit").fetchone()[0]
+
+    def _load(self, key: str) -> Optional[WindowState]:
+        row = self._connection.execute(
+            "SELECT window_start, current, previous FROM rate_limit WHERE key = ?", (key,)
+        ).fetchone()
+        return WindowState(*row) if row else None
+
+    def is_limited(self, key: str, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        with self._lock:
+            state = self._load(key)
+        if state is None:
+            return False
+        state = advance_window(state, self.window_seconds, now)
+        return estimate_count(state, self.window_seconds, now) >= self.limit
+
+    def hit(self, key: str, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                state = advance_window(self._load(key), self.window_seconds, now)
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO rate_limit (key, window_start, current, previous, touched) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, state.window_start, state.current + 1, state.previous, now)
+                )
+                self._evict(now)
+                self._connection.execute("COMMIT")
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._connection.execute("DELETE FROM rate_limit WHERE key = ?", (key,))
+
+    def _evict(self, now: float) -> None:
+        """Удаляет ключи без событий за два окна и самые старые сверх max_keys"""
+        self._connection.execute(
+            "DELETE FROM rate_limit WHERE touched < ?", (now - 2 * self.window_seconds,)
+        )
+        self._connection.execute(
+            "DELETE FROM rate_limit WHERE key IN ("
+            "SELECT key FROM rate_limit ORDER BY touched "
+            "LIMIT max((SELECT count(*) FROM rate_limit) - ?, 0))",
+            (self.max_keys,)
+        )
+
+
+@lru_cache()
+def get_login_rate_limiter() -> RateLimiter:
+    """
+    Получает ограничитель попыток входа по настройкам приложения.
+
+    RATE_LIMIT_BACKEND=sqlite включает общий для процессов хоста файл
+    RATE_LIMIT_SQLITE_PATH; по умолчанию счетчики хранятся в памяти процесса.
+    """
+    settings = get_settings()
+    options = dict(
+        limit=settings.LOGIN_MAX_ATTEMPTS or DEFAULT_MAX_ATTEMPTS,
+        window_seconds=settings.LOGIN_WINDOW_SECONDS or DEFAULT_WINDOW_SECONDS,
+        max_keys=settings.RATE_LIMIT_MAX_KEYS or DEFAULT_MAX_KEYS,
+    )
+    if settings.RATE_LIMIT_BACKEND == "sqlite":
+        return SQLiteRateLimiter(settings.RATE_LIMIT_SQLITE_PATH or DEFAULT_SQLITE_PATH, **options)
+    return MemoryRateLimiter(**options)
@@ -0,0 +1,155 @@
+import base64
+import hashlib
+import hmac
+import secrets
+import time
+from functools import lru_cache
+from typing import NamedTuple, Optional
+from database.config import get_settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOKEN_TTL_SECONDS = 12 * 60 * 60
+# Ключ HMAC-SHA256 не короче выхода хеша
+MIN_SECRET_BYTES = 32
+# Значения из примеров конфигурации: ими подписанный токен может подделать кто угодно
+PLACEHOLDER_SECRETS = frozenset({
+    "change-me", "changeme", "change_me", "secret", "secret-key", "secret_key",
+    "your-secret-key", "your_secret_key", "please-change-me",
+})
+
+
+def check_secret(secret: bytes) -> None:
+    """
+    Проверяет ключ подписи токенов.
+
+    Raises:
+        ValueError: Ключ - известная заглушка или короче MIN_SECRET_BYTES байт
+    """
+    if secret.strip().lower().decode(errors="replace") in PLACEHOLDER_SECRETS:
+        raise ValueError("SECRET_KEY is a placeholder value, generate a random one")
+    if len(secret) < MIN_SECRET_BYTES:
+        raise ValueError(f"SECRET_KEY must be at least {MIN_SECRET_BYTES} bytes")
+
+
+class TokenClaims(NamedTuple):
+    """Данные, зашитые в токен доступа"""
+    user_id: int
+    expires_at: int
+    fingerprint: str
+
+
+def _b64encode(data: bytes) -> str:
+    """base64url без выравнивания"""
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    """Обратное преобразование для _b64encode"""
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+class TokenSigner:
+    """
+    Выпускает и проверяет подписанные токены доступа с ограниченным сроком жизни.
+
+    Токен имеет вид <payload>.<signature>, где payload - "user_id:expires_at:fingerprint"
+    в base64url, а signature - HMAC-SHA256 от payload. Проверка токена - это
+    один HMAC, без bcrypt и без хранения сессий на сервере.
+
+    fingerprint - короткий хеш от хеша пароля пользователя: после смены пароля
+    он перестает совпадать, и все ранее выданные токены становятся недействительными.
+
+    Args:
+        secret: ключ подписи, не короче MIN_SECRET_BYTES байт
+        ttl_seconds: время жизни токена
+
+    Raises:
+        ValueError: Ключ - известная заглушка или слишком короткий
+    """
+
+    def __init__(self, secret: bytes, ttl_seconds: int = DEFAULT_TOKEN_TTL_SECONDS) -> None:
+        check_secret(secret)
+        self._secret = secret
+        self.ttl_seconds = ttl_seconds
+
+    @staticmethod
+    def fingerprint(password_hash: str) -> str:
+        """
+        Отпечаток хеша пароля для привязки токена к текущему паролю.
+
+        Args:
+            password_hash: bcrypt хеш пароля
+
+        Returns:
+            str: 16 hex символов
+        """
+        return hashlib.sha256(password_hash.encode()).hexdigest()[:16]
+
+    def _sign(self, payload: str) -> str:
+        return _b64encode(hmac.new(self._secret, payload.encode(), hashlib.sha256).digest())
+
+    def issue(self, user_id: int, password_hash: str, now: Optional[float] = None) -> str:
+        """
+        Выпускает токен для пользователя.
+
+        Args:
+            user_id: ID пользователя
+            password_hash: текущий хеш пароля пользователя
+            now: текущее время (для тестов)
+
+        Returns:
+            str: Токен доступа
+        """
+        expires_at = int((time.time() if now is None else now) + self.ttl_seconds)
+        claims = f"{user_id}:{expires_at}:{self.fingerprint(password_hash)}"
+        payload = _b64encode(claims.encode())
+        return f"{payload}.{self._sign(payload)}"
+
+    def verify(self, token: str, now: Optional[float] = None) -> Optional[TokenClaims]:
+        """
+        Проверяет подпись и срок жизни токена.
+
+        Совпадение fingerprint с текущим паролем проверяет вызывающий код,
+        так как для этого нужен пользователь из базы.
+
+        Args:
+            token: токен доступа
+            now: текущее время (для тестов)
+
+        Returns:
+            Optional[TokenClaims]: Данные токена или None, если токен поддельный или истек
+        """
+        try:
+            payload, signature = token.split(".")
+            if not hmac.compare_digest(signature, self._sign(payload)):
+                return None
+            user_id, expires_at, fingerprint = _b64decode(payload).decode().split(":")
+            claims = TokenClaims(int(user_id), int(expires_at), fingerprint)
+        except ValueError:
+            return None
+
+        if claims.expires_at <= (time.time() if now is None else now):
+            return None
+        return claims
+
+
+@lru_cache()
+def get_token_signer() -> TokenSigner:
+    """
+    Получает подписчик токенов по настройкам приложения.
+
+    Без SECRET_KEY ключ генерируется при запуске: токены перестанут действовать
+    после перезапуска и не будут приниматься другими воркерами.
+
+    Raises:
+        ValueError: SECRET_KEY - известная заглушка или слишком короткий
+    """
+    settings = get_settings()
+    if settings.SECRET_KEY:
+        secret = settings.SECRET_KEY.encode()
+    else:
+        logger.warning("SECRET_KEY не задан, используется случайный ключ подписи токенов")
+        secret = secrets.token_bytes(32)
+    return TokenSigner(secret, settings.TOKEN_TTL_SECONDS or DEFAULT_TOKEN_TTL_SECONDS)
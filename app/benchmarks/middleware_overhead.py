@@ -0,0 +1,113 @@
+"""
+Накладные расходы middleware безопасности на запрос к /health.
+
+Сравнивает прежние три слоя @app.middleware("http") (BaseHTTPMiddleware)
+с SecurityMiddleware при полном журнале и при выборке 1%. Журнал пишется
+в пустой приемник, чтобы учитывалось форматирование строк, но не вывод.
+
+Пример:
+    cd app && python -m benchmarks.middleware_overhead --requests 5000
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse
+from loguru import logger
+
+from middleware.security import SecurityMiddleware
+
+
+def create_bare_app() -> FastAPI:
+    """Приложение только с /health"""
+    app = FastAPI()
+
+    @app.get("/health")
+    async def health_check():
+        return {"status": "healthy"}
+
+    return app
+
+
+def create_legacy_app() -> FastAPI:
+    """Приложение с тремя слоями BaseHTTPMiddleware, как до SecurityMiddleware"""
+    app = create_bare_app()
+
+    @app.middleware("http")
+    async def security_logging_middleware(request: Request, call_next):
+        logger.info(f"Request: {request.method} {request.url.path}")
+        if request.url.path in ["/api/users/signin", "/api/users/signup"]:
+            logger.info(f"Authentication attempt: {request.method} {request.url.path}")
+        return await call_next(request)
+
+    @app.middleware("http")
+    async def add_security_headers(request: Request, call_next):
+        response = await call_next(request)
+        response.headers["X-Content-Type-Options"] = "nosniff"
+        response.headers["X-Frame-Options"] = "DENY"
+        response.headers["X-XSS-Protection"] = "1; mode=block"
+        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+        return response
+
+    @app.middleware("http")
+    async def attack_prevention_middleware(request: Request, call_next):
+        for header in ["x-forwarded-for", "x-real-ip", "x-forwarded-proto"]:
+            if header in request.headers:
+                return HTMLResponse(content="Suspicious request", status_code=400)
+        if len(request.url.path) > 200:
+            return HTMLResponse(content="Path too long", status_code=400)
+        if len(str(request.query_params)) > 1000:
+            return HTMLResponse(content="Query parameters too long", status_code=400)
+        return await call_next(request)
+
+    return app
+
+
+def create_security_app(log_sample_rate: float) -> FastAPI:
+    """Приложение с SecurityMiddleware"""
+    app = create_bare_app()
+    app.add_middleware(SecurityMiddleware, log_sample_rate=log_sample_rate)
+    return app
+
+
+async def measure(app: FastAPI, requests: int) -> float:
+    """Возвращает среднее время запроса к /health в микросекундах"""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(min(requests, 200)):
+            await client.get("/health")
+        start = time.perf_counter()
+        for _ in range(requests):
+            await client.get("/health")
+        return (time.perf_counter() - start) / requests * 1e6
+
+
+async def run(requests: int) -> None:
+    logger.remove()
+    logger.add(lambda message: None, level="INFO")
+
+    cases = [
+        ("no middleware", create_bare_app()),
+        ("3x BaseHTTPMiddleware", create_legacy_app()),
+        ("SecurityMiddleware", create_security_app(1.0)),
+        ("SecurityMiddleware 1% log", create_security_app(0.01)),
+    ]
+    results = [(name, await measure(app, requests)) for name, app in cases]
+
+    baseline = results[0][1]
+    print(f"{'stack':<28}{'us/request':>12}{'overhead us':>14}")
+    for name, micros in results:
+        print(f"{name:<28}{micros:>12.1f}{micros - baseline:>14.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Security middleware overhead on /health")
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Одновременные списания с одного кошелька.
+
+Сравнивает прежнее списание (чтение баланса, проверка и присваивание в
+Python, commit) с условным UPDATE ... RETURNING из
+services.crud.aio.wallet.make_transaction. Для каждого способа создается
+отдельный пользователь с кошельком, после замера они удаляются вместе с
+транзакциями. Баланс рассчитан на половину списаний: правильная реализация
+выполняет ровно половину и останавливается на нуле, потерянные обновления
+видны как расхождение баланса с суммой транзакций.
+
+Нужна база из настроек приложения (POSTGRES_*).
+
+Пример:
+    cd app && python -m benchmarks.wallet_contention --workers 20 --debits 50
+"""
+import argparse
+import asyncio
+import secrets
+import time
+
+from loguru import logger
+from sqlalchemy import delete
+from sqlmodel import func, select
+
+from database.database import new_async_session
+from models.constants import TransactionType
+from models.transaction import Transaction
+from models.user import User
+from models.wallet import Wallet
+import models.prediction, models.movie  # noqa: F401  связи User
+from services.crud.aio.wallet import make_transaction
+
+DEBIT = 10.0
+
+
+async def legacy_make_transaction(wallet: Wallet, amount: float, type: TransactionType, session) -> Wallet:
+    """Списание чтением и записью баланса, как до условного UPDATE"""
+    if amount < 0 and wallet.balance + amount < 0:
+        raise ValueError("Недостаточно средств")
+    session.add(Transaction(user_id=wallet.user_id, wallet_id=wallet.id, amount=amount, type=type))
+    wallet.balance += amount
+    session.add(wallet)
+    await session.commit()
+    return wallet
+
+
+async def create_wallet(balance: float) -> int:
+    """Создает пользователя с кошельком и возвращает ID кошелька"""
+    async with new_async_session() as session:
+        user = User(email=f"bench-{secrets.token_hex(6)}@example.com", password_hash="-")
+        session.add(user)
+        await session.flush()
+        wallet = Wallet(user_id=user.id, balance=balance)
+        session.add(wallet)
+        await session.commit()
+        return wallet.id
+
+
+async def drop_wallet(wallet_id: int) -> None:
+    """Удаляет кошелек, его транзакции и пользователя"""
+    async with new_async_session() as session:
+        wallet = await session.get(Wallet, wallet_id)
+        await session.exec(delete(Transaction).where(Transaction.wallet_id == wallet_id))
+        await session.exec(delete(Wallet).where(Wallet.id == wallet_id))
+        await session.exec(delete(User).where(User.id == wallet.user_id))
+        await session.commit()
+
+
+async def measure(debit, workers: int, debits: int) -> dict:
+    """Запускает workers задач по debits списаний и сверяет баланс с журналом"""
+    initial = workers * debits * DEBIT / 2
+    wallet_id = await create_wallet(initial)
+
+    async def worker() -> int:
+        succeeded = 0
+        for _ in range(debits):
+            async with new_async_session() as session:
+                wallet = await session.get(Wallet, wallet_id)
+                try:
+                    await debit(wallet, -DEBIT, TransactionType.PREDICTION, session)
+                    succeeded += 1
+                except ValueError:
+                    await session.rollback()
+        return succeeded
+
+    try:
+        start = time.perf_counter()
+        succeeded = sum(await asyncio.gather(*(worker() for _ in range(workers))))
+        elapsed = time.perf_counter() - start
+
+        async with new_async_session() as session:
+            balance = (await session.get(Wallet, wallet_id)).balance
+            ledger = (await session.exec(
+                select(func.coalesce(func.sum(Transaction.amount), 0)).where(Transaction.wallet_id == wallet_id)
+            )).one()
+    finally:
+        await drop_wallet(wallet_id)
+
+    return {
+        "ops/s": workers * debits / elapsed,
+        "succeeded": succeeded,
+        "balance": balance,
+        "lost": balance - (initial + float(ledger)),
+    }
+
+
+async def run(workers: int, debits: int) -> None:
+    logger.remove()
+
+    cases = [
+        ("read-modify-write", legacy_make_transaction),
+        ("UPDATE ... RETURNING", make_transaction),
+    ]
+    print(f"{workers} workers x {debits} debits of {DEBIT}, balance for {workers * debits // 2}")
+    print(f"{'debit':<24}{'ops/s':>10}{'succeeded':>12}{'balance':>12}{'lost':>10}")
+    for name, debit in cases:
+        result = await measure(debit, workers, debits)
+        print(
+            f"{name:<24}{result['ops/s']:>10.0f}{result['succeeded']:>12}"
+            f"{result['balance']:>12.2f}{result['lost']:>10.2f}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Concurrent debits from one wallet")
+    parser.add_argument("--workers", type=int, default=20)
+    parser.add_argument("--debits", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(run(args.workers, args.debits))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Отдельный процесс Telegram бота.
+
+API не запускает бота: при нескольких воркерах uvicorn каждый из них
+запустил бы свой polling, а блокирующая работа бота конкурировала бы за GIL
+с обработкой запросов. Запускается после python main.py, когда база готова.
+
+Пример:
+    python bot_runner.py
+"""
+from loguru import logger
+from sqlmodel import Session
+from database.config import get_settings
+from database.database import engine
+from routes.bot.raw import bot
+from services.crud.movie import refresh_title_index, start_title_index_refresh
+from services.tracing import setup_tracing
+
+
+def main() -> None:
+    if not bot:
+        raise SystemExit("BOT_TOKEN is not set")
+    setup_tracing("movie-bot")
+
+    # Индекс названий нужен inline-подсказкам бота и строится в его процессе
+    try:
+        with Session(engine) as session:
+            refresh_title_index(session)
+    except Exception as e:
+        logger.error(f"Failed to build title autocomplete index: {e}")
+    # Каталог меняют другие процессы (воркеры API, CLI ingest): индекс сверяется с ним периодически
+    start_title_index_refresh(engine, get_settings().TITLE_INDEX_REFRESH_SECONDS)
+
+    logger.info("Starting Telegram bot...")
+    bot.infinity_polling(timeout=60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""
+CLI для управления каталогом фильмов.
+
+Примеры:
+    python cli.py ingest --incremental
+    python cli.py ingest --file data/catalog.parquet
+    python cli.py reembed --model all-MiniLM-L6-v2
+    python cli.py reindex --method hnsw
+    python cli.py verify
+    python cli.py stats
+    python cli.py facets --rebuild
+"""
+from __future__ import annotations
+import argparse
+import json
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from sqlalchemy import create_engine
+from sqlmodel import Session
+
+from database.config import get_settings
+from models.constants import ModelTypes
+
+
+LAST_INGEST_FILE = Path(__file__).resolve().parent / 'data' / '.last_ingest.json'
+
+
+class StageTimer:
+    """Замеряет длительность этапов команды и считает пропускную способность"""
+
+    def __init__(self) -> None:
+        self.stages: List[Dict] = []
+
+    @contextmanager
+    def stage(self, name: str):
+        """
+        Замеряет этап. Внутри блока можно указать количество обработанных строк
+        через record["rows"].
+        """
+        record = {"stage": name, "rows": None, "seconds": 0.0}
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] = time.perf_counter() - start
+            self.stages.append(record)
+
+    def report(self) -> None:
+        """Печатает таблицу этапов с временем и строк/с"""
+        print(f"{'stage':<20}{'seconds':>10}{'rows':>12}{'rows/s':>12}")
+        for record in self.stages:
+            rows = record["rows"]
+            rate = rows / record["seconds"] if rows and record["seconds"] > 0 else None
+            print(
+                f"{record['stage']:<20}{record['seconds']:>10.2f}"
+                f"{rows if rows is not None else '-':>12}"
+                f"{f'{rate:.1f}' if rate is not None else '-':>12}"
+            )
+
+
+def get_cli_engine():
+    """
+    Создает отдельный движок для CLI.
+
+    lock_timeout не дает CLI вставать в очередь за блокировками и тем самым
+    задерживать запросы API на живой базе.
+    """
+    settings = get_settings()
+    return create_engine(
+        settings.DATABASE_URL_psycopg,
+        pool_size=1,
+        max_overflow=0,
+        pool_pre_ping=True,
+        connect_args={"options": "-c lock_timeout=5s -c application_name=catalog-cli"},
+    )
+
+
+def configure_models() -> None:
+    """Импортирует все модели, чтобы связи между ними разрешились"""
+    from sqlalchemy.orm import configure_mappers
+    import models.user, models.wallet, models.transaction, models.prediction, models.movie  # noqa: F401
+    configure_mappers()
+
+
+def load_model(model_name: str):
+    """Загружает модель SentenceTransformer по имени"""
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer('sentence-transformers/' + model_name)
+
+
+def cmd_ingest(args, engine, timer: StageTimer) -> None:
+    """Загрузка фильмов: полная, инкрементальная или из одного Parquet/Arrow файла"""
+    from services.crud.movie import update_movie_database
+    from services.crud.movie_import import import_movie_catalog
+    from services.embeddings.store import get_embedding_store
+
+    with Session(engine) as session:
+        if args.file:
+            with timer.stage("import") as record:
+                read_count, added_count = import_movie_catalog(Path(args.file), session, args.batch_size)
+                record["rows"] = read_count
+            result = {"added": added_count, "skipped": read_count - added_count}
+        else:
+            with timer.stage("load_model"):
+                model = load_model(args.model)
+            store = None if args.no_store else get_embedding_store(args.model)
+            with timer.stage("ingest") as record:
+                result = update_movie_database(model, session, store, incremental=args.incremental)
+                record["rows"] = result["added"] + result["skipped"]
+
+    print(f"added={result['added']} skipped={result['skipped']}")
+    ingest_record = timer.stages[-1]
+    save_last_ingest({
+        "finished_at": datetime.utcnow().isoformat(),
+        "mode": "file" if args.file else ("incremental" if args.incremental else "full"),
+        "rows": ingest_record["rows"],
+        "added": result["added"],
+        "seconds": round(ingest_record["seconds"], 3),
+        "rows_per_second": round(ingest_record["rows"] / ingest_record["seconds"], 1)
+        if ingest_record["seconds"] > 0 else None,
+    })
+
+
+def cmd_reembed(args, engine, timer: StageTimer) -> None:
+    """Пересчет эмбеддингов каталога новой моделью"""
+    from services.crud.movie import reembed_movies
+    from services.embeddings.store import get_embedding_store
+
+    with timer.stage("load_model"):
+        model = load_model(args.model)
+    store = None if args.no_store else get_embedding_store(args.model)
+
+    with Session(engine) as session:
+        with timer.stage("reembed") as record:
+            record["rows"] = reembed_movies(model, session, store, args.batch_size)
+
+    if args.model != ModelTypes.MULTILINGUAL.value:
+        print(
+            "warning: ml_worker encodes queries with "
+            f"{ModelTypes.MULTILINGUAL.value}; switch it to {args.model} as well"
+        )
+
+
+def cmd_reindex(args, engine, timer: StageTimer) -> None:
+    """Перестроение векторного индекса без блокировки таблицы"""
+    from services.crud.movie import rebuild_vector_index
+
+    with timer.stage(f"reindex_{args.method}"):
+        rebuild_vector_index(engine, args.method, args.lists)
+
+
+def cmd_verify(args, engine, timer: StageTimer) -> None:
+    """Поиск фильмов с пустыми эмбеддингами или эмбеддингами неверной размерности"""
+    from services.crud.movie import find_invalid_embeddings
+
+    with Session(engine) as session:
+        with timer.stage("verify") as record:
+            invalid = find_invalid_embeddings(session)
+            record["rows"] = len(invalid)
+
+    for movie_id, title in invalid[:args.limit]:
+        print(f"{movie_id}\t{title}")
+    print(f"invalid={len(invalid)}")
+    if invalid:
+        sys.exit(1)
+
+
+def cmd_stats(args, engine, timer: StageTimer) -> None:
+    """Размер каталога, размер индексов и пропускная способность последней загрузки"""
+    from services.crud.movie import get_catalog_stats
+
+    with Session(engine) as session:
+        with timer.stage("stats"):
+            stats = get_catalog_stats(session)
+
+    stats["last_ingest"] = load_last_ingest()
+    print(json.dumps(stats, indent=2, ensure_ascii=False))
+
+
+def cmd_facets(args, engine, timer: StageTimer) -> None:
+    """Счетчики по жанрам и десятилетиям, при необходимости с полным пересчетом"""
+    from services.crud.movie import get_movie_facets, rebuild_movie_facets
+
+    with Session(engine) as session:
+        if args.rebuild:
+            with timer.stage("rebuild_facets") as record:
+                record["rows"] = rebuild_movie_facets(session)
+        with timer.stage("facets"):
+            facets = get_movie_facets(session)
+
+    print(json.dumps(facets, indent=2, ensure_ascii=False))
+
+
+def save_last_ingest(data: Dict) -> None:
+    """Сохраняет итоги последней загрузки для команды stats"""
+    try:
+        LAST_INGEST_FILE.write_text(json.dumps(data, ensure_ascii=False))
+    except OSError as e:
+        print(f"warning: unable to save ingest stats: {e}")
+
+
+def load_last_ingest() -> Optional[Dict]:
+    """Читает итоги последней загрузки"""
+    try:
+        return json.loads(LAST_INGEST_FILE.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Создает парсер аргументов командной строки"""
+    parser = argparse.ArgumentParser(description="Movie catalog management")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    ingest = subparsers.add_parser("ingest", help="load movies from the data directory or a file")
+    ingest.add_argument("--incremental", action="store_true", help="skip movies already in the database before encoding")
+    ingest.add_argument("--file", help="Parquet/Arrow file with precomputed embeddings")
+    ingest.add_argument("--model", default=ModelTypes.MULTILINGUAL.value)
+    ingest.add_argument("--no-store", action="store_true", help="do not use the on-disk embedding store")
+    ingest.add_argument("--batch-size", type=int, default=10000)
+    ingest.set_defaults(handler=cmd_ingest)
+
+    reembed = subparsers.add_parser("reembed", help="recompute all embeddings with another model")
+    reembed.add_argument("--model", required=True, choices=[m.value for m in ModelTypes])
+    reembed.add_argument("--no-store", action="store_true", help="do not use the on-disk embedding store")
+    reembed.add_argument("--batch-size", type=int, default=256)
+    reembed.set_defaults(handler=cmd_reembed)
+
+    reindex = subparsers.add_parser("reindex", help="rebuild the vector index concurrently")
+    reindex.add_argument("--method", choices=["hnsw", "ivfflat"], default="hnsw")
+    reindex.add_argument("--lists", type=int, default=100, help="ivfflat lists")
+    reindex.set_defaults(handler=cmd_reindex)
+
+    verify = subparsers.add_parser("verify", help="find rows with null or wrong-dimension embeddings")
+    verify.add_argument("--limit", type=int, default=50, help="max rows to print")
+    verify.set_defaults(handler=cmd_verify)
+
+    stats = subparsers.add_parser("stats", help="catalog size, index size and last ingest throughput")
+    stats.set_defaults(handler=cmd_stats)
+
+    facets = subparsers.add_parser("facets", help="movie counts per genre and decade")
+    facets.add_argument("--rebuild", action="store_true", help="recompute counts from the catalog")
+    facets.set_defaults(handler=cmd_facets)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    configure_models()
+    engine = get_cli_engine()
+    timer = StageTimer()
+    try:
+        args.handler(args, engine, timer)
+    finally:
+        timer.report()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -23,6 +23,36 @@ class Settings(BaseSettings):
     DEBUG: Optional[bool] = None
     API_VERSION: Optional[str] = None
     BOT_TOKEN: Optional[str] = None
+    REQUEST_LOG_SAMPLE_RATE: Optional[float] = None
+    WEB_CONCURRENCY: Optional[int] = None
+    TRACE_EXPORT_FILE: Optional[str] = None
+    SQL_SLOW_QUERY_MS: Optional[float] = None
+    SQL_QUERY_COUNT_WARNING: Optional[int] = None
+    SQL_DEBUG_HEADER: Optional[bool] = None
+    SERVER_TIMING_DETAIL: Optional[bool] = None
+    
+    # Admission control settings
+    ML_QUEUE_MAX_DEPTH: Optional[int] = None
+    ML_MAX_IN_FLIGHT: Optional[int] = None
+    ML_RPC_TIMEOUT_SECONDS: Optional[float] = None
+    ADMISSION_RETRY_AFTER_SECONDS: Optional[int] = None
+    JOB_TTL_SECONDS: Optional[int] = None
+    JOB_MAX_PENDING_PER_USER: Optional[int] = None
+    
+    # Auth settings
+    SECRET_KEY: Optional[str] = None
+    TOKEN_TTL_SECONDS: Optional[int] = None
+    BASIC_AUTH_CACHE_TTL_SECONDS: Optional[int] = None
+    BASIC_AUTH_CACHE_SIZE: Optional[int] = None
+    LOGIN_MAX_ATTEMPTS: Optional[int] = None
+    LOGIN_WINDOW_SECONDS: Optional[int] = None
+    RATE_LIMIT_BACKEND: Optional[str] = None
+    RATE_LIMIT_SQLITE_PATH: Optional[str] = None
+    RATE_LIMIT_MAX_KEYS: Optional[int] = None
+    
+    # Embedding store settings
+    EMBEDDING_STORE_DIR: Optional[str] = None
+    TITLE_INDEX_REFRESH_SECONDS: Optional[float] = None
     
     @property
     def DATABASE_URL_asyncpg(self):
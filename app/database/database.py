@@ -1,6 +1,60 @@
+import time
 from sqlmodel import SQLModel, Session, create_engine 
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 from contextlib import contextmanager
+from loguru import logger
+from services.metrics import record_query
 from .config import get_settings
+from .schema import convert_money_columns, create_extensions, create_missing_indexes, create_facet_triggers
+
+DEFAULT_SLOW_QUERY_MS = 200
+# Размер пула каждого engine: постоянные соединения и дополнительные при пиках
+POOL_SIZE = 5
+POOL_MAX_OVERFLOW = 10
+
+
+def normalize_statement(statement: str) -> str:
+    """Текст запроса в одну строку для журнала и отладочного заголовка"""
+    return " ".join(statement.split())
+
+
+def instrument_engine(engine: Engine, slow_query_ms: float) -> None:
+    """
+    Подключает учет SQL запросов к engine.
+
+    Каждый запрос попадает в фазу "db" текущего HTTP запроса (Server-Timing,
+    гистограмма, число запросов на маршрут). Запросы дольше slow_query_ms
+    пишутся в журнал; значения параметров не пишутся, так как среди них
+    хэши паролей, токены и тексты запросов пользователей.
+
+    Args:
+        engine: синхронный engine или AsyncEngine.sync_engine
+        slow_query_ms: порог медленного запроса в миллисекундах
+    """
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info["query_start"].pop()
+        statement = normalize_statement(statement)
+        record_query(statement, seconds)
+        if seconds * 1000 >= slow_query_ms:
+            count = len(parameters) if parameters else 0
+            logger.warning(
+                "Slow SQL query ({:.1f} ms, {} parameters redacted): {}",
+                seconds * 1000, count, statement,
+            )
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        starts = exception_context.connection.info.get("query_start") if exception_context.connection else None
+        if starts:
+            starts.pop()
 
 def get_database_engine():
     """
@@ -14,19 +68,55 @@ def get_database_engine():
     engine = create_engine(
         url=settings.DATABASE_URL_psycopg,
         echo=settings.DEBUG,
-        pool_size=5,
-        max_overflow=10,
+        pool_size=POOL_SIZE,
+        max_overflow=POOL_MAX_OVERFLOW,
         pool_pre_ping=True,
         pool_recycle=3600
     )
+    instrument_engine(engine, settings.SQL_SLOW_QUERY_MS or DEFAULT_SLOW_QUERY_MS)
     return engine
 
+def get_async_database_engine() -> AsyncEngine:
+    """
+    Создает асинхронный engine на asyncpg для обработчиков API.
+    
+    Returns:
+        AsyncEngine: Настроенный асинхронный engine
+    """
+    settings = get_settings()
+    
+    async_engine = create_async_engine(
+        url=settings.DATABASE_URL_asyncpg,
+        echo=settings.DEBUG,
+        pool_size=POOL_SIZE,
+        max_overflow=POOL_MAX_OVERFLOW,
+        pool_pre_ping=True,
+        pool_recycle=3600
+    )
+    instrument_engine(async_engine.sync_engine, settings.SQL_SLOW_QUERY_MS or DEFAULT_SLOW_QUERY_MS)
+    return async_engine
+
 engine = get_database_engine()
+async_engine = get_async_database_engine()
 
 def get_session():
     """Получает сессию базы данных"""
     with Session(engine) as session:
         yield session
+
+def new_async_session() -> AsyncSession:
+    """
+    Создает асинхронную сессию для кода вне обработчика запроса (фоновые задачи).
+    
+    Объекты не истекают после commit: в асинхронном коде ленивая
+    перезагрузка атрибутов невозможна.
+    """
+    return AsyncSession(async_engine, expire_on_commit=False)
+
+async def get_async_session():
+    """Получает асинхронную сессию базы данных"""
+    async with new_async_session() as session:
+        yield session
         
 def init_db(drop_all: bool = False) -> None:
     """
@@ -40,10 +130,14 @@ def init_db(drop_all: bool = False) -> None:
     """
     try:
         engine = get_database_engine()
+        create_extensions(engine)
         if drop_all:
             SQLModel.metadata.drop_all(engine)
         
         SQLModel.metadata.create_all(engine)
+        create_missing_indexes(engine)
+        convert_money_columns(engine)
+        create_facet_triggers(engine)
     except Exception as e:
         raise
 
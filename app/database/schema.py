@@ -0,0 +1,191 @@
+import re
+from loguru import logger
+from sqlalchemy import Engine, text
+from sqlalchemy.schema import CreateIndex
+from sqlmodel import SQLModel
+
+from models.constants import FacetType
+# Таблица фасетов должна попасть в metadata до create_all, так как ее используют триггеры
+from models.movie_facet import MovieFacet  # noqa: F401
+
+
+# Расширения Postgres, от которых зависят типы и индексы моделей
+EXTENSIONS = ("vector", "pg_trgm")
+
+
+def create_extensions(engine: Engine) -> None:
+    """
+    Создает необходимые расширения Postgres.
+
+    init-scripts выполняются только на пустом томе, поэтому расширения
+    проверяются и при каждом запуске.
+
+    Args:
+        engine: движок базы данных
+    """
+    with engine.begin() as connection:
+        for extension in EXTENSIONS:
+            connection.execute(text(f"CREATE EXTENSION IF NOT EXISTS {extension}"))
+
+
+def create_missing_indexes(engine: Engine) -> None:
+    """
+    Создает индексы моделей, которых еще нет в базе.
+
+    create_all создает индексы только вместе с новыми таблицами, поэтому
+    индексы, добавленные в модели позже, досоздаются отдельно - через
+    CREATE INDEX CONCURRENTLY на соединении в autocommit, как
+    rebuild_vector_index: построение индекса на большом каталоге не блокирует
+    запись в таблицу. Невалидный индекс, оставшийся от прерванного
+    построения, удаляется и строится заново.
+
+    Args:
+        engine: движок базы данных
+    """
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        for table in SQLModel.metadata.sorted_tables:
+            existing = dict(connection.execute(text(
+                "SELECT c.relname, i.indisvalid FROM pg_index i "
+                "JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE i.indrelid = to_regclass(:table)"
+            ), {"table": f'"{table.name}"'}).all())
+            for index in table.indexes:
+                valid = existing.get(index.name)
+                if valid:
+                    continue
+                if valid is False:
+                    logger.warning(f"Индекс {index.name} невалиден, строится заново")
+                    connection.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{index.name}"'))
+
+                ddl = str(CreateIndex(index).compile(dialect=connection.dialect))
+                ddl = re.sub(r"^CREATE (UNIQUE )?INDEX", r"CREATE \1INDEX CONCURRENTLY", ddl)
+                logger.info(f"Построение индекса {index.name}")
+                connection.execute(text(ddl))
+
+
+# Денежные колонки, созданные ранними версиями схемы как double precision
+MONEY_COLUMNS = (("wallet", "balance"), ("transaction", "amount"), ("prediction", "cost"))
+
+
+def convert_money_columns(engine: Engine) -> None:
+    """
+    Переводит денежные колонки из double precision в numeric(12, 2).
+
+    create_all не меняет типы существующих колонок, поэтому базы, созданные
+    до перехода на NUMERIC, приводятся здесь. Значения округляются до копейки.
+    ALTER переписывает таблицу под эксклюзивной блокировкой и выполняется
+    только для колонок, которые еще не переведены.
+
+    Args:
+        engine: движок базы данных
+    """
+    with engine.begin() as connection:
+        for table, column in MONEY_COLUMNS:
+            data_type = connection.exec_driver_sql(
+                "SELECT data_type FROM information_schema.columns "
+                "WHERE table_schema = current_schema() AND table_name = %s AND column_name = %s",
+                (table, column),
+            ).scalar()
+            if data_type != "double precision":
+                continue
+            connection.exec_driver_sql(
+                f'ALTER TABLE "{table}" ALTER COLUMN {column} '
+                f"TYPE numeric(12, 2) USING round({column}::numeric, 2)"
+            )
+            logger.info(f"Колонка {table}.{column} переведена в numeric(12, 2)")
+
+
+# Вклад набора строк movie в счетчики фасетов: каждый жанр фильма считается
+# один раз, десятилетие хранится как начало десятилетия ('1990')
+_FACET_DELTA_SQL = """
+    SELECT '{genre}' AS facet, g.genre AS value, {{sign}} AS delta
+    FROM {{rows}} r CROSS JOIN LATERAL (SELECT DISTINCT unnest(r.genres)) AS g(genre)
+    UNION ALL
+    SELECT '{decade}', ((r.year / 10) * 10)::text, {{sign}}
+    FROM {{rows}} r
+""".format(genre=FacetType.GENRE.value, decade=FacetType.DECADE.value)
+
+# Применение дельты: строки упорядочены, чтобы параллельные транзакции
+# блокировали строки фасетов в одном порядке и не попадали в deadlock
+_FACET_APPLY_SQL = """
+    INSERT INTO moviefacet (facet, value, count)
+    SELECT facet, value, sum(delta) FROM ({deltas}) AS d
+    GROUP BY facet, value
+    HAVING sum(delta) <> 0
+    ORDER BY facet, value
+    ON CONFLICT (facet, value) DO UPDATE SET count = moviefacet.count + EXCLUDED.count;
+    DELETE FROM moviefacet WHERE count <= 0;
+"""
+
+REBUILD_FACETS_SQL = """
+    LOCK TABLE movie IN SHARE MODE;
+    DELETE FROM moviefacet;
+    INSERT INTO moviefacet (facet, value, count)
+    SELECT facet, value, sum(delta) FROM ({deltas}) AS d GROUP BY facet, value;
+""".format(deltas=_FACET_DELTA_SQL.format(rows="movie", sign=1))
+
+
+def _facet_function_sql(name: str, body: str) -> str:
+    """Формирует DDL триггерной функции plpgsql"""
+    return (
+        f"CREATE OR REPLACE FUNCTION {name}() RETURNS trigger LANGUAGE plpgsql AS $$\n"
+        f"BEGIN\n{body}\nRETURN NULL;\nEND;\n$$"
+    )
+
+
+FACET_FUNCTIONS_SQL = (
+    _facet_function_sql("movie_facets_on_insert", _FACET_APPLY_SQL.format(
+        deltas=_FACET_DELTA_SQL.format(rows="new_rows", sign=1)
+    )),
+    _facet_function_sql("movie_facets_on_delete", _FACET_APPLY_SQL.format(
+        deltas=_FACET_DELTA_SQL.format(rows="old_rows", sign=-1)
+    )),
+    _facet_function_sql("movie_facets_on_update", _FACET_APPLY_SQL.format(
+        deltas=_FACET_DELTA_SQL.format(rows="new_rows", sign=1)
+        + " UNION ALL "
+        + _FACET_DELTA_SQL.format(rows="old_rows", sign=-1)
+    )),
+    _facet_function_sql("movie_facets_on_truncate", "DELETE FROM moviefacet;"),
+)
+
+# Триггеры уровня оператора с transition tables: пакетная загрузка каталога
+# обновляет счетчики одним запросом на оператор, а не на каждую строку
+FACET_TRIGGERS_SQL = (
+    "CREATE TRIGGER movie_facets_insert AFTER INSERT ON movie "
+    "REFERENCING NEW TABLE AS new_rows "
+    "FOR EACH STATEMENT EXECUTE FUNCTION movie_facets_on_insert()",
+    "CREATE TRIGGER movie_facets_delete AFTER DELETE ON movie "
+    "REFERENCING OLD TABLE AS old_rows "
+    "FOR EACH STATEMENT EXECUTE FUNCTION movie_facets_on_delete()",
+    "CREATE TRIGGER movie_facets_update AFTER UPDATE ON movie "
+    "REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows "
+    "FOR EACH STATEMENT EXECUTE FUNCTION movie_facets_on_update()",
+    "CREATE TRIGGER movie_facets_truncate AFTER TRUNCATE ON movie "
+    "FOR EACH STATEMENT EXECUTE FUNCTION movie_facets_on_truncate()",
+)
+
+
+def create_facet_triggers(engine: Engine) -> None:
+    """
+    Создает триггеры, поддерживающие таблицу moviefacet.
+
+    Функции триггеров обновляются при каждом запуске. Сами триггеры создаются
+    только если их еще нет - тогда же счетчики заполняются по текущему каталогу.
+
+    Args:
+        engine: движок базы данных
+    """
+    with engine.begin() as connection:
+        for statement in FACET_FUNCTIONS_SQL:
+            connection.exec_driver_sql(statement)
+
+        installed = connection.exec_driver_sql(
+            "SELECT 1 FROM pg_trigger "
+            "WHERE tgrelid = 'movie'::regclass AND tgname = 'movie_facets_insert'"
+        ).first()
+        if installed:
+            return
+
+        for statement in FACET_TRIGGERS_SQL:
+            connection.exec_driver_sql(statement)
+        connection.exec_driver_sql(REBUILD_FACETS_SQL)
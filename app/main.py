@@ -2,15 +2,16 @@ from __future__ import annotations
 from database.config import get_settings
 from services.crud.movie import (
     update_movie_database, 
-    get_all_movies
+    count_movies
 )
 import time
 import logging
 from sqlalchemy import create_engine, text
-from database.database import engine
+from database.database import engine, init_db
 from sqlmodel import Session
 from sentence_transformers import SentenceTransformer
 from models.constants import ModelTypes
+from services.embeddings.store import get_embedding_store
 
 
 # Настройка логгирования (по желанию, но полезно)
@@ -54,6 +55,8 @@ if __name__ == "__main__":
     from models.wallet import Wallet
     from models.transaction import Transaction
     from models.prediction_movie_link import PredictionMovieLink
+    from models.movie_facet import MovieFacet
+    from models.prediction_job import PredictionJob
     
     # Настраиваем реестр для корректной работы связей
     from sqlmodel import SQLModel
@@ -61,18 +64,19 @@ if __name__ == "__main__":
     
     # Явно настраиваем мапперы для корректной работы связей
     configure_mappers()
-    SQLModel.metadata.create_all(engine)
+    init_db()
     
     with Session(engine) as session:
         # Проверяем количество фильмов в базе
-        movies_count = len(get_all_movies(session))
+        movies_count = count_movies(session)
         logger.info(f"В базе данных найдено {movies_count} фильмов")
         
         # Если фильмов нет, загружаем из JSON файлов
         if movies_count == 0:
             logger.info("Загружаем фильмы из JSON файлов...")
             model = SentenceTransformer('sentence-transformers/' + ModelTypes.MULTILINGUAL.value)
-            update_movie_database(model, session)
+            store = get_embedding_store(ModelTypes.MULTILINGUAL.value)
+            update_movie_database(model, session, store)
             logger.info('База данных с фильмами успешно обновлена')
             
             # Для максимальной точности не создаем ivfflat индекс
@@ -0,0 +1,7 @@
+"""ASGI middleware приложения"""
+from middleware.compression import CompressionMiddleware
+from middleware.security import SecurityMiddleware
+from middleware.timing import TimingMiddleware
+from middleware.tracing import TracingMiddleware
+
+__all__ = ["CompressionMiddleware", "SecurityMiddleware", "TimingMiddleware", "TracingMiddleware"]
@@ -0,0 +1,188 @@
+import zlib
+from typing import Optional, Tuple
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен: без него отдается gzip
+    brotli = None
+
+DEFAULT_MINIMUM_SIZE = 1024
+
+# Типы, которые имеет смысл сжимать; изображения и архивы уже сжаты
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+)
+# Поток событий отправляется по мере готовности; сжатие буферизовало бы его
+STREAMING_TYPES = ("text/event-stream",)
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Выбирает кодирование ответа по заголовку Accept-Encoding.
+
+    br предпочтительнее gzip, если установлен пакет brotli. Кодирования с
+    q=0 считаются запрещенными клиентом.
+
+    Args:
+        accept_encoding: значение заголовка Accept-Encoding
+
+    Returns:
+        Optional[str]: "br", "gzip" или None
+    """
+    accepted = set()
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    """Потоковый компрессор с общим интерфейсом для gzip и brotli"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int) -> None:
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+            self._gzip = None
+        else:
+            self._brotli = None
+            self._gzip = zlib.compressobj(gzip_level, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data: bytes) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.process(data)
+        return self._gzip.compress(data)
+
+    def flush(self) -> bytes:
+        if self._brotli is not None:
+            return self._brotli.finish()
+        return self._gzip.flush()
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware сжатия ответов gzip или brotli.
+
+    Ответ сжимается, если клиент это поддерживает, тип содержимого текстовый
+    и тело не меньше minimum_size. Для ответа из одного сообщения размер
+    известен сразу; потоковые ответы сжимаются по мере отправки. Сильный
+    ETag сжатого ответа становится слабым, так как байты тела меняются.
+
+    Args:
+        app: ASGI приложение
+        minimum_size: минимальный размер тела для сжатия
+        gzip_level: уровень сжатия gzip
+        brotli_quality: качество сжатия brotli
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = DEFAULT_MINIMUM_SIZE,
+        gzip_level: int = 6,
+        brotli_quality: int = 4
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """Состояние одного ответа: откладывает http.response.start до первого тела"""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send) -> None:
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self._start: Optional[Message] = None
+        self._compressor: Optional[_Compressor] = None
+        self._passthrough = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self._start = message
+            self._passthrough = not self._should_compress(Headers(raw=message["headers"]))
+            if self._passthrough:
+                await self._send(message)
+            return
+
+        if message["type"] != "http.response.body" or self._passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self._compressor is None:
+            if not more_body and len(body) < self.middleware.minimum_size:
+                self._passthrough = True
+                await self._send(self._start)
+                await self._send(message)
+                return
+            self._compressor = _Compressor(
+                self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality
+            )
+            compressed, headers = self._compress_first(body, more_body)
+            await self._send({**self._start, "headers": headers})
+            await self._send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+            return
+
+        compressed = self._compressor.compress(body)
+        if not more_body:
+            compressed += self._compressor.flush()
+        await self._send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+    def _should_compress(self, headers: Headers) -> bool:
+        """Проверяет, можно ли сжимать ответ с такими заголовками"""
+        if self._start["status"] in (204, 304) or "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "")
+        return content_type.startswith(COMPRESSIBLE_TYPES) and not content_type.startswith(STREAMING_TYPES)
+
+    def _compress_first(self, body: bytes, more_body: bool) -> Tuple[bytes, list]:
+        """Сжимает первое тело и формирует заголовки сжатого ответа"""
+        compressed = self._compressor.compress(body)
+        if not more_body:
+            compressed += self._compressor.flush()
+
+        headers = MutableHeaders(raw=list(self._start["headers"]))
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if more_body:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(len(compressed))
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = "W/" + etag
+        return compressed, headers.raw
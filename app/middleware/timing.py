@@ -0,0 +1,81 @@
+import json
+import time
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from loguru import logger
+from services.metrics import REQUEST_LATENCY, SQL_QUERIES, request_queries, server_timing, start_request
+
+
+class TimingMiddleware:
+    """
+    ASGI middleware замера запросов.
+
+    Собирает фазы, записанные обработчиком через services.metrics. В
+    заголовке Server-Timing по умолчанию отдается только total: разбивка по
+    фазам (auth.basic, user.check_password, db) позволяет по времени ответа
+    отличить проверку bcrypt от попадания в кэш и несуществующий email,
+    поэтому она включается только timing_detail. Длительность запроса попадает в
+    гистограмму http_request_duration_seconds с шаблоном пути маршрута
+    (/api/movies/genres/{genre}), а не с фактическим путем, чтобы число рядов
+    метрики не зависело от запросов.
+
+    Число SQL запросов на маршрут попадает в http_request_sql_queries;
+    запросы, выполнившие больше query_count_warning SQL запросов (признак
+    N+1), пишутся в журнал. При sql_debug_header и заголовке запроса
+    X-Debug-SQL: 1 ответ содержит список SQL запросов в X-SQL-Queries.
+
+    Args:
+        app: ASGI приложение
+        query_count_warning: порог числа SQL запросов для журнала; 0 - выключено
+        sql_debug_header: отдавать список SQL запросов по X-Debug-SQL
+        timing_detail: отдавать фазы в Server-Timing (только для отладки)
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        query_count_warning: int = 0,
+        sql_debug_header: bool = False,
+        timing_detail: bool = False,
+    ) -> None:
+        self.app = app
+        self.query_count_warning = query_count_warning
+        self.sql_debug_header = sql_debug_header
+        self.timing_detail = timing_detail
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        phases = start_request()
+        status_code = 500
+        debug_sql = self.sql_debug_header and Headers(scope=scope).get("x-debug-sql") == "1"
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                shown = phases if self.timing_detail else []
+                headers.append("Server-Timing", server_timing(shown, time.perf_counter() - start))
+                if debug_sql:
+                    headers["X-SQL-Queries"] = json.dumps(
+                        [{"sql": sql, "ms": round(seconds * 1000, 2)} for sql, seconds in request_queries()]
+                    )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_LATENCY.labels(scope["method"], route, str(status_code)).observe(time.perf_counter() - start)
+
+            queries = request_queries()
+            SQL_QUERIES.labels(route).observe(len(queries))
+            if self.query_count_warning and len(queries) > self.query_count_warning:
+                logger.warning(
+                    "{} {} executed {} SQL queries in {:.1f} ms",
+                    scope["method"], route, len(queries), sum(seconds for _, seconds in queries) * 1000,
+                )
@@ -0,0 +1,53 @@
+from opentelemetry import propagate, trace
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from services.tracing import tracer
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware: span на каждый HTTP запрос.
+
+    Span становится текущим на время обработки, поэтому спаны RPC к ML
+    сервису и ml_worker попадают в ту же трассу. Входящий заголовок
+    traceparent продолжает трассу клиента. Имя спана уточняется шаблоном
+    маршрута после обработки.
+
+    Args:
+        app: ASGI приложение
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        parent = propagate.extract(dict(Headers(scope=scope)))
+        with tracer.start_as_current_span(
+            f"{scope['method']} {scope['path']}", context=parent, kind=SpanKind.SERVER
+        ) as span:
+            async def send_with_status(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.set_status(Status(StatusCode.ERROR))
+                await send(message)
+
+            span.set_attribute("http.method", scope["method"])
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    span.update_name(f"{scope['method']} {route}")
+                    span.set_attribute("http.route", route)
+
+
+def current_trace_id() -> str:
+    """Идентификатор текущей трассы в hex или пустая строка"""
+    context = trace.get_current_span().get_span_context()
+    return format(context.trace_id, "032x") if context.is_valid else ""
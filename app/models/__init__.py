@@ -1,6 +1,7 @@
 from pydantic import BaseModel, EmailStr, Field, ConfigDict
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
+from models.constants import JobStatus, TransactionType
 
 
 class UserSignupRequest(BaseModel):
@@ -16,6 +17,24 @@ class UserSigninRequest(BaseModel):
     password: str
 
 
+class Principal(BaseModel):
+    """Аутентифицированный пользователь: только поля, нужные для авторизации и баланса"""
+    model_config = ConfigDict(from_attributes=True)
+    id: int
+    email: str
+    is_admin: bool
+    wallet_id: Optional[int] = None
+    balance: Optional[float] = None
+
+
+class SigninOut(BaseModel):
+    """Ответ на вход пользователя с токеном доступа"""
+    message: str
+    access_token: str
+    token_type: str = "bearer"
+    expires_in: int
+
+
 class UserEmailRequest(BaseModel):
     """Запрос с email пользователя"""
     email: EmailStr
@@ -37,6 +56,24 @@ class MovieOut(BaseModel):
     genres: List[str]
 
 
+class MovieSearchOut(MovieOut):
+    """Выходная модель фильма в результатах поиска по названию"""
+    score: float
+
+
+class MovieSuggestionOut(BaseModel):
+    """Выходная модель подсказки автодополнения названия"""
+    id: int
+    title: str
+    year: int
+
+
+class MovieFacetsOut(BaseModel):
+    """Выходная модель счетчиков фильмов по жанрам и десятилетиям"""
+    genres: Dict[str, int]
+    decades: Dict[str, int]
+
+
 class PredictionOut(BaseModel):
     """Выходная модель предсказания"""
     model_config = ConfigDict(from_attributes=True)
@@ -47,3 +84,22 @@ class PredictionOut(BaseModel):
     cost: float
     movies: List[MovieOut] = []
 
+
+class TransactionOut(BaseModel):
+    """Выходная модель транзакции"""
+    model_config = ConfigDict(from_attributes=True)
+    id: int
+    timestamp: datetime
+    user_id: int
+    wallet_id: int
+    amount: float
+    type: TransactionType
+
+
+class PredictionJobOut(BaseModel):
+    """Выходная модель задачи рекомендаций: result - фильмы после завершения, error - причина ошибки"""
+    id: str
+    status: JobStatus
+    result: Optional[List[Dict]] = None
+    error: Optional[str] = None
+    error_status: Optional[int] = None
@@ -1,7 +1,20 @@
 from __future__ import annotations
 from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal
+from sqlalchemy import Numeric
 from sqlmodel import Field, SQLModel
 
+# Денежные суммы хранятся в NUMERIC с точностью до копейки: баланс меняется
+# арифметикой в SQL без ошибок округления float, в Python значения читаются как float
+MONEY = Numeric(12, 2, asdecimal=False)
+_CENT = Decimal("0.01")
+
+
+def to_money(amount: float) -> Decimal:
+    """Сумма, округленная до копейки, для параметров SQL выражений над MONEY"""
+    return Decimal(str(amount)).quantize(_CENT, rounding=ROUND_HALF_UP)
+
+
 class BaseModel(SQLModel):
     """
     Базовые сущности любой модели данных для наследования
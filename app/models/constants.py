@@ -30,4 +30,16 @@ class ModelTypes(str, Enum):
     """Перечисление возможных моделей, которые можно испрользовать"""
     BASIC = 'all-MiniLM-L6-v2'
     MULTILINGUAL = 'paraphrase-multilingual-MiniLM-L12-v2'
-    
\ No newline at end of file
+    
+
+class FacetType(str, Enum):
+    """Перечисление фасетов каталога фильмов"""
+    GENRE = "genre"
+    DECADE = "decade"
+
+
+class JobStatus(str, Enum):
+    """Перечисление состояний фоновой задачи рекомендаций"""
+    PENDING = "pending"
+    DONE = "done"
+    FAILED = "failed"
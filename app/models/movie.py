@@ -4,8 +4,9 @@ from sqlmodel import Field, Relationship
 from typing import Optional, List, Any
 from typing import TYPE_CHECKING
 from models.prediction_movie_link import PredictionMovieLink
-from sqlalchemy.orm import Mapped, relationship
-from sqlalchemy import ARRAY, String, Column, Float
+from sqlalchemy.orm import Mapped, relationship, deferred
+from sqlalchemy import String, Column, Float, Index
+from sqlalchemy.dialects.postgresql import ARRAY
 from datetime import datetime
 from pgvector.sqlalchemy import Vector
 
@@ -13,6 +14,10 @@ if TYPE_CHECKING:
     from models.prediction import Prediction
 
 
+# Эмбеддинг нужен только для векторного поиска, поэтому по умолчанию не загружается
+EMBEDDING = Column("embedding", Vector(384))
+
+
 class Movie(BaseModel, table=True):
     """
     Класс для представления фильма, который модель может использовать для рекомендации.
@@ -24,12 +29,23 @@ class Movie(BaseModel, table=True):
         genres (str): Жанры фильма
         embedding (Vector(384)): Вектор эмбединга фильма длинной 384
     """
+    __mapper_args__ = {"properties": {"embedding": deferred(EMBEDDING)}}
+    __table_args__ = (
+        # Триграммный индекс для нечеткого поиска по названию (pg_trgm)
+        Index(
+            "ix_movie_title_trgm", "title",
+            postgresql_using="gin",
+            postgresql_ops={"title": "gin_trgm_ops"},
+        ),
+        # GIN индекс для фильтрации по жанрам (genres @> ARRAY[...])
+        Index("ix_movie_genres_gin", "genres", postgresql_using="gin"),
+    )
 
     title: str = Field(min_length=1, max_length=255)
     description: str = Field(min_length=10, max_length=1000, unique=True)
     year: int = Field(ge=1888, le=datetime.now().year + 10)
     genres: List[str] = Field(sa_column=Column(ARRAY(String), nullable=False))
-    embedding: Any = Field(sa_column=Column(Vector(384)))
+    embedding: Any = Field(sa_column=EMBEDDING)
 
     # Relationships
     predictions: Mapped[List["Prediction"]] = Relationship(
@@ -38,4 +54,3 @@ class Movie(BaseModel, table=True):
         ),
         link_model=PredictionMovieLink,
     )
-
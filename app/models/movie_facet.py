@@ -0,0 +1,18 @@
+from sqlmodel import SQLModel, Field
+
+
+class MovieFacet(SQLModel, table=True):
+    """
+    Предрасчитанные счетчики фильмов для фильтров каталога.
+
+    Таблица поддерживается триггерами на movie (см. database/schema.py),
+    поэтому чтение фасетов не требует сканирования каталога.
+
+    Attributes:
+        facet (str): Тип фасета (FacetType)
+        value (str): Значение фасета - жанр или начало десятилетия
+        count (int): Количество фильмов с этим значением
+    """
+    facet: str = Field(primary_key=True, max_length=16)
+    value: str = Field(primary_key=True, max_length=255)
+    count: int = Field(default=0)
@@ -3,9 +3,9 @@ from sqlmodel import Field, Relationship
 from typing import List, TYPE_CHECKING, Any
 from pydantic import field_serializer
 from models.prediction_movie_link import PredictionMovieLink
-from models.base_model import BaseModel
-from sqlalchemy.orm import Mapped, relationship
-from sqlalchemy import Column
+from models.base_model import MONEY, BaseModel
+from sqlalchemy.orm import Mapped, relationship, deferred
+from sqlalchemy import Column, Index
 from pgvector.sqlalchemy import Vector
 
 if TYPE_CHECKING:
@@ -13,6 +13,10 @@ if TYPE_CHECKING:
     from models.movie import Movie
 
 
+# Эмбеддинг запроса не отдается наружу, поэтому по умолчанию не загружается
+EMBEDDING = Column("embedding", Vector(384))
+
+
 class Prediction(BaseModel, table=True):
     """
     Класс для представления списка рекомендаций фильмов.
@@ -26,11 +30,16 @@ class Prediction(BaseModel, table=True):
         user (Mapped["User"]): Взаимосвязь с объектом User
         movies (Mapped[List["Movie"]]): Связь с фильмами из предсказания
     """
+    __mapper_args__ = {"properties": {"embedding": deferred(EMBEDDING)}}
+    __table_args__ = (
+        # Постраничная история пользователя: WHERE user_id ORDER BY timestamp, id
+        Index("ix_prediction_user_id_timestamp", "user_id", "timestamp", "id"),
+    )
 
     user_id: int = Field(foreign_key="user.id", index=True)
     input_text: str = Field(min_length=10, max_length=2000)
-    embedding: Any = Field(sa_column=Column(Vector(384)))
-    cost: float = Field(default=0.0)
+    embedding: Any = Field(sa_column=EMBEDDING)
+    cost: float = Field(default=0.0, sa_type=MONEY)
     
     # Relationships
     user: Mapped["User"] = Relationship(
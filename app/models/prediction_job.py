@@ -0,0 +1,47 @@
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import JSON, Column
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import Field, SQLModel
+from models import PredictionJobOut
+from models.constants import JobStatus
+
+
+class PredictionJob(SQLModel, table=True):
+    """
+    Фоновая задача рекомендаций.
+
+    Задачи хранятся в базе, а не в памяти процесса: задачу, созданную одним
+    воркером, читает любой другой, куда балансировщик направил опрос или поток
+    событий. Строка удаляется через JOB_TTL_SECONDS после завершения.
+
+    Attributes:
+        id (str): Случайный id задачи из ответа POST
+        user_id (int): Владелец задачи, только ему она видна
+        status (JobStatus): Состояние задачи
+        result (list): Фильмы в виде для ответа после завершения
+        error (str): Причина ошибки
+        error_status (int): HTTP код, который вернул бы синхронный endpoint
+        created_at (datetime): Время создания
+        finished_at (datetime): Время завершения
+    """
+    id: str = Field(primary_key=True, max_length=32)
+    user_id: int = Field(foreign_key="user.id")
+    status: JobStatus = Field(default=JobStatus.PENDING)
+    result: Optional[List[dict]] = Field(
+        default=None, sa_column=Column(JSON().with_variant(JSONB, "postgresql"))
+    )
+    error: Optional[str] = None
+    error_status: Optional[int] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+
+    def to_out(self) -> PredictionJobOut:
+        """Выходная модель задачи"""
+        return PredictionJobOut(
+            id=self.id,
+            status=self.status,
+            result=self.result,
+            error=self.error,
+            error_status=self.error_status,
+        )
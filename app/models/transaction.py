@@ -2,8 +2,9 @@ from __future__ import annotations
 from sqlmodel import Field, Relationship
 from typing import Optional, TYPE_CHECKING
 from models.constants import TransactionType
-from models.base_model import BaseModel
+from models.base_model import MONEY, BaseModel
 from sqlalchemy.orm import Mapped, relationship
+from sqlalchemy import Index
 
 if TYPE_CHECKING:
     from models.user import User
@@ -25,9 +26,14 @@ class Transaction(BaseModel, table=True):
         wallet ("Wallet"): Связь транзакции с кошельком
         user ("User"): Связь транзакции с юзером
     """
+    __table_args__ = (
+        # Постраничная история кошелька: WHERE wallet_id ORDER BY timestamp, id
+        Index("ix_transaction_wallet_id_timestamp", "wallet_id", "timestamp", "id"),
+    )
+
     user_id: int = Field(foreign_key="user.id", index=True)
     wallet_id: int = Field(foreign_key="wallet.id", index=True)
-    amount: float = Field(default=0.0)
+    amount: float = Field(default=0.0, sa_type=MONEY)
     type: TransactionType = Field()
     
     # Relationships
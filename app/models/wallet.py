@@ -2,7 +2,7 @@ from __future__ import annotations
 from sqlmodel import Field, Relationship
 from typing import List, Optional
 from typing import TYPE_CHECKING
-from models.base_model import BaseModel
+from models.base_model import MONEY, BaseModel
 from sqlalchemy.orm import Mapped, relationship
 
 if TYPE_CHECKING:
@@ -22,7 +22,7 @@ class Wallet(BaseModel, table=True):
         user (Mapped[Optional["User"]]): Связь с владельцем кошелька
     """
     user_id: Optional[int] = Field(default=None, foreign_key="user.id", unique=True)
-    balance: float = Field(default=0.0)
+    balance: float = Field(default=0.0, sa_type=MONEY)
     transactions: Mapped[List["Transaction"]] = Relationship(
         sa_relationship=relationship(back_populates="wallet")
     )
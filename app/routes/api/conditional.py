@@ -0,0 +1,57 @@
+import hashlib
+from typing import Optional
+from fastapi import Response, status
+from services.metrics import record_cache
+
+# Ответы личные: промежуточные кэши их не хранят, браузер перепроверяет по ETag
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    """
+    Формирует ETag из значений, от которых зависит содержимое ответа.
+
+    Значения должны быть дешевыми для получения (id последней записи, баланс),
+    чтобы ответ 304 не требовал загрузки и сериализации данных.
+
+    Args:
+        parts: значения, определяющие ответ
+
+    Returns:
+        str: ETag в кавычках
+    """
+    digest = hashlib.sha256("|".join(map(str, parts)).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Проверяет заголовок If-None-Match (слабое сравнение).
+
+    Args:
+        if_none_match: значение заголовка If-None-Match
+        etag: текущий ETag ответа
+
+    Returns:
+        bool: True если у клиента актуальная версия
+    """
+    if not if_none_match:
+        return False
+    matched = if_none_match.strip() == "*" or any(
+        tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(",")
+    )
+    record_cache("etag", matched)
+    return matched
+
+
+def set_etag(response: Response, etag: str) -> None:
+    """Добавляет ETag и Cache-Control к ответу"""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+
+def not_modified(etag: str) -> Response:
+    """Ответ 304 Not Modified с текущим ETag"""
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_etag(response, etag)
+    return response
@@ -0,0 +1,155 @@
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, status
+from database.database import get_async_session
+from models import MovieOut, MovieSearchOut, MovieFacetsOut, MovieSuggestionOut
+from models.constants import FacetType
+from services.crud import movie as MovieService
+from services.crud.aio import movie as AsyncMovieService
+from routes.api.serialization import MOVIE_LIST, MOVIE_SEARCH_LIST, build_include, render
+from typing import List, Optional
+from loguru import logger
+
+
+movie_route = APIRouter()
+
+@movie_route.get(
+    "/search",
+    response_model=List[MovieSearchOut],
+    summary="Fuzzy title search",
+    description="Typo-tolerant movie title search ranked by trigram similarity"
+)
+async def search_movies(
+    request: Request,
+    q: str = Query(..., min_length=2, max_length=255),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10000),
+    threshold: float = Query(0.4, ge=0.1, le=1.0),
+    fields: Optional[str] = Query(None, max_length=200, description="Comma-separated fields to return, e.g. id,title,year"),
+    session=Depends(get_async_session)
+) -> List[MovieSearchOut]:
+    """
+    Поиск фильмов по названию с ранжированием по похожести.
+
+    Args:
+        request: Запрос с заголовком Accept (JSON или MessagePack)
+        q: поисковая строка
+        limit: количество результатов
+        offset: смещение для постраничного вывода
+        threshold: минимальная похожесть названия
+        fields: поля фильмов для ответа
+        session: Сессия базы данных
+
+    Returns:
+        List[MovieSearchOut]: Найденные фильмы, от наиболее похожих
+    """
+    try:
+        include = build_include(MovieSearchOut, fields)
+        movies = await AsyncMovieService.search_movies_by_title(q.strip(), session, limit, offset, threshold)
+        return render(request, MOVIE_SEARCH_LIST, movies, include)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error searching movies: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error searching movies"
+        )
+
+
+@movie_route.get(
+    "/autocomplete",
+    response_model=List[MovieSuggestionOut],
+    summary="Title autocomplete",
+    description="As-you-type title suggestions served from an in-memory prefix index"
+)
+async def autocomplete(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=25)
+) -> List[MovieSuggestionOut]:
+    """
+    Подсказки названий фильмов по началу названия или любого слова в нем.
+
+    Args:
+        q: введенный текст
+        limit: количество подсказок
+
+    Returns:
+        List[MovieSuggestionOut]: Подсказки, сначала совпадения с начала названия
+    """
+    return MovieService.autocomplete_titles(q, limit)
+
+
+@movie_route.get(
+    "/genres/{genre}",
+    response_model=List[MovieOut],
+    summary="Browse movies by genre",
+    description="Keyset-paginated list of movies of a genre, ordered by id"
+)
+async def browse_genre(
+    request: Request,
+    genre: str,
+    after_id: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    decade: Optional[int] = Query(None, ge=1880, le=2100, multiple_of=10),
+    fields: Optional[str] = Query(None, max_length=200, description="Comma-separated fields to return, e.g. id,title,year"),
+    session=Depends(get_async_session)
+) -> List[MovieOut]:
+    """
+    Постраничный просмотр фильмов жанра.
+
+    Следующая страница запрашивается с after_id, равным id последнего фильма
+    текущей страницы. Страница короче limit означает конец списка.
+
+    Args:
+        request: Запрос с заголовком Accept (JSON или MessagePack)
+        genre: жанр
+        after_id: id последнего фильма предыдущей страницы
+        limit: размер страницы
+        decade: фильтр по десятилетию (например 1990)
+        fields: поля фильмов для ответа
+        session: Сессия базы данных
+
+    Returns:
+        List[MovieOut]: Фильмы жанра по возрастанию id
+    """
+    try:
+        include = build_include(MovieOut, fields)
+        movies = await AsyncMovieService.get_movies_by_genre_page(genre, session, after_id, limit, decade)
+        return render(request, MOVIE_LIST, movies, include)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error browsing genre {genre}: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error browsing movies"
+        )
+
+
+@movie_route.get(
+    "/facets",
+    response_model=MovieFacetsOut,
+    summary="Catalog facets",
+    description="Movie counts per genre and per decade"
+)
+async def get_facets(session=Depends(get_async_session)) -> MovieFacetsOut:
+    """
+    Счетчики фильмов для фильтров каталога.
+
+    Args:
+        session: Сессия базы данных
+
+    Returns:
+        MovieFacetsOut: Количество фильмов по жанрам и десятилетиям
+    """
+    try:
+        facets = await AsyncMovieService.get_movie_facets(session)
+        return MovieFacetsOut(
+            genres=facets[FacetType.GENRE.value],
+            decades=facets[FacetType.DECADE.value]
+        )
+    except Exception as e:
+        logger.error(f"Error getting facets: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error getting facets"
+        )
@@ -1,44 +1,89 @@
-from fastapi import APIRouter, Body, HTTPException, status, Depends
-from services.crud import wallet as WalletService
-from services.crud import prediction as PredictionService
-from database.database import get_session
-from models import PredictionOut, MovieOut
-from models.movie import Movie
-from models.user import User
-from services.crud import user as UserService
-from typing import List
+from fastapi import APIRouter, Body, Header, HTTPException, Path, Query, Request, status, Depends
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from services.crud.aio import prediction as PredictionService
+from services.crud.aio import movie as MovieService
+from services.crud.aio import job as JobService
+from database.database import get_async_session, new_async_session
+from models import PredictionOut, PredictionJobOut, MovieOut, Principal
+from typing import List, Optional
 from services.rm.rm import MLServiceRpcClient
-from models.constants import TransactionCost, TransactionType
+from models.constants import TransactionCost
 from database.config import get_settings
-from pgvector.sqlalchemy import Vector
-from sqlmodel import select
 from auth.basic import get_current_user
+from routes.api.conditional import etag_matches, make_etag, not_modified, set_etag
+from routes.api.serialization import MOVIE_LIST, PREDICTION_LIST, build_include, render, to_jsonable, wants_msgpack
 from sqlalchemy import text
+from services.metrics import phase
+from services.admission import Overloaded, get_admission_controller
+from services.jobs import job_events, job_ttl_seconds, max_pending_jobs, spawn
+from models.prediction_job import PredictionJob
+from services.singleflight import SingleFlight, normalize_message
 from loguru import logger
 
 
 movie_service_route = APIRouter()
 
+DEFAULT_RPC_TIMEOUT_SECONDS = 30
+
+# Одинаковые одновременные запросы делят эмбеддинг и векторный поиск
+similar_movies_flight = SingleFlight("recommendation")
+
+
+def request_embedding(message: str) -> dict:
+    """Синхронный RPC вызов ML сервиса; выполняется в пуле потоков"""
+    settings = get_settings()
+    with MLServiceRpcClient(settings) as ml_service_rpc:
+        return ml_service_rpc.call(message, timeout=settings.ML_RPC_TIMEOUT_SECONDS or DEFAULT_RPC_TIMEOUT_SECONDS)
+
+
 @movie_service_route.get(
     "/prediction/history",
     response_model=List[PredictionOut]
 )
 async def get_prediction_history(
-    user: User = Depends(get_current_user),
-    session=Depends(get_session)
+    request: Request,
+    cursor: Optional[str] = Query(None, max_length=100),
+    limit: int = Query(50, ge=1, le=200),
+    fields: Optional[str] = Query(None, max_length=200, description="Comma-separated fields to return, e.g. id,input_text,movies.title"),
+    if_none_match: Optional[str] = Header(None),
+    user: Principal = Depends(get_current_user),
+    session=Depends(get_async_session)
 ) -> List[PredictionOut]:
     """
-    Получает историю предсказаний для аутентифицированного пользователя.
+    Получает страницу истории предсказаний для аутентифицированного пользователя.
+
+    Курсор следующей страницы возвращается в заголовке X-Next-Cursor; его нет
+    на последней странице. Если новых предсказаний не было, ответ 304
+    отдается без загрузки страницы.
 
     Args:
+        request: Запрос с заголовком Accept (JSON или MessagePack)
+        cursor: курсор из X-Next-Cursor предыдущей страницы
+        limit: размер страницы
+        fields: поля предсказаний для ответа, поля фильмов - через movies.
+        if_none_match: ETag версии, уже имеющейся у клиента
         user: Текущий аутентифицированный пользователь
         session: Сессия базы данных
 
     Returns:
-        List[PredictionOut]: Список предсказаний пользователя
+        List[PredictionOut]: Предсказания пользователя от новых к старым
     """
     try:
-        return user.predictions
+        include = build_include(PredictionOut, fields)
+        latest_id = await PredictionService.get_latest_prediction_id(user.id, session)
+        etag = make_etag("predictions", user.id, latest_id, cursor, limit, fields, wants_msgpack(request))
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+        predictions, next_cursor = await PredictionService.get_predictions_by_user_id(user.id, session, cursor, limit)
+        response = render(request, PREDICTION_LIST, predictions, include)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        set_etag(response, etag)
+        return response
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f"Error getting prediction history: {str(e)}")
         raise HTTPException(
@@ -51,17 +96,24 @@ async def get_prediction_history(
     response_model=List[MovieOut]
 )
 async def new_prediction(
+    request: Request,
     message: str,
     top: int = 10,
-    user: User = Depends(get_current_user),
-    session=Depends(get_session)
+    fields: Optional[str] = Query(None, max_length=200, description="Comma-separated fields to return, e.g. id,title,year"),
+    user: Principal = Depends(get_current_user),
+    session=Depends(get_async_session)
 ) -> List[MovieOut]:
     """
     Получает рекомендации фильмов для аутентифицированного пользователя.
 
+    Стоимость списывается вместе с сохранением предсказания после ответа ML
+    сервиса; при ошибке или таймауте RPC средства не списываются.
+
     Args:
+        request: Запрос с заголовком Accept (JSON или MessagePack)
         message: Текст запроса пользователя
         top: Количество рекомендаций для возврата
+        fields: поля фильмов для ответа, например без description
         user: Текущий аутентифицированный пользователь
         session: Сессия базы данных
 
@@ -70,27 +122,271 @@ async def new_prediction(
     """
     if top <= 0:
         raise HTTPException(status_code=400, detail="Invalid 'top' value")
+    try:
+        include = build_include(MovieOut, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    cost = prediction_cost(user)
+    check_balance(user, cost)
+    # Транзакция чтения аутентификации не удерживает соединение на время RPC
+    await session.close()
+    
+    try:
+        async with get_admission_controller().slot():
+            try:
+                movies = await recommend(message, top, user.id, user.wallet_id, cost, session)
+            except Exception as e:
+                raise recommendation_error(e)
+            return render(request, MOVIE_LIST, movies, include)
+    except Overloaded as e:
+        raise overloaded(e)
+
+
+@movie_service_route.post(
+    "/prediction/jobs",
+    response_model=PredictionJobOut,
+    status_code=status.HTTP_202_ACCEPTED
+)
+async def create_prediction_job(
+    message: str,
+    top: int = 10,
+    fields: Optional[str] = Query(None, max_length=200, description="Comma-separated fields to return, e.g. id,title,year"),
+    user: Principal = Depends(get_current_user)
+):
+    """
+    Создает задачу рекомендаций и сразу возвращает ее id.
+
+    Баланс проверяется до ответа (402 при нехватке средств), RPC к ML
+    сервису, поиск, списание и сохранение предсказания выполняются в фоне.
+    Результат забирается через GET /prediction/jobs/{id} или поток
+    /prediction/jobs/{id}/events.
+
+    Args:
+        message: Текст запроса пользователя
+        top: Количество рекомендаций для возврата
+        fields: поля фильмов для результата
+        user: Текущий аутентифицированный пользователь
+
+    Returns:
+        PredictionJobOut: Задача в состоянии pending и заголовок Location
+    """
+    if top <= 0:
+        raise HTTPException(status_code=400, detail="Invalid 'top' value")
+    try:
+        include = build_include(MovieOut, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
+    cost = prediction_cost(user)
+    check_balance(user, cost)
     try:
-        cost = TransactionCost.ADMIN.value if user.is_admin else TransactionCost.BASIC.value
-        WalletService.make_transaction(user.wallet, -cost, TransactionType.PREDICTION, session)
+        await get_admission_controller().admit()
+    except Overloaded as e:
+        raise overloaded(e)
+    
+    try:
+        async with new_async_session() as session:
+            job = await JobService.create_job(user.id, job_ttl_seconds(), max_pending_jobs(), session)
+    except JobService.TooManyJobs as e:
+        get_admission_controller().release()
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=402, detail=str(e))
+        get_admission_controller().release()
+        logger.error(f"Failed to create recommendation job: {e}")
+        raise HTTPException(status_code=500, detail="Failed to create job")
+    spawn(run_prediction_job(job.id, user.id, message, top, include, user.wallet_id, cost))
+    return ORJSONResponse(
+        job.to_out().model_dump(mode="json"),
+        status_code=status.HTTP_202_ACCEPTED,
+        headers={"Location": f"/api/events/prediction/jobs/{job.id}"},
+    )
+
+
+@movie_service_route.get(
+    "/prediction/jobs/{job_id}",
+    response_model=PredictionJobOut
+)
+async def get_prediction_job(
+    job_id: str = Path(..., max_length=64),
+    user: Principal = Depends(get_current_user)
+) -> PredictionJobOut:
+    """
+    Состояние задачи рекомендаций для опроса.
+
+    Args:
+        job_id: id задачи из POST /prediction/jobs
+        user: Текущий аутентифицированный пользователь
+
+    Returns:
+        PredictionJobOut: pending, done с result или failed с error и error_status
+    """
+    return (await find_job(job_id, user)).to_out()
+
+
+@movie_service_route.get("/prediction/jobs/{job_id}/events")
+async def stream_prediction_job(
+    job_id: str = Path(..., max_length=64),
+    user: Principal = Depends(get_current_user)
+) -> StreamingResponse:
+    """
+    Поток Server-Sent Events задачи: heartbeat, затем событие done или failed.
+
+    Args:
+        job_id: id задачи из POST /prediction/jobs
+        user: Текущий аутентифицированный пользователь
+
+    Returns:
+        StreamingResponse: Поток text/event-stream
+    """
+    await find_job(job_id, user)
+    return StreamingResponse(
+        job_events(lambda: load_job(job_id, user.id)),
+        media_type="text/event-stream",
+        # nginx не должен буферизовать поток
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def load_job(job_id: str, user_id: int) -> Optional[PredictionJob]:
+    """Читает задачу пользователя в своей короткой сессии"""
+    async with new_async_session() as session:
+        return await JobService.get_job(job_id, user_id, job_ttl_seconds(), session)
+
+
+async def find_job(job_id: str, user: Principal) -> PredictionJob:
+    """Задача текущего пользователя или 404"""
+    job = await load_job(job_id, user.id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job
+
+
+def overloaded(e: Overloaded) -> HTTPException:
+    """Отказ контроля допуска до списания средств: клиент повторит запрос позже"""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=e.reason,
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
+def recommendation_error(e: Exception) -> HTTPException:
+    """Ошибка получения рекомендаций: 504 при таймауте ML сервиса, иначе 500"""
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, TimeoutError):
+        return HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(e))
+    return HTTPException(status_code=500, detail=str(e))
+
+
+def prediction_cost(user: Principal) -> float:
+    """Стоимость рекомендации для пользователя"""
+    return TransactionCost.ADMIN.value if user.is_admin else TransactionCost.BASIC.value
+
+
+def check_balance(user: Principal, cost: float) -> None:
+    """
+    Проверка баланса, прочитанного при аутентификации, до обращения к ML сервису.
+
+    Пользователь без средств не занимает очередь ML задач. Окончательно
+    средства проверяет списание при сохранении предсказания.
+
+    Raises:
+        HTTPException: 402 при нехватке средств
+    """
+    balance = user.balance or 0.0
+    if balance < cost:
+        raise HTTPException(
+            status_code=402,
+            detail=f"Недостаточно средств. Баланс: {balance}, требуется: {cost}",
+        )
+
+
+async def find_similar_movies(message: str, top: int) -> tuple:
+    """
+    Эмбеддинг запроса от ML сервиса и векторный поиск в своей сессии.
+
+    Выполняется один раз на группу одинаковых запросов, поэтому не использует
+    сессию обработчика, который мог бы закрыть ее раньше остальных.
+
+    Returns:
+        tuple: (эмбеддинг, строки фильмов)
+    """
+    with phase("ml_rpc"):
+        response = await run_in_threadpool(request_embedding, message)
     
+    async with new_async_session() as session:
+        movies = await MovieService.search_similar_movies(response["request_embedding"], top, session)
+    return response["request_embedding"], movies
+
+
+async def find_recommendations(message: str, top: int) -> tuple:
+    """Рекомендации, общие для одинаковых одновременных запросов: (эмбеддинг, строки фильмов)"""
+    with phase("recommendation"):
+        (embedding, movies), coalesced = await similar_movies_flight.do(
+            (normalize_message(message), top),
+            lambda: find_similar_movies(message, top),
+        )
+    
+    # Логируем результат
+    logger.info(f"Found {len(movies)} movies out of requested {top}" + (" (coalesced)" if coalesced else ""))
+    return embedding, movies
+
+
+async def save_prediction(
+    user_id: int, wallet_id: int, message: str, embedding: list, cost: float, movies: list, session
+) -> None:
+    """
+    Одной транзакцией списывает стоимость и сохраняет предсказание пользователя.
+
+    Raises:
+        HTTPException: 402 если средств не хватило к моменту списания
+    """
+    try:
+        await PredictionService.create_prediction(user_id, wallet_id, message, embedding, cost, movies, session)
+    except ValueError as e:
+        raise HTTPException(status_code=402, detail=str(e))
+
+
+async def recommend(message: str, top: int, user_id: int, wallet_id: int, cost: float, session) -> list:
+    """
+    Получает рекомендации, затем списывает стоимость и сохраняет предсказание.
+
+    Raises:
+        HTTPException: 402 если средств не хватило к моменту списания
+    """
+    embedding, movies = await find_recommendations(message, top)
+    await save_prediction(user_id, wallet_id, message, embedding, cost, movies, session)
+    return movies
+
+
+async def run_prediction_job(
+    job_id: str, user_id: int, message: str, top: int, include, wallet_id: int, cost: float
+) -> None:
+    """
+    Выполняет задачу рекомендаций и сохраняет итог в таблице задач.
+
+    Результат задачи записывается в транзакции списания и фиксируется одним
+    commit с предсказанием: если задача успела истечь, средства не списываются.
+    """
+    ttl_seconds = job_ttl_seconds()
     try:
-        ml_service_rpc = MLServiceRpcClient(get_settings())
-        response = ml_service_rpc.call(message)
-        
-        movies = session.exec(
-            select(Movie)
-            .order_by(Movie.embedding.cast(Vector).op("<=>")(response["request_embedding"]))
-            .limit(top)
-        ).all()
-        
-        # Логируем результат
-        logger.info(f"Found {len(movies)} movies out of requested {top}")
-        
-        PredictionService.create_prediction(user, message, response["request_embedding"], cost, movies, session)
-        return movies
+        embedding, movies = await find_recommendations(message, top)
+        async with new_async_session() as session:
+            result = to_jsonable(MOVIE_LIST, movies, include)
+            if not await JobService.finish_job(job_id, result, ttl_seconds, session):
+                await session.rollback()
+                logger.warning(f"Recommendation job {job_id} expired before saving, nothing charged")
+                return
+            await save_prediction(user_id, wallet_id, message, embedding, cost, movies, session)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        logger.error(f"Recommendation job {job_id} failed: {e}")
+        error = recommendation_error(e)
+        try:
+            async with new_async_session() as session:
+                await JobService.fail_job(job_id, error.status_code, str(error.detail), ttl_seconds, session)
+        except Exception as save_error:
+            logger.error(f"Failed to save recommendation job {job_id} error: {save_error}")
+    finally:
+        get_admission_controller().release()
@@ -0,0 +1,133 @@
+from typing import Any, Dict, List, Optional, Type, Union, get_args, get_origin
+from fastapi import Request, Response
+from pydantic import BaseModel, TypeAdapter
+from models import MovieOut, MovieSearchOut, PredictionOut, TransactionOut
+
+try:
+    import msgpack
+except ImportError:  # без msgpack ответы отдаются только в JSON
+    msgpack = None
+
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack")
+
+# Адаптеры списков строятся один раз при импорте, а не на каждый ответ
+MOVIE_LIST = TypeAdapter(List[MovieOut])
+MOVIE_SEARCH_LIST = TypeAdapter(List[MovieSearchOut])
+PREDICTION_LIST = TypeAdapter(List[PredictionOut])
+TRANSACTION_LIST = TypeAdapter(List[TransactionOut])
+
+Include = Dict[Union[str, int], Any]
+
+
+def _nested_model(annotation) -> Optional[Type[BaseModel]]:
+    """Возвращает модель поля вида Model или List[Model]"""
+    if get_origin(annotation) in (list, List):
+        annotation = get_args(annotation)[0]
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    return None
+
+
+def build_include(model: Type[BaseModel], fields: Optional[str]) -> Optional[Include]:
+    """
+    Разбирает параметр fields в include для сериализации списка моделей.
+
+    Поля перечисляются через запятую; поля вложенных моделей указываются
+    через точку, например fields=id,timestamp,movies.title.
+
+    Args:
+        model: модель элемента списка
+        fields: значение параметра fields или None для всех полей
+
+    Returns:
+        Optional[Include]: include для dump_json/dump_python или None
+
+    Raises:
+        ValueError: Если поле неизвестно
+    """
+    if not fields:
+        return None
+
+    include: Dict[str, Any] = {}
+    for name in fields.split(","):
+        name = name.strip()
+        if not name:
+            continue
+        head, _, rest = name.partition(".")
+        field = model.model_fields.get(head)
+        if field is None:
+            raise ValueError(f"Unknown field: {head}")
+        if not rest:
+            include[head] = True
+            continue
+
+        nested = _nested_model(field.annotation)
+        if nested is None or rest not in nested.model_fields:
+            raise ValueError(f"Unknown field: {name}")
+        if include.get(head) is True:
+            continue
+        selected = include.setdefault(head, set())
+        selected.add(rest)
+
+    for head, selected in include.items():
+        if selected is not True and get_origin(model.model_fields[head].annotation) in (list, List):
+            include[head] = {"__all__": selected}
+    return {"__all__": include} if include else None
+
+
+def wants_msgpack(request: Request) -> bool:
+    """Проверяет, запросил ли клиент MessagePack в заголовке Accept"""
+    accept = request.headers.get("accept", "")
+    return msgpack is not None and any(media_type in accept for media_type in MSGPACK_TYPES)
+
+
+def to_jsonable(adapter: TypeAdapter, items, include: Optional[Include] = None) -> list:
+    """
+    Список выходных моделей в виде структур JSON, например для хранения результата задачи.
+
+    Args:
+        adapter: адаптер списка выходных моделей
+        items: объекты ORM, строки запросов или модели
+        include: поля из build_include
+
+    Returns:
+        list: Списки и словари с JSON-совместимыми значениями
+    """
+    models = adapter.validate_python(items, from_attributes=True)
+    return adapter.dump_python(models, mode="json", include=include)
+
+
+def render(
+    request: Request,
+    adapter: TypeAdapter,
+    items,
+    include: Optional[Include] = None,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """
+    Сериализует список выходных моделей в JSON или MessagePack.
+
+    Объекты ORM и строки запросов проверяются адаптером и сразу
+    сериализуются в байты, без промежуточного jsonable_encoder.
+
+    Args:
+        request: запрос с заголовком Accept
+        adapter: адаптер списка выходных моделей
+        items: объекты ORM, строки запросов или модели
+        include: поля для ответа из build_include
+        headers: дополнительные заголовки ответа
+
+    Returns:
+        Response: Готовый ответ
+    """
+    models = adapter.validate_python(items, from_attributes=True)
+    if wants_msgpack(request):
+        content = msgpack.packb(adapter.dump_python(models, mode="json", include=include))
+        media_type = MSGPACK_TYPES[0]
+    else:
+        content = adapter.dump_json(models, include=include)
+        media_type = "application/json"
+
+    response = Response(content=content, media_type=media_type, headers=headers)
+    response.headers["Vary"] = "Accept"
+    return response
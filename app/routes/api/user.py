@@ -1,15 +1,17 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from  database.database import get_session
-from typing import List, Dict
+from fastapi import APIRouter, Header, HTTPException, Query, Request, Response, status, Depends
+from database.database import get_async_session
+from typing import List, Dict, Optional
 import logging
 from models.user import User
 from models.wallet import Wallet
-from models import UserSignupRequest, UserSigninRequest, UserEmailRequest, BalanceAdjustRequest
-from models.transaction import Transaction
+from models import UserSignupRequest, UserSigninRequest, UserEmailRequest, BalanceAdjustRequest, SigninOut, Principal, TransactionOut
 from models.constants import TransactionCost, TransactionType
-from services.crud import user as UserService
-from services.crud import wallet as WalletService
-from auth.basic import get_current_user, validate_password_strength
+from services.crud.aio import user as UserService
+from services.crud.aio import wallet as WalletService
+from auth.basic import get_current_user, current_user_with, validate_password_strength, check_rate_limit, record_login_attempt
+from auth.token import get_token_signer
+from routes.api.conditional import etag_matches, make_etag, not_modified, set_etag
+from routes.api.serialization import TRANSACTION_LIST, build_include, render, wants_msgpack
 
 
 
@@ -24,7 +26,7 @@ user_route = APIRouter()
     status_code=status.HTTP_201_CREATED,
     summary="User Registration",
     description="Register a new user with email and password")
-async def signup(data: UserSignupRequest, session=Depends(get_session)) -> Dict[str, str]:
+async def signup(data: UserSignupRequest, session=Depends(get_async_session)) -> Dict[str, str]:
     """
     Регистрация пользователя.
 
@@ -44,7 +46,7 @@ async def signup(data: UserSignupRequest, session=Depends(get_session)) -> Dict[
             )
         
         # Check if user already exists
-        existing_user = UserService.get_user_by_email(data.email, session)
+        existing_user = await UserService.get_auth_row_by_email(data.email, session)
         if existing_user:
             logger.warning(f"Registration attempt with existing email: {data.email}")
             raise HTTPException(
@@ -52,7 +54,7 @@ async def signup(data: UserSignupRequest, session=Depends(get_session)) -> Dict[
                 detail="User with this email already exists"
             )
         
-        UserService.create_user(email=data.email, password=data.password, session=session, is_admin=data.is_admin)
+        await UserService.create_user(email=data.email, password=data.password, session=session, is_admin=data.is_admin)
         logger.info(f"New user registered: {data.email}")
         logger.info(f"Start bonus has been added: {data.email}")
         return {"message": "User successfully registered"}
@@ -66,30 +68,52 @@ async def signup(data: UserSignupRequest, session=Depends(get_session)) -> Dict[
             detail="Error creating user"
         )
 
-@user_route.post('/signin')
-async def signin(data: UserSigninRequest, session=Depends(get_session)) -> Dict[str, str]:
+@user_route.post(
+    '/signin',
+    response_model=SigninOut,
+    summary="User Login",
+    description="Check credentials and issue an expiring access token for the Authorization: Bearer header")
+async def signin(data: UserSigninRequest, session=Depends(get_async_session)) -> SigninOut:
     """
     Вход пользователя в систему.
 
+    Пароль проверяется bcrypt один раз; дальнейшие запросы аутентифицируются
+    выданным токеном.
+
     Args:
         data: Данные для входа пользователя
         session: Сессия базы данных
 
     Returns:
-        dict: Сообщение об успехе
+        SigninOut: Сообщение об успехе и токен доступа
     """
+    if check_rate_limit(data.email):
+        logger.warning(f"Rate limit exceeded for user: {data.email}")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts. Please try again later."
+        )
+
     try:
-        user = UserService.get_user_by_email(data.email, session)
+        user = await UserService.get_auth_row_by_email(data.email, session)
         if not user:
-            logger.warning(f"Failed login attempt for user: {data.email}")
+            record_login_attempt(data.email, False)
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Wrong credentials passed")
         
-        if not UserService.verify_password(data.password, user.password_hash):
-            logger.warning(f"Failed login attempt for user: {data.email}")
+        if not await UserService.check_password(data.password, user.password_hash):
+            record_login_attempt(data.email, False)
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Wrong credentials passed")
         
-        return {"message": "User signed in successfully"}
+        record_login_attempt(data.email, True)
+        signer = get_token_signer()
+        return SigninOut(
+            message="User signed in successfully",
+            access_token=signer.issue(user.id, user.password_hash),
+            expires_in=signer.ttl_seconds
+        )
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error during signin: {str(e)}")
         raise HTTPException(
@@ -98,19 +122,28 @@ async def signin(data: UserSigninRequest, session=Depends(get_session)) -> Dict[
         )
 
 @user_route.get('/balance')
-async def get_balance(user: User = Depends(get_current_user), session=Depends(get_session)) -> Dict[str, float]:
+async def get_balance(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    user: Principal = Depends(get_current_user)
+) -> Dict[str, float]:
     """
     Получает баланс кошелька пользователя.
 
     Args:
+        response: Ответ для заголовка ETag
+        if_none_match: ETag версии, уже имеющейся у клиента
         user: Текущий аутентифицированный пользователь
-        session: Сессия базы данных
 
     Returns:
         float: Баланс пользователя
     """
     try:
-        return {'Current balance': user.wallet.balance}
+        etag = make_etag("balance", user.wallet_id, user.balance)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
+        return {'Current balance': user.balance}
     
     except Exception as e:
         logger.error(f"Error: {str(e)}")
@@ -122,8 +155,8 @@ async def get_balance(user: User = Depends(get_current_user), session=Depends(ge
 @user_route.post('/balance/adjust')
 async def adjust_balance(
     data: BalanceAdjustRequest, 
-    user: User = Depends(get_current_user),
-    session=Depends(get_session)
+    user: User = Depends(current_user_with("wallet")),
+    session=Depends(get_async_session)
 ) -> Dict[str, str]:
     """
     Изменяет баланс кошелька с аутентификацией.
@@ -147,7 +180,7 @@ async def adjust_balance(
         # Определяем тип транзакции в зависимости от прав пользователя
         transaction_type = TransactionType.ADMIN_ADJUSTMENT if user.is_admin else TransactionType.DEPOSIT
         
-        WalletService.make_transaction(user.wallet, data.amount, transaction_type, session)
+        await WalletService.make_transaction(user.wallet, data.amount, transaction_type, session)
         logger.info(f"Successful balance adjustment for {user.email} (type: {transaction_type})")
         return {"message": "Successful balance adjustment"}
 
@@ -158,23 +191,50 @@ async def adjust_balance(
             detail="Adjustment Error"
         )
     
-@user_route.get("/transaction/history", response_model=List[Transaction])
+@user_route.get("/transaction/history", response_model=List[TransactionOut])
 async def get_transaction_history(
-    user: User = Depends(get_current_user),
-    session=Depends(get_session)
-) -> List[Transaction]:
+    request: Request,
+    cursor: Optional[str] = Query(None, max_length=100),
+    limit: int = Query(50, ge=1, le=200),
+    fields: Optional[str] = Query(None, max_length=200, description="Comma-separated fields to return, e.g. id,amount,type,timestamp"),
+    if_none_match: Optional[str] = Header(None),
+    user: Principal = Depends(get_current_user),
+    session=Depends(get_async_session)
+) -> List[TransactionOut]:
     """
-    Получает историю транзакций для аутентифицированного пользователя.
+    Получает страницу истории транзакций для аутентифицированного пользователя.
+
+    Курсор следующей страницы возвращается в заголовке X-Next-Cursor; его нет
+    на последней странице. Если новых транзакций не было, ответ 304 отдается
+    без загрузки страницы.
 
     Args:
+        request: Запрос с заголовком Accept (JSON или MessagePack)
+        cursor: курсор из X-Next-Cursor предыдущей страницы
+        limit: размер страницы
+        fields: поля транзакций для ответа
+        if_none_match: ETag версии, уже имеющейся у клиента
         user: Текущий аутентифицированный пользователь
         session: Сессия базы данных
 
     Returns:
-        List[Transaction]: Список транзакций пользователя
+        List[TransactionOut]: Транзакции пользователя от новых к старым
     """
     try:
-        return user.wallet.transactions
+        include = build_include(TransactionOut, fields)
+        latest_id = await WalletService.get_latest_transaction_id(user.wallet_id, session)
+        etag = make_etag("transactions", user.wallet_id, latest_id, cursor, limit, fields, wants_msgpack(request))
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+
+        transactions, next_cursor = await WalletService.get_wallet_transactions(user.wallet_id, session, cursor, limit)
+        response = render(request, TRANSACTION_LIST, transactions, include)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        set_etag(response, etag)
+        return response
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         logger.error(f"Error getting transaction history: {str(e)}")
         raise HTTPException(
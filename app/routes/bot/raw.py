@@ -4,14 +4,14 @@ from telebot import types
 import logging
 from services.crud import user as UserService
 from services.crud import prediction as PredictionService
+from services.crud import movie as MovieService
 from database.database import get_session
 from models.user import User
+from models.constants import TransactionCost
 from sqlmodel import Session
 from services.rm.rm import MLServiceRpcClient
+from services.singleflight import ThreadSingleFlight, normalize_message
 from database.config import get_settings
-from pgvector.sqlalchemy import Vector
-from sqlmodel import select
-from models.movie import Movie
 import hashlib
 import time
 
@@ -38,6 +38,17 @@ AUTH_STATES = {
 # Кэш авторизованных пользователей (telegram_id -> user_id)
 authorized_users = {}
 
+# Одинаковые описания из одновременных сообщений делят эмбеддинг и поиск
+similar_movies_flight = ThreadSingleFlight("bot_recommendation")
+
+
+def find_similar_movies(input_text: str, top: int, session: Session) -> tuple:
+    """Эмбеддинг описания от ML сервиса и векторный поиск: (эмбеддинг, строки фильмов)"""
+    with MLServiceRpcClient(get_settings()) as ml_service_rpc:
+        response = ml_service_rpc.call(input_text)
+    movies = MovieService.search_similar_movies(response["request_embedding"], top, session)
+    return response["request_embedding"], movies
+
 @bot.message_handler(commands=['start'])
 def send_welcome(message):
     """Обработчик команды /start."""
@@ -207,7 +218,7 @@ def handle_signup(session, email, password, telegram_id):
     """Обработка регистрации"""
     try:
         # Проверяем, существует ли пользователь
-        existing_user = session.exec(select(User).where(User.email == email)).first()
+        existing_user = UserService.get_user_by_email(email, session)
         if existing_user:
             return {'success': False, 'message': 'Пользователь с таким email уже существует.'}
         
@@ -230,7 +241,7 @@ def handle_signin(session, email, password, telegram_id):
     """Обработка входа"""
     try:
         # Ищем пользователя
-        user = session.exec(select(User).where(User.email == email)).first()
+        user = UserService.get_user_by_email(email, session)
         if not user:
             return {'success': False, 'message': 'Пользователь не найден.'}
         
@@ -400,8 +411,9 @@ def handle_description(message):
                 bot.reply_to(message, "❌ Пользователь не найден. Авторизуйтесь заново.")
                 return
             
-            # Проверяем баланс
-            if user.wallet.balance < 10:
+            # Проверяем баланс до запроса к ML сервису; списание - при сохранении предсказания
+            cost = TransactionCost.ADMIN.value if user.is_admin else TransactionCost.BASIC.value
+            if user.wallet.balance < cost:
                 bot.reply_to(
                     message, 
                     f"❌ Недостаточно средств. Ваш баланс: {user.wallet.balance}. "
@@ -412,24 +424,18 @@ def handle_description(message):
             bot.reply_to(message, "⏳ Обрабатываю ваш запрос...")
             
             try:
-                # Получаем эмбеддинг через ML сервис
-                ml_service_rpc = MLServiceRpcClient(get_settings())
-                response = ml_service_rpc.call(input_text)
-                
-                # Ищем похожие фильмы
-                movies = session.exec(
-                    select(Movie)
-                    .order_by(Movie.embedding.cast(Vector).op("<=>")(response["request_embedding"]))
-                    .limit(10)  # Увеличиваем с 5 до 10
-                ).all()
+                # Получаем эмбеддинг через ML сервис и ищем похожие фильмы
+                (embedding, movies), _ = similar_movies_flight.do(
+                    (normalize_message(input_text), 10),
+                    lambda: find_similar_movies(input_text, 10, session),
+                )
                 
                 if not movies:
                     bot.reply_to(message, "❌ К сожалению, не удалось найти подходящие фильмы.")
                     return
                 
-                # Создаем предсказание
-                cost = 10.0
-                PredictionService.create_prediction(user, input_text, response["request_embedding"], cost, movies, session)
+                # Списываем стоимость и сохраняем предсказание одной транзакцией
+                PredictionService.create_prediction(user, input_text, embedding, cost, movies, session)
                 
                 # Формируем ответ - упрощенный формат
                 response_text = f"🎬 Найдено {len(movies)} фильмов по запросу: '{input_text}'\n\n"
@@ -438,13 +444,16 @@ def handle_description(message):
                     response_text += f"   Жанры: {', '.join(movie.genres[:3]) if movie.genres else 'Не указаны'}\n\n"
                 
                 response_text += f"💰 Стоимость: {cost} кредитов\n"
-                response_text += f"💳 Новый баланс: {user.wallet.balance - cost}"
+                response_text += f"💳 Новый баланс: {user.wallet.balance}"
                 
                 markup = types.InlineKeyboardMarkup()
                 markup.row(types.InlineKeyboardButton("🔙 Главное меню", callback_data="menu_back"))
                 
                 bot.reply_to(message, response_text, reply_markup=markup, parse_mode='Markdown')
                 
+            except ValueError as e:
+                bot.reply_to(message, f"❌ {e}. Пополните баланс через веб-интерфейс.")
+                
             except Exception as e:
                 logger.error(f"Ошибка ML сервиса: {str(e)}")
                 bot.reply_to(message, "❌ Ошибка при обработке запроса. Попробуйте позже.")
@@ -583,6 +592,29 @@ def show_balance(message):
         logger.error(f"Ошибка получения баланса: {str(e)}")
         bot.reply_to(message, "❌ Произошла ошибка при получении баланса.")
 
+@bot.inline_handler(func=lambda query: len(query.query.strip()) > 0)
+def handle_title_autocomplete(inline_query):
+    """Подсказки названий фильмов в inline режиме (@bot название)"""
+    if not bot:
+        return
+    
+    try:
+        suggestions = MovieService.autocomplete_titles(inline_query.query, limit=10)
+        results = [
+            types.InlineQueryResultArticle(
+                id=str(movie['id']),
+                title=movie['title'],
+                description=str(movie['year']),
+                input_message_content=types.InputTextMessageContent(
+                    f"🎬 {movie['title']} ({movie['year']})"
+                )
+            )
+            for movie in suggestions
+        ]
+        bot.answer_inline_query(inline_query.id, results, cache_time=60)
+    except Exception as e:
+        logger.error(f"Ошибка автодополнения названий: {str(e)}")
+
 @bot.message_handler(commands=['help'])
 def show_help(message):
     """Показ справки"""
@@ -593,7 +625,8 @@ def show_help(message):
         "🤖 **Movie Recommendation Bot - Справка**\n\n"
         "**Доступные команды:**\n"
         "/start - Начать работу с ботом\n"
-        "/help - Показать эту справку\n\n"
+        "/help - Показать эту справку\n"
+        "@бот <название> - Подсказки названий фильмов\n\n"
         "**Как использовать:**\n"
         "1. Авторизуйтесь через /start\n"
         "2. Используйте главное меню для навигации\n"
@@ -0,0 +1,51 @@
+"""
+Запуск API в нескольких процессах uvicorn.
+
+Количество воркеров - WEB_CONCURRENCY или число CPU. Подготовка базы
+(init_db, загрузка каталога) выполняется один раз до запуска: python main.py.
+Telegram бот запускается отдельно: python bot_runner.py.
+
+Пример:
+    python main.py && python serve.py
+"""
+import os
+import shutil
+import tempfile
+import uvicorn
+from loguru import logger
+from database.config import get_settings
+from auth.token import check_secret
+
+
+def worker_count() -> int:
+    """Количество воркеров: WEB_CONCURRENCY или число CPU"""
+    return get_settings().WEB_CONCURRENCY or os.cpu_count() or 1
+
+
+def main() -> None:
+    settings = get_settings()
+    workers = worker_count()
+    if workers > 1 and not settings.SECRET_KEY:
+        # Без общего ключа каждый воркер подписывает токены своим ключом
+        raise SystemExit("SECRET_KEY must be set to run more than one worker")
+    if settings.SECRET_KEY:
+        try:
+            check_secret(settings.SECRET_KEY.encode())
+        except ValueError as e:
+            raise SystemExit(str(e))
+    if workers > 1 and settings.RATE_LIMIT_BACKEND != "sqlite":
+        logger.warning("RATE_LIMIT_BACKEND is not sqlite: login attempts are counted per worker")
+
+    if workers > 1 and not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        # Метрики воркеров собираются в общем каталоге и объединяются в /metrics
+        metrics_dir = os.path.join(tempfile.gettempdir(), "prometheus_metrics")
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+        os.makedirs(metrics_dir)
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = metrics_dir
+
+    logger.info(f"Starting API with {workers} workers")
+    uvicorn.run("api:app", host="0.0.0.0", port=8000, workers=workers)
+
+
+if __name__ == "__main__":
+    main()
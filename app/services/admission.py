@@ -0,0 +1,188 @@
+"""
+Контроль допуска запросов рекомендаций.
+
+Запрос рекомендации занимает соединение с базой и ждет ml_worker через
+RabbitMQ. Если очередь задач растет, пул соединений занят или воркер API уже
+ждет слишком много ответов, новый запрос отклоняется сразу (503 с
+Retry-After), до списания средств, а не ставится в конец очереди. Те же
+сигналы отдает /ready для балансировщика.
+
+Ограничения действуют на процесс: при нескольких воркерах uvicorn у каждого
+свой счетчик запросов в работе, глубина очереди общая.
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Callable, Optional
+from loguru import logger
+from starlette.concurrency import run_in_threadpool
+from database.config import get_settings
+from database.database import POOL_MAX_OVERFLOW, POOL_SIZE, async_engine
+from services.metrics import ADMISSION_REJECTIONS
+from services.rm.rm import get_queue_depth
+
+DEFAULT_MAX_QUEUE_DEPTH = 50
+DEFAULT_MAX_IN_FLIGHT = 16
+DEFAULT_RETRY_AFTER_SECONDS = 5
+# Глубина очереди запрашивается у брокера не чаще раза в секунду на процесс
+QUEUE_DEPTH_TTL_SECONDS = 1.0
+
+
+class Overloaded(Exception):
+    """
+    Запрос отклонен из-за перегрузки.
+
+    Args:
+        reason: причина отказа
+        retry_after: через сколько секунд повторить запрос
+    """
+
+    def __init__(self, reason: str, retry_after: int) -> None:
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@dataclass
+class AdmissionSignals:
+    """Сигналы нагрузки: глубина очереди (None - брокер или очередь недоступны), запросы в работе, занятые соединения"""
+    queue_depth: Optional[int]
+    max_queue_depth: int
+    in_flight: int
+    max_in_flight: int
+    pool_checked_out: int
+    pool_capacity: int
+
+    def rejection_reason(self) -> Optional[str]:
+        """Причина отказа в допуске или None"""
+        if self.queue_depth is None:
+            return "ML queue is unavailable"
+        if self.queue_depth >= self.max_queue_depth:
+            return "ML queue is full"
+        if self.in_flight >= self.max_in_flight:
+            return "Too many recommendations in progress"
+        if self.pool_checked_out >= self.pool_capacity:
+            return "Database connection pool is exhausted"
+        return None
+
+    def to_dict(self) -> dict:
+        """Сигналы и итог для ответа /ready"""
+        reason = self.rejection_reason()
+        return {"ready": reason is None, "reason": reason, **asdict(self)}
+
+
+class AdmissionController:
+    """
+    Допуск запросов к ML сервису по глубине очереди, числу запросов в работе
+    и занятости пула соединений.
+
+    Args:
+        depth_probe: синхронная функция глубины очереди; выполняется в пуле потоков
+        pool_checked_out: число занятых соединений пула
+        pool_capacity: размер пула с дополнительными соединениями
+        max_queue_depth: глубина очереди, с которой запросы отклоняются
+        max_in_flight: число запросов процесса, ожидающих ML сервис
+        retry_after: значение Retry-After в секундах
+    """
+
+    def __init__(
+        self,
+        depth_probe: Callable[[], int],
+        pool_checked_out: Callable[[], int],
+        pool_capacity: int,
+        max_queue_depth: int = DEFAULT_MAX_QUEUE_DEPTH,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        retry_after: int = DEFAULT_RETRY_AFTER_SECONDS,
+    ) -> None:
+        self.depth_probe = depth_probe
+        self.pool_checked_out = pool_checked_out
+        self.pool_capacity = pool_capacity
+        self.max_queue_depth = max_queue_depth
+        self.max_in_flight = max_in_flight
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self._depth: Optional[int] = None
+        self._depth_checked_at = float("-inf")
+        self._depth_lock = asyncio.Lock()
+
+    async def queue_depth(self) -> Optional[int]:
+        """
+        Глубина очереди задач с кэшем на QUEUE_DEPTH_TTL_SECONDS.
+
+        Одновременные запросы ждут одну проверку брокера. Ошибка брокера
+        кэшируется так же, как значение.
+
+        Returns:
+            Optional[int]: Число сообщений в очереди или None
+        """
+        async with self._depth_lock:
+            if time.monotonic() - self._depth_checked_at >= QUEUE_DEPTH_TTL_SECONDS:
+                try:
+                    self._depth = await run_in_threadpool(self.depth_probe)
+                except Exception as e:
+                    logger.warning(f"ML queue depth check failed: {type(e).__name__}: {e}")
+                    self._depth = None
+                self._depth_checked_at = time.monotonic()
+            return self._depth
+
+    async def signals(self) -> AdmissionSignals:
+        """Текущие сигналы нагрузки"""
+        queue_depth = await self.queue_depth()
+        return AdmissionSignals(
+            queue_depth=queue_depth,
+            max_queue_depth=self.max_queue_depth,
+            in_flight=self.in_flight,
+            max_in_flight=self.max_in_flight,
+            pool_checked_out=self.pool_checked_out(),
+            pool_capacity=self.pool_capacity,
+        )
+
+    async def admit(self) -> None:
+        """
+        Занимает место для запроса к ML сервису; освобождается release().
+
+        Проверка и занятие места выполняются без переключения задач, поэтому
+        одновременные запросы не превышают max_in_flight.
+
+        Raises:
+            Overloaded: Запрос не допущен
+        """
+        reason = (await self.signals()).rejection_reason()
+        if reason is not None:
+            ADMISSION_REJECTIONS.labels(reason).inc()
+            raise Overloaded(reason, self.retry_after)
+        self.in_flight += 1
+
+    def release(self) -> None:
+        """Освобождает место, занятое admit()"""
+        self.in_flight -= 1
+
+    @asynccontextmanager
+    async def slot(self):
+        """
+        Место для запроса к ML сервису на время блока.
+
+        Raises:
+            Overloaded: Запрос не допущен
+        """
+        await self.admit()
+        try:
+            yield
+        finally:
+            self.release()
+
+
+@lru_cache()
+def get_admission_controller() -> AdmissionController:
+    """Получает контроллер допуска процесса по настройкам приложения"""
+    settings = get_settings()
+    return AdmissionController(
+        depth_probe=lambda: get_queue_depth(settings),
+        pool_checked_out=async_engine.pool.checkedout,
+        pool_capacity=POOL_SIZE + POOL_MAX_OVERFLOW,
+        max_queue_depth=settings.ML_QUEUE_MAX_DEPTH or DEFAULT_MAX_QUEUE_DEPTH,
+        max_in_flight=settings.ML_MAX_IN_FLIGHT or DEFAULT_MAX_IN_FLIGHT,
+        retry_after=settings.ADMISSION_RETRY_AFTER_SECONDS or DEFAULT_RETRY_AFTER_SECONDS,
+    )
@@ -0,0 +1,7 @@
+"""
+Асинхронные варианты CRUD сервисов для обработчиков API.
+
+Работают через AsyncSession на asyncpg и не блокируют event loop. Связи
+загружаются явно (selectinload), так как ленивая загрузка в асинхронном
+коде невозможна. Синхронные сервисы остаются для бота, CLI и main.py.
+"""
@@ -0,0 +1,180 @@
+import secrets
+from datetime import datetime, timedelta
+from typing import List, Optional
+from sqlalchemy import delete, update
+from sqlmodel import func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from services.metrics import timed
+from models.constants import JobStatus
+from models.prediction_job import PredictionJob
+from models.user import User
+
+
+class TooManyJobs(Exception):
+    """У пользователя уже max_pending выполняющихся задач"""
+
+    def __init__(self, max_pending: int) -> None:
+        super().__init__(f"Too many pending jobs (limit {max_pending})")
+        self.max_pending = max_pending
+
+
+def expires_at(ttl_seconds: float):
+    """
+    Условие истекшей задачи: завершена больше ttl_seconds назад или все еще
+    pending спустя ttl_seconds после создания - ее воркер остановился, не
+    сохранив результат.
+    """
+    deadline = datetime.utcnow() - timedelta(seconds=ttl_seconds)
+    return func.coalesce(PredictionJob.finished_at, PredictionJob.created_at) < deadline
+
+
+@timed("job.purge_expired_jobs")
+async def purge_expired_jobs(
+    ttl_seconds: float,
+    session: AsyncSession
+) -> int:
+    """
+    Удаляет истекшие задачи.
+
+    Args:
+        ttl_seconds: время хранения задачи после завершения
+        session: асинхронная сессия БД
+
+    Returns:
+        int: Количество удаленных задач
+    """
+    result = await session.exec(delete(PredictionJob).where(expires_at(ttl_seconds)))
+    await session.commit()
+    return result.rowcount
+
+
+@timed("job.create_job")
+async def create_job(
+    user_id: int,
+    ttl_seconds: float,
+    max_pending: int,
+    session: AsyncSession
+) -> PredictionJob:
+    """
+    Создает задачу пользователя в состоянии pending и удаляет истекшие задачи.
+
+    Строка пользователя блокируется до commit, поэтому одновременные запросы
+    одного пользователя не превышают max_pending.
+
+    Args:
+        user_id: ID владельца задачи
+        ttl_seconds: время хранения задачи после завершения
+        max_pending: максимальное число выполняющихся задач пользователя
+        session: асинхронная сессия БД
+
+    Returns:
+        PredictionJob: Созданная задача
+
+    Raises:
+        TooManyJobs: У пользователя уже max_pending выполняющихся задач
+    """
+    await session.exec(delete(PredictionJob).where(expires_at(ttl_seconds)))
+    await session.exec(select(User.id).where(User.id == user_id).with_for_update())
+    pending = (await session.exec(
+        select(func.count()).select_from(PredictionJob).where(
+            PredictionJob.user_id == user_id, PredictionJob.status == JobStatus.PENDING
+        )
+    )).one()
+    if pending >= max_pending:
+        await session.rollback()
+        raise TooManyJobs(max_pending)
+
+    job = PredictionJob(id=secrets.token_urlsafe(16), user_id=user_id)
+    session.add(job)
+    await session.commit()
+    return job
+
+
+@timed("job.get_job")
+async def get_job(
+    job_id: str,
+    user_id: int,
+    ttl_seconds: float,
+    session: AsyncSession
+) -> Optional[PredictionJob]:
+    """
+    Получить задачу пользователя.
+
+    Args:
+        job_id: id задачи
+        user_id: ID пользователя
+        ttl_seconds: время хранения задачи после завершения
+        session: асинхронная сессия БД
+
+    Returns:
+        Optional[PredictionJob]: Задача или None, если ее нет, она истекла или принадлежит другому
+    """
+    statement = select(PredictionJob).where(
+        PredictionJob.id == job_id,
+        PredictionJob.user_id == user_id,
+        ~expires_at(ttl_seconds),
+    )
+    return (await session.exec(statement)).one_or_none()
+
+
+def complete_statement(job_id: str, ttl_seconds: float, **values):
+    """Сохранение итога задачи, если она еще pending и не истекла"""
+    return (
+        update(PredictionJob)
+        .where(PredictionJob.id == job_id, PredictionJob.status == JobStatus.PENDING, ~expires_at(ttl_seconds))
+        .values(finished_at=datetime.utcnow(), **values)
+    )
+
+
+@timed("job.finish_job")
+async def finish_job(
+    job_id: str,
+    result: List[dict],
+    ttl_seconds: float,
+    session: AsyncSession
+) -> bool:
+    """
+    Сохраняет результат задачи в текущей транзакции БД, без commit.
+
+    Вызывается до сохранения предсказания в той же сессии: строка задачи
+    блокируется, и результат фиксируется одним commit со списанием. Если
+    задача уже истекла, списание не выполняется.
+
+    Args:
+        job_id: id задачи
+        result: фильмы в виде для ответа
+        ttl_seconds: время хранения задачи после завершения
+        session: асинхронная сессия БД
+
+    Returns:
+        bool: False если задача уже завершена, истекла или удалена
+    """
+    statement = complete_statement(job_id, ttl_seconds, status=JobStatus.DONE, result=result)
+    return (await session.exec(statement)).rowcount == 1
+
+
+@timed("job.fail_job")
+async def fail_job(
+    job_id: str,
+    error_status: int,
+    error: str,
+    ttl_seconds: float,
+    session: AsyncSession
+) -> bool:
+    """
+    Сохраняет ошибку задачи с HTTP кодом, который вернул бы синхронный endpoint.
+
+    Args:
+        job_id: id задачи
+        error_status: HTTP код ошибки
+        error: причина ошибки
+        ttl_seconds: время хранения задачи после завершения
+        session: асинхронная сессия БД
+
+    Returns:
+        bool: False если задача уже завершена, истекла или удалена
+    """
+    statement = complete_statement(job_id, ttl_seconds, status=JobStatus.FAILED, error=error, error_status=error_status)
+    saved = (await session.exec(statement)).rowcount == 1
+    await session.commit()
+    return saved
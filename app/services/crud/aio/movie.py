@@ -0,0 +1,117 @@
+from typing import Dict, List, Optional
+from sqlalchemy import Row
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from loguru import logger
+from services.metrics import timed
+from models.movie_facet import MovieFacet
+from services.crud.movie import (
+    genre_page_statement,
+    group_facets,
+    similar_movies_statement,
+    title_search_statement,
+    title_threshold_statement,
+)
+
+
+@timed("movie.search_similar_movies")
+async def search_similar_movies(
+    embedding: List[float],
+    top: int,
+    session: AsyncSession
+) -> List[Row]:
+    """
+    Векторный поиск фильмов, ближайших к эмбеддингу запроса.
+
+    Args:
+        embedding: эмбеддинг запроса
+        top: количество фильмов
+        session: асинхронная сессия базы данных
+
+    Returns:
+        List[Row]: Строки с полями id, title, description, year, genres
+    """
+    try:
+        return (await session.exec(similar_movies_statement(embedding, top))).all()
+    except Exception as e:
+        logger.error(f"Ошибка при векторном поиске фильмов: {e}")
+        raise
+
+
+@timed("movie.search_movies_by_title")
+async def search_movies_by_title(
+    query: str,
+    session: AsyncSession,
+    limit: int = 20,
+    offset: int = 0,
+    threshold: float = 0.4
+) -> List[Row]:
+    """
+    Нечеткий поиск фильмов по названию с ранжированием по похожести.
+
+    Args:
+        query: поисковая строка
+        session: асинхронная сессия базы данных
+        limit: максимальное количество результатов
+        offset: смещение для постраничного вывода
+        threshold: минимальная word similarity от 0 до 1
+
+    Returns:
+        List[Row]: Строки с полями MovieOut и score
+    """
+    try:
+        await session.exec(title_threshold_statement(threshold))
+        movies = (await session.exec(title_search_statement(query, limit, offset))).all()
+        logger.info(f"Найдено {len(movies)} фильмов по запросу '{query}'")
+        return movies
+    except Exception as e:
+        logger.error(f"Ошибка при нечетком поиске фильмов по названию '{query}': {e}")
+        raise
+
+
+@timed("movie.get_movies_by_genre_page")
+async def get_movies_by_genre_page(
+    genre: str,
+    session: AsyncSession,
+    after_id: int = 0,
+    limit: int = 50,
+    decade: Optional[int] = None
+) -> List[Row]:
+    """
+    Постраничный просмотр фильмов жанра с keyset пагинацией по id.
+
+    Args:
+        genre: жанр
+        session: асинхронная сессия базы данных
+        after_id: id последнего фильма предыдущей страницы
+        limit: размер страницы
+        decade: начало десятилетия для дополнительного фильтра
+
+    Returns:
+        List[Row]: Строки с полями MovieOut, упорядоченные по id
+    """
+    try:
+        return (await session.exec(genre_page_statement(genre, after_id, limit, decade))).all()
+    except Exception as e:
+        logger.error(f"Ошибка при просмотре фильмов жанра '{genre}': {e}")
+        raise
+
+
+@timed("movie.get_movie_facets")
+async def get_movie_facets(
+    session: AsyncSession
+) -> Dict[str, Dict[str, int]]:
+    """
+    Счетчики фильмов по жанрам и десятилетиям из предрасчитанной таблицы.
+
+    Args:
+        session: асинхронная сессия базы данных
+
+    Returns:
+        Dict[str, Dict[str, int]]: {тип фасета: {значение: количество}}
+    """
+    try:
+        return group_facets((await session.exec(select(MovieFacet))).all())
+    except Exception as e:
+        logger.error(f"Ошибка при получении фасетов каталога: {e}")
+        raise
@@ -0,0 +1,129 @@
+from typing import List, Optional, Tuple
+from sqlalchemy import insert
+from sqlmodel import func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.orm import selectinload
+from loguru import logger
+from services.metrics import timed
+from models.base_model import to_money
+from models.constants import TransactionType
+from models.movie import Movie
+from models.prediction import Prediction
+from models.prediction_movie_link import PredictionMovieLink
+from services.crud.aio.wallet import apply_transaction
+from services.crud.pagination import history_page_statement, split_page
+
+
+@timed("prediction.create_prediction")
+async def create_prediction(
+    user_id: int,
+    wallet_id: int,
+    input_text: str,
+    embedding: list,
+    cost: float,
+    movies: List[Movie],
+    session: AsyncSession
+) -> Prediction:
+    """
+    Списание стоимости и сохранение предсказания одной транзакцией БД.
+
+    Вызывается после получения эмбеддинга и результатов поиска, поэтому
+    ошибка ML сервиса или поиска не списывает средства, а списание без
+    сохраненного предсказания невозможно. Связи с фильмами вставляются одним
+    INSERT по ID: в movies можно передавать как объекты Movie, так и строки
+    проекции из search_similar_movies. Объекты после commit не перечитываются.
+
+    Args:
+        user_id: ID пользователя
+        wallet_id: ID кошелька пользователя
+        input_text: входящий запрос
+        embedding: эмбеддинг входящего запроса
+        cost: стоимость предсказания
+        movies: список рекомендованных фильмов
+        session: асинхронная сессия базы данных
+
+    Returns:
+        Prediction: новое предсказание
+
+    Raises:
+        ValueError: Недостаточно средств
+    """
+    try:
+        await apply_transaction(wallet_id, user_id, -cost, TransactionType.PREDICTION, session)
+
+        prediction = Prediction(
+            user_id=user_id,
+            input_text=input_text,
+            embedding=embedding,
+            cost=to_money(cost)
+        )
+        session.add(prediction)
+        await session.flush()
+        if movies:
+            await session.exec(insert(PredictionMovieLink).values([
+                {"prediction_id": prediction.id, "movie_id": movie.id} for movie in movies
+            ]))
+        await session.commit()
+
+    except Exception:
+        await session.rollback()
+        raise
+
+    return prediction
+
+
+@timed("prediction.get_predictions_by_user_id")
+async def get_predictions_by_user_id(
+    id: int,
+    session: AsyncSession,
+    cursor: Optional[str] = None,
+    limit: int = 50
+) -> Tuple[List[Prediction], Optional[str]]:
+    """
+    Получить страницу предсказаний пользователя вместе с фильмами.
+
+    Фильмы всей страницы загружаются одним дополнительным запросом
+    selectinload, а не отдельным запросом на каждое предсказание.
+
+    Args:
+        id: ID пользователя
+        session: асинхронная сессия базы данных
+        cursor: курсор предыдущей страницы
+        limit: размер страницы
+
+    Returns:
+        Tuple[List[Prediction], Optional[str]]: Предсказания от новых к старым и курсор следующей страницы
+    """
+    try:
+        statement = history_page_statement(
+            select(Prediction)
+            .where(Prediction.user_id == id)
+            .options(selectinload(Prediction.movies)),
+            Prediction, cursor, limit
+        )
+        return split_page((await session.exec(statement)).all(), limit)
+    except Exception as e:
+        logger.error(f"Ошибка при получении истории предсказаний по ID пользователя {id}: {e}")
+        raise
+
+
+@timed("prediction.get_latest_prediction_id")
+async def get_latest_prediction_id(
+    id: int,
+    session: AsyncSession
+) -> Optional[int]:
+    """
+    Получить ID последнего предсказания пользователя.
+
+    Предсказания не изменяются, поэтому ID последнего определяет содержимое
+    истории и служит для ETag без загрузки страницы.
+
+    Args:
+        id: ID пользователя
+        session: асинхронная сессия базы данных
+
+    Returns:
+        Optional[int]: ID последнего предсказания или None
+    """
+    statement = select(func.max(Prediction.id)).where(Prediction.user_id == id)
+    return (await session.exec(statement)).one()
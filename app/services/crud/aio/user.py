@@ -0,0 +1,199 @@
+from typing import Optional, Sequence
+from sqlalchemy import Row
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.orm import selectinload
+from starlette.concurrency import run_in_threadpool
+from loguru import logger
+from services.metrics import timed
+from models.user import User
+from models.wallet import Wallet
+from models.constants import TransactionCost, TransactionType
+from services.crud.user import hash_password, verify_password
+from services.crud.aio.wallet import make_transaction
+
+
+# Колонки для аутентификации: пользователь и его кошелек одним запросом
+AUTH_COLUMNS = (
+    User.id,
+    User.email,
+    User.is_admin,
+    User.password_hash,
+    Wallet.id.label("wallet_id"),
+    Wallet.balance,
+)
+
+
+def _relationship_options(relationships: Sequence[str]):
+    """selectinload для перечисленных связей User"""
+    return [selectinload(getattr(User, name)) for name in relationships]
+
+
+@timed("user.get_auth_row_by_email")
+async def get_auth_row_by_email(
+    email: str,
+    session: AsyncSession
+) -> Optional[Row]:
+    """
+    Данные для аутентификации по email: id, email, is_admin, password_hash,
+    wallet_id, balance.
+
+    Один запрос по уникальному индексу email с join кошелька, без загрузки
+    истории предсказаний и транзакций.
+
+    Args:
+        email: email юзера
+        session: асинхронная сессия базы данных
+
+    Returns:
+        Optional[Row]: Строка с полями AUTH_COLUMNS или None
+    """
+    try:
+        statement = select(*AUTH_COLUMNS).outerjoin(Wallet, Wallet.user_id == User.id).where(User.email == email)
+        return (await session.exec(statement)).first()
+    except Exception as e:
+        logger.error(f"Ошибка при получении пользователя по email {email}: {e}")
+        raise
+
+
+@timed("user.get_auth_row_by_id")
+async def get_auth_row_by_id(
+    id: int,
+    session: AsyncSession
+) -> Optional[Row]:
+    """
+    Данные для аутентификации по ID, как в get_auth_row_by_email.
+
+    Args:
+        id: ID юзера
+        session: асинхронная сессия базы данных
+
+    Returns:
+        Optional[Row]: Строка с полями AUTH_COLUMNS или None
+    """
+    try:
+        statement = select(*AUTH_COLUMNS).outerjoin(Wallet, Wallet.user_id == User.id).where(User.id == id)
+        return (await session.exec(statement)).first()
+    except Exception as e:
+        logger.error(f"Ошибка при получении пользователя по ID {id}: {e}")
+        raise
+
+
+@timed("user.get_user_by_email")
+async def get_user_by_email(
+    email: str,
+    session: AsyncSession,
+    relationships: Sequence[str] = ()
+) -> Optional[User]:
+    """
+    Получить юзера по email.
+
+    Args:
+        email: email юзера
+        session: асинхронная сессия базы данных
+        relationships: связи User, которые нужно загрузить (например "wallet")
+
+    Returns:
+        Optional[User]: Найденный пользователь или None
+    """
+    try:
+        statement = select(User).where(User.email == email).options(
+            *_relationship_options(relationships)
+        )
+        return (await session.exec(statement)).first()
+    except Exception as e:
+        logger.error(f"Ошибка при получении пользователя по email {email}: {e}")
+        raise
+
+
+@timed("user.get_user_by_id")
+async def get_user_by_id(
+    id: int,
+    session: AsyncSession,
+    relationships: Sequence[str] = ()
+) -> Optional[User]:
+    """
+    Получить юзера по ID.
+
+    Args:
+        id: ID юзера
+        session: асинхронная сессия базы данных
+        relationships: связи User, которые нужно загрузить (например "wallet")
+
+    Returns:
+        Optional[User]: Найденный пользователь или None
+    """
+    try:
+        statement = select(User).where(User.id == id).options(
+            *_relationship_options(relationships)
+        )
+        return (await session.exec(statement)).first()
+    except Exception as e:
+        logger.error(f"Ошибка при получении пользователя по ID {id}: {e}")
+        raise
+
+
+@timed("user.create_user")
+async def create_user(
+    email: str,
+    password: str,
+    session: AsyncSession,
+    is_admin: bool = False
+) -> User:
+    """
+    Регистрация нового пользователя с кошельком и приветственным бонусом.
+
+    Args:
+        email: email пользователя
+        password: пароль
+        session: асинхронная сессия базы данных
+        is_admin: является ли администратором
+
+    Returns:
+        User: новый пользователь
+    """
+    existing_user = await get_user_by_email(email, session)
+    if existing_user:
+        raise ValueError("Пользователь с таким email уже существует")
+
+    # bcrypt намеренно медленный, поэтому хеширование выполняется вне event loop
+    password_hash = await run_in_threadpool(hash_password, password)
+
+    try:
+        user = User(
+            email=email,
+            password_hash=password_hash,
+            is_admin=is_admin
+        )
+        session.add(user)
+        await session.flush()
+
+        wallet = Wallet(user_id=user.id)
+        session.add(wallet)
+        await session.commit()
+
+        # Добавляем приветственный бонус
+        await make_transaction(wallet, TransactionCost.ENTRY_BONUS.value, TransactionType.ENTRY_BONUS, session)
+
+        logger.info(f"Пользователь {user.email} создан")
+        return user
+
+    except Exception as e:
+        await session.rollback()
+        logger.error(f"Ошибка при создании пользователя {email}: {e}")
+        raise
+
+
+@timed("user.check_password")
+async def check_password(password: str, hashed_password: str) -> bool:
+    """
+    Проверка пароля bcrypt в пуле потоков.
+
+    Args:
+        password: исходный пароль
+        hashed_password: хешированный пароль
+
+    Returns:
+        bool: True если пароль верный
+    """
+    return await run_in_threadpool(verify_password, password, hashed_password)
@@ -0,0 +1,152 @@
+from typing import List, Optional, Tuple
+from sqlalchemy import update
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlmodel import func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from loguru import logger
+from services.metrics import timed
+from models.base_model import to_money
+from models.transaction import Transaction
+from models.wallet import Wallet
+from models.constants import TransactionType
+from services.crud.pagination import history_page_statement, split_page
+
+
+@timed("wallet.apply_transaction")
+async def apply_transaction(
+    wallet_id: int,
+    user_id: int,
+    amount: float,
+    type: TransactionType,
+    session: AsyncSession
+) -> float:
+    """
+    Изменяет баланс и записывает транзакцию в текущей транзакции БД, без commit.
+
+    Баланс меняется одним условным UPDATE ... RETURNING: проверка средств и
+    изменение выполняются в базе под блокировкой строки, поэтому одновременные
+    списания с одного кошелька не теряют обновления и не уводят баланс в минус.
+
+    Args:
+        wallet_id: ID кошелька
+        user_id: ID владельца кошелька
+        amount: сумма транзакции (списание - отрицательное значение / пополнение - положительное)
+        type: тип транзакции
+        session: асинхронная сессия БД
+
+    Returns:
+        float: Новый баланс
+
+    Raises:
+        ValueError: Недостаточно средств
+    """
+    money = to_money(amount)
+    statement = (
+        update(Wallet)
+        .where(Wallet.id == wallet_id, Wallet.balance + money >= 0)
+        .values(balance=Wallet.balance + money)
+        .returning(Wallet.balance)
+        .execution_options(synchronize_session=False)
+    )
+    balance = (await session.exec(statement)).scalar_one_or_none()
+    if balance is None:
+        current = (await session.exec(select(Wallet.balance).where(Wallet.id == wallet_id))).one_or_none()
+        raise ValueError(f"Недостаточно средств. Баланс: {current}, требуется: {abs(money)}")
+
+    session.add(Transaction(user_id=user_id, wallet_id=wallet_id, amount=money, type=type))
+    return balance
+
+
+@timed("wallet.make_transaction")
+async def make_transaction(
+    wallet: Wallet,
+    amount: float,
+    type: TransactionType,
+    session: AsyncSession
+) -> Wallet:
+    """
+    Совершить транзакцию по конкретному кошельку.
+
+    Транзакция создается по ID кошелька и пользователя, без обращения к
+    незагруженным связям wallet.transactions и wallet.user.
+
+    Args:
+        wallet: кошелек пользователя
+        amount: сумма транзакции (списание - отрицательное значение / пополнение - положительное)
+        type: тип транзакции
+        session: асинхронная сессия БД
+
+    Returns:
+        Wallet: кошелек с обновленным балансом
+
+    Raises:
+        ValueError: Недостаточно средств или ошибка базы
+    """
+    try:
+        balance = await apply_transaction(wallet.id, wallet.user_id, amount, type, session)
+        await session.commit()
+        # Загруженное значение, а не изменение: следующий flush не перезапишет баланс
+        set_committed_value(wallet, "balance", balance)
+
+        logger.info(f"Транзакция выполнена: {amount} для кошелька {wallet.id}. Новый баланс: {wallet.balance}")
+        return wallet
+
+    except ValueError:
+        await session.rollback()
+        raise
+
+    except Exception as e:
+        await session.rollback()
+        logger.error(f"Ошибка при выполнении транзакции: {e}")
+        raise ValueError(f"Не удалось выполнить транзакцию: {e}") from e
+
+
+@timed("wallet.get_wallet_transactions")
+async def get_wallet_transactions(
+    id: int,
+    session: AsyncSession,
+    cursor: Optional[str] = None,
+    limit: int = 50
+) -> Tuple[List[Transaction], Optional[str]]:
+    """
+    Получить страницу транзакций кошелька, от новых к старым.
+
+    Args:
+        id: ID кошелька
+        session: асинхронная сессия базы данных
+        cursor: курсор предыдущей страницы
+        limit: размер страницы
+
+    Returns:
+        Tuple[List[Transaction], Optional[str]]: Транзакции и курсор следующей страницы
+    """
+    try:
+        statement = history_page_statement(
+            select(Transaction).where(Transaction.wallet_id == id), Transaction, cursor, limit
+        )
+        return split_page((await session.exec(statement)).all(), limit)
+    except Exception as e:
+        logger.error(f"Ошибка при получении транзакций кошелька {id}: {e}")
+        raise
+
+
+@timed("wallet.get_latest_transaction_id")
+async def get_latest_transaction_id(
+    id: int,
+    session: AsyncSession
+) -> Optional[int]:
+    """
+    Получить ID последней транзакции кошелька.
+
+    Транзакции не изменяются, поэтому ID последней определяет содержимое
+    истории и служит для ETag без загрузки страницы.
+
+    Args:
+        id: ID кошелька
+        session: асинхронная сессия базы данных
+
+    Returns:
+        Optional[int]: ID последней транзакции или None
+    """
+    statement = select(func.max(Transaction.id)).where(Transaction.wallet_id == id)
+    return (await session.exec(statement)).one()
@@ -1,10 +1,30 @@
+from __future__ import annotations
 from models.movie import Movie
+from models.movie_facet import MovieFacet
+from models.constants import FacetType
+from database.schema import REBUILD_FACETS_SQL
 from sqlmodel import Session, select
 import json
+import threading
+import time
 from pathlib import Path
-from typing import List, Optional, Dict, Tuple
+from typing import List, Optional, Dict, Set, Tuple, TYPE_CHECKING
 from loguru import logger
-from sentence_transformers import SentenceTransformer
+from sqlalchemy import Engine, Row, exists, func, literal, text, update
+from services.embeddings.store import EmbeddingStore
+from services.search.title_index import TitlePrefixIndex, title_index
+from services.crud.movie_import import COLUMNAR_SUFFIXES, import_movie_catalog
+
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+
+MOVIE_EMBEDDING_INDEX = "idx_movie_embedding"
+DEFAULT_TITLE_INDEX_REFRESH_SECONDS = 30
+
+# Колонки, которые отдаются наружу в MovieOut - без эмбеддинга
+MOVIE_OUT_COLUMNS = (Movie.id, Movie.title, Movie.description, Movie.year, Movie.genres)
 
 
 def add_movie(
@@ -44,6 +64,9 @@ def add_movie(
         session.add(defined_movie)
         session.commit()
         session.refresh(defined_movie)
+        # Индекс автодополнения обновляется только в процессе, где он построен (API)
+        if title_index.loaded:
+            title_index.add(defined_movie.id, defined_movie.title, defined_movie.year)
         msg = "Фильм успешно добавлен"
         logger.info(f"Фильм '{defined_movie.title}' добавлен в базу")
         return True, msg, defined_movie
@@ -75,20 +98,33 @@ def get_movie_by_id(
 
 def get_movies_by_title(
     title: str, 
-    session: Session
+    session: Session,
+    limit: int = 20,
+    threshold: float = 0.4
 ) -> Optional[List[Movie]]:
     """
-    Поиск фильмов по названию (частичное совпадение).
+    Поиск фильмов по названию (нечеткое совпадение).
+    
+    Как и search_movies_by_title, использует оператор pg_trgm `<%`, который
+    обслуживается GIN индексом ix_movie_title_trgm, а не перебор таблицы.
     
     Args:
         title: часть названия для поиска
         session: сессия базы данных
+        limit: максимальное количество результатов
+        threshold: минимальная word similarity от 0 до 1
     
     Returns:
-        List[Movie]: Список найденных фильмов
+        List[Movie]: Список найденных фильмов, самые похожие первыми
     """
     try:
-        statement = select(Movie).where(Movie.title.ilike(f"%{title}%"))
+        session.exec(title_threshold_statement(threshold))
+        statement = (
+            select(Movie)
+            .where(literal(title).op("<%")(Movie.title))
+            .order_by(func.word_similarity(title, Movie.title).desc(), Movie.id)
+            .limit(limit)
+        )
         movies = session.exec(statement).all()
         logger.info(f"Найдено {len(movies)} фильмов по запросу '{title}'")
         return movies
@@ -96,6 +132,180 @@ def get_movies_by_title(
         logger.error(f"Ошибка при поиске фильмов по названию '{title}': {e}")
         raise
 
+def title_threshold_statement(threshold: float):
+    """Запрос, задающий порог word similarity до конца текущей транзакции"""
+    return select(func.set_config("pg_trgm.word_similarity_threshold", str(threshold), True))
+
+def title_search_statement(query: str, limit: int, offset: int):
+    """Запрос нечеткого поиска по названию с колонками MovieOut и score"""
+    score = func.word_similarity(query, Movie.title)
+    return (
+        select(*MOVIE_OUT_COLUMNS, score.label("score"))
+        .where(literal(query).op("<%")(Movie.title))
+        .order_by(score.desc(), func.similarity(query, Movie.title).desc(), Movie.id)
+        .limit(limit)
+        .offset(offset)
+    )
+
+def search_movies_by_title(
+    query: str,
+    session: Session,
+    limit: int = 20,
+    offset: int = 0,
+    threshold: float = 0.4
+) -> List[Row]:
+    """
+    Нечеткий поиск фильмов по названию с ранжированием по похожести.
+    
+    Используется оператор pg_trgm `<%` (word similarity), который обслуживается
+    GIN индексом ix_movie_title_trgm и терпим к опечаткам и неполным словам.
+    
+    Args:
+        query: поисковая строка
+        session: сессия базы данных
+        limit: максимальное количество результатов
+        offset: смещение для постраничного вывода
+        threshold: минимальная word similarity от 0 до 1
+    
+    Returns:
+        List[Row]: Строки с полями MovieOut и score
+    """
+    try:
+        session.exec(title_threshold_statement(threshold))
+        movies = session.exec(title_search_statement(query, limit, offset)).all()
+        logger.info(f"Найдено {len(movies)} фильмов по запросу '{query}'")
+        return movies
+    except Exception as e:
+        logger.error(f"Ошибка при нечетком поиске фильмов по названию '{query}': {e}")
+        raise
+
+def load_title_index(
+    session: Session,
+    index: TitlePrefixIndex = title_index
+) -> int:
+    """
+    Строит индекс автодополнения по названиям всех фильмов.
+    
+    Читаются только id, название и год, без описаний и эмбеддингов.
+    
+    Args:
+        session: сессия базы данных
+        index: индекс для заполнения
+    
+    Returns:
+        int: Количество фильмов в индексе
+    """
+    try:
+        rows = session.exec(
+            select(Movie.id, Movie.title, Movie.year).execution_options(yield_per=10000)
+        )
+        index.build((row.id, row.title, row.year) for row in rows)
+        logger.info(f"Индекс автодополнения построен: {len(index)} фильмов")
+        return len(index)
+    except Exception as e:
+        logger.error(f"Ошибка при построении индекса автодополнения: {e}")
+        raise
+
+def get_catalog_version(
+    session: Session
+) -> Tuple:
+    """
+    Дешевый признак изменения каталога без чтения таблицы movie.
+    
+    max(id) берется по первичному ключу и сразу отражает новые фильмы;
+    счетчики вставок, изменений и удалений из pg_stat_user_tables отражают
+    изменения и удаления из любого процесса с задержкой сбора статистики.
+    
+    Args:
+        session: сессия базы данных
+    
+    Returns:
+        Tuple: Версия каталога; меняется при изменении movie
+    """
+    max_id = session.exec(select(func.max(Movie.id))).one()
+    counters = session.exec(text(
+        "SELECT n_tup_ins, n_tup_upd, n_tup_del FROM pg_stat_user_tables WHERE relid = 'movie'::regclass"
+    )).first()
+    return (max_id, *(counters or ()))
+
+def refresh_title_index(
+    session: Session,
+    index: TitlePrefixIndex = title_index
+) -> bool:
+    """
+    Перестраивает индекс автодополнения, если каталог изменился после построения.
+    
+    Args:
+        session: сессия базы данных
+        index: индекс автодополнения
+    
+    Returns:
+        bool: True если индекс перестроен
+    """
+    # Версия читается до построения: изменения во время построения подхватит следующая проверка
+    version = get_catalog_version(session)
+    if index.loaded and index.version == version:
+        return False
+    load_title_index(session, index)
+    index.version = version
+    return True
+
+def start_title_index_refresh(
+    engine: Engine,
+    interval_seconds: Optional[float] = None,
+    index: TitlePrefixIndex = title_index
+) -> Optional[threading.Thread]:
+    """
+    Запускает фоновую проверку каталога для индекса автодополнения процесса.
+    
+    Каждый воркер API и бот держат свой индекс, а CLI и другие процессы
+    меняют каталог мимо него. Раз в interval_seconds поток сравнивает версию
+    каталога и перестраивает индекс, если она изменилась.
+    
+    Args:
+        engine: движок базы данных
+        interval_seconds: интервал проверки; None - DEFAULT_TITLE_INDEX_REFRESH_SECONDS, 0 - не проверять
+        index: индекс автодополнения
+    
+    Returns:
+        Optional[threading.Thread]: Поток проверки (daemon) или None, если проверка выключена
+    """
+    if interval_seconds is None:
+        interval_seconds = DEFAULT_TITLE_INDEX_REFRESH_SECONDS
+    if interval_seconds <= 0:
+        return None
+
+    def run() -> None:
+        while True:
+            time.sleep(interval_seconds)
+            try:
+                with Session(engine) as session:
+                    refresh_title_index(session, index)
+            except Exception as e:
+                logger.warning(f"Не удалось обновить индекс автодополнения: {e}")
+
+    thread = threading.Thread(target=run, name="title-index-refresh", daemon=True)
+    thread.start()
+    return thread
+
+def autocomplete_titles(
+    prefix: str,
+    limit: int = 10,
+    index: TitlePrefixIndex = title_index
+) -> List[Dict]:
+    """
+    Подсказки названий по введенному префиксу без запроса к базе.
+    
+    Args:
+        prefix: введенный текст
+        limit: количество подсказок
+        index: индекс автодополнения
+    
+    Returns:
+        List[Dict]: Словари с полями id, title, year
+    """
+    return index.lookup(prefix, limit)
+
 def get_movies_by_genre(
     genre: str, 
     session: Session
@@ -119,6 +329,171 @@ def get_movies_by_genre(
         logger.error(f"Ошибка при поиске фильмов по жанру '{genre}': {e}")
         raise
 
+def genre_page_statement(genre: str, after_id: int, limit: int, decade: Optional[int]):
+    """Запрос страницы фильмов жанра после after_id с колонками MovieOut"""
+    statement = select(*MOVIE_OUT_COLUMNS).where(
+        Movie.genres.contains([genre]),
+        Movie.id > after_id
+    )
+    if decade is not None:
+        statement = statement.where(Movie.year >= decade, Movie.year < decade + 10)
+    return statement.order_by(Movie.id).limit(limit)
+
+def get_movies_by_genre_page(
+    genre: str,
+    session: Session,
+    after_id: int = 0,
+    limit: int = 50,
+    decade: Optional[int] = None
+) -> List[Row]:
+    """
+    Постраничный просмотр фильмов жанра с keyset пагинацией по id.
+    
+    Фильтр по жанру обслуживается GIN индексом ix_movie_genres_gin, а
+    продолжение с after_id не требует пропуска уже отданных строк, как OFFSET.
+    
+    Args:
+        genre: жанр
+        session: сессия базы данных
+        after_id: id последнего фильма предыдущей страницы
+        limit: размер страницы
+        decade: начало десятилетия для дополнительного фильтра (например 1990)
+    
+    Returns:
+        List[Row]: Строки с полями MovieOut, упорядоченные по id
+    """
+    try:
+        return session.exec(genre_page_statement(genre, after_id, limit, decade)).all()
+    except Exception as e:
+        logger.error(f"Ошибка при просмотре фильмов жанра '{genre}': {e}")
+        raise
+
+def group_facets(rows: List[MovieFacet]) -> Dict[str, Dict[str, int]]:
+    """
+    Группирует строки moviefacet по типу фасета.
+    
+    Жанры упорядочиваются по убыванию количества, десятилетия по возрастанию.
+    """
+    facets: Dict[str, Dict[str, int]] = {facet.value: {} for facet in FacetType}
+    for row in sorted(rows, key=lambda r: (-r.count, r.value)):
+        facets.setdefault(row.facet, {})[row.value] = row.count
+    facets[FacetType.DECADE.value] = dict(sorted(facets[FacetType.DECADE.value].items()))
+    return facets
+
+def get_movie_facets(
+    session: Session
+) -> Dict[str, Dict[str, int]]:
+    """
+    Счетчики фильмов по жанрам и десятилетиям из предрасчитанной таблицы.
+    
+    Args:
+        session: сессия базы данных
+    
+    Returns:
+        Dict[str, Dict[str, int]]: {тип фасета: {значение: количество}};
+            жанры упорядочены по убыванию количества, десятилетия по возрастанию
+    """
+    try:
+        return group_facets(session.exec(select(MovieFacet)).all())
+    except Exception as e:
+        logger.error(f"Ошибка при получении фасетов каталога: {e}")
+        raise
+
+def rebuild_movie_facets(
+    session: Session
+) -> int:
+    """
+    Полный пересчет таблицы фасетов по каталогу.
+    
+    Триггеры поддерживают счетчики сами; пересчет нужен только для
+    восстановления после ручных правок таблицы moviefacet.
+    
+    Args:
+        session: сессия базы данных
+    
+    Returns:
+        int: Количество строк фасетов после пересчета
+    """
+    try:
+        session.connection().exec_driver_sql(REBUILD_FACETS_SQL)
+        session.commit()
+        count = session.exec(select(func.count()).select_from(MovieFacet)).one()
+        logger.info(f"Фасеты каталога пересчитаны: {count} значений")
+        return count
+    except Exception as e:
+        session.rollback()
+        logger.error(f"Ошибка при пересчете фасетов каталога: {e}")
+        raise
+
+def count_movies(
+    session: Session
+) -> int:
+    """
+    Подсчет количества фильмов в базе без загрузки строк.
+    
+    Args:
+        session: сессия базы данных
+    
+    Returns:
+        int: Количество фильмов
+    """
+    try:
+        return session.exec(select(func.count()).select_from(Movie)).one()
+    except Exception as e:
+        logger.error(f"Ошибка при подсчете фильмов: {e}")
+        raise
+
+def movies_exist(
+    session: Session
+) -> bool:
+    """
+    Проверка наличия хотя бы одного фильма в базе.
+    
+    Args:
+        session: сессия базы данных
+    
+    Returns:
+        bool: True если в базе есть фильмы
+    """
+    try:
+        return session.exec(select(exists().select_from(Movie))).one()
+    except Exception as e:
+        logger.error(f"Ошибка при проверке наличия фильмов: {e}")
+        raise
+
+def similar_movies_statement(embedding: List[float], top: int):
+    """Запрос ближайших к эмбеддингу фильмов с колонками MovieOut"""
+    return (
+        select(*MOVIE_OUT_COLUMNS)
+        .order_by(Movie.embedding.cosine_distance(embedding))
+        .limit(top)
+    )
+
+def search_similar_movies(
+    embedding: List[float],
+    top: int,
+    session: Session
+) -> List[Row]:
+    """
+    Векторный поиск фильмов, ближайших к эмбеддингу запроса.
+    
+    Выбираются только колонки MovieOut. Сортировка идет по самой колонке
+    embedding (без приведения типа), чтобы мог использоваться векторный индекс.
+    
+    Args:
+        embedding: эмбеддинг запроса
+        top: количество фильмов
+        session: сессия базы данных
+    
+    Returns:
+        List[Row]: Строки с полями id, title, description, year, genres
+    """
+    try:
+        return session.exec(similar_movies_statement(embedding, top)).all()
+    except Exception as e:
+        logger.error(f"Ошибка при векторном поиске фильмов: {e}")
+        raise
+
 def get_all_movies(
     session: Session
 ) -> List[Movie]:
@@ -159,6 +534,7 @@ def delete_movie(
         if movie:
             session.delete(movie)
             session.commit()
+            title_index.remove(id)
             logger.info(f"Фильм '{movie.title}' удален из базы")
             return True
         logger.warning(f"Фильм с ID {id} не найден")
@@ -168,16 +544,50 @@ def delete_movie(
         logger.error(f"Ошибка при удалении фильма {id}: {e}")
         raise
 
+def encode_descriptions(
+    model: SentenceTransformer,
+    desc_list: List[str],
+    store: Optional[EmbeddingStore] = None
+):
+    """
+    Генерация эмбеддингов для описаний фильмов.
+    
+    Если передано хранилище эмбеддингов, модель вызывается только для описаний,
+    которых в нем еще нет.
+    
+    Args:
+        model: модель для генерации эмбеддингов
+        desc_list: список описаний
+        store: хранилище ранее посчитанных эмбеддингов
+    
+    Returns:
+        np.ndarray: Матрица эмбеддингов в порядке desc_list
+    """
+    if store is None:
+        return model.encode(desc_list)
+    return store.encode(model, desc_list)
+
 def update_movie_database(
     model: SentenceTransformer, 
-    session: Session
-) -> None:
+    session: Session,
+    store: Optional[EmbeddingStore] = None,
+    incremental: bool = False
+) -> Dict[str, int]:
     """
-    Инициализация базы данных фильмов из JSON файлов в директории data.
+    Инициализация базы данных фильмов из файлов в директории data.
+    
+    JSON файлы кодируются моделью, Parquet/Arrow файлы с готовыми эмбеддингами
+    загружаются через COPY без повторного кодирования.
     
     Args:
         model: модель для генерации эмбеддингов
         session: сессия базы данных
+        store: хранилище эмбеддингов, позволяющее не пересчитывать неизменившиеся описания
+        incremental: если True, фильмы, уже присутствующие в базе (по названию и году),
+            отбрасываются до генерации эмбеддингов
+    
+    Returns:
+        Dict[str, int]: Количество добавленных и пропущенных фильмов
     """
     try:
         # Путь к директории с JSON файлами
@@ -189,8 +599,11 @@ def update_movie_database(
         
         # Находим все JSON файлы в директории
         json_files = list(data_dir.glob('*.json'))
+        columnar_files = sorted(
+            path for path in data_dir.iterdir() if path.suffix in COLUMNAR_SUFFIXES
+        )
         
-        if not json_files:
+        if not json_files and not columnar_files:
             logger.warning(f"JSON файлы не найдены в директории {data_dir}. Будет использован демо-набор.")
             demo_movies = [
                 {
@@ -213,18 +626,31 @@ def update_movie_database(
                 }
             ]
             desc_list = [m['description'] for m in demo_movies]
-            embedding_list = model.encode(desc_list)
+            embedding_list = encode_descriptions(model, desc_list, store)
+            demo_added_count = 0
             for i, m in enumerate(demo_movies):
                 m['embedding'] = embedding_list[i].tolist()
                 try:
                     add_movie(m, session)
+                    demo_added_count += 1
                 except Exception as e:
                     logger.info(f"Demo movie skipped: {e}")
             logger.info("Демо фильмы добавлены")
-            return
+            return {"added": demo_added_count, "skipped": len(demo_movies) - demo_added_count}
         
         total_added_count = 0
         total_skipped_count = 0
+        known_movies = get_movie_keys(session) if incremental else set()
+        
+        for columnar_file in columnar_files:
+            logger.info(f"Импортируем файл: {columnar_file.name}")
+            try:
+                read_count, added_count = import_movie_catalog(columnar_file, session)
+                total_added_count += added_count
+                total_skipped_count += read_count - added_count
+            except Exception as e:
+                logger.error(f"Ошибка при импорте файла {columnar_file.name}: {e}")
+                continue
         
         for json_file in json_files:
             logger.info(f"Обрабатываем файл: {json_file.name}")
@@ -237,9 +663,20 @@ def update_movie_database(
                     logger.warning(f"Файл {json_file.name} не содержит массив фильмов, пропускаем")
                     continue
                 
+                if incremental:
+                    new_movies = [
+                        movie for movie in movie_list
+                        if (movie.get('title'), movie.get('year')) not in known_movies
+                    ]
+                    total_skipped_count += len(movie_list) - len(new_movies)
+                    movie_list = new_movies
+                    if not movie_list:
+                        logger.info(f"Файл {json_file.name}: новых фильмов нет")
+                        continue
+                
                 # Генерируем эмбеддинги для всех описаний
                 desc_list = [movie['description'] for movie in movie_list]
-                embedding_list = model.encode(desc_list)
+                embedding_list = encode_descriptions(model, desc_list, store)
                 
                 file_added_count = 0
                 file_skipped_count = 0
@@ -248,6 +685,7 @@ def update_movie_database(
                     try:
                         movie_example['embedding'] = embedding_list[i].tolist()
                         add_movie(movie_example, session)
+                        known_movies.add((movie_example['title'], movie_example['year']))
                         file_added_count += 1
                     except ValueError as e:
                         # Фильм уже существует
@@ -285,6 +723,181 @@ def update_movie_database(
             # except Exception as e:
             #     logger.warning(f"Не удалось создать векторный индекс: {e}")
         
+        return {"added": total_added_count, "skipped": total_skipped_count}
+        
     except Exception as e:
         logger.error(f"Ошибка при обновлении базы данных фильмов: {e}")
         raise
+
+def get_movie_keys(
+    session: Session
+) -> Set[Tuple[str, int]]:
+    """
+    Запрашивает пары (название, год) всех фильмов без загрузки эмбеддингов.
+    
+    Args:
+        session: сессия базы данных
+    
+    Returns:
+        Set[Tuple[str, int]]: Множество ключей фильмов
+    """
+    try:
+        rows = session.exec(select(Movie.title, Movie.year)).all()
+        return {(title, year) for title, year in rows}
+    except Exception as e:
+        logger.error(f"Ошибка при получении ключей фильмов: {e}")
+        raise
+
+def reembed_movies(
+    model: SentenceTransformer,
+    session: Session,
+    store: Optional[EmbeddingStore] = None,
+    batch_size: int = 256
+) -> int:
+    """
+    Пересчет эмбеддингов всех фильмов новой моделью.
+    
+    Фильмы обходятся по возрастанию ID батчами, каждый батч обновляется
+    одним bulk UPDATE и коммитится отдельно, чтобы не блокировать API.
+    
+    Args:
+        model: новая модель для генерации эмбеддингов
+        session: сессия базы данных
+        store: хранилище эмбеддингов новой модели
+        batch_size: количество фильмов в батче
+    
+    Returns:
+        int: Количество обновленных фильмов
+    """
+    dim = Movie.__table__.c.embedding.type.dim
+    model_dim = model.get_sentence_embedding_dimension()
+    if model_dim != dim:
+        raise ValueError(f"Размерность модели {model_dim} не совпадает с Vector({dim})")
+    
+    last_id = 0
+    updated_count = 0
+    while True:
+        rows = session.exec(
+            select(Movie.id, Movie.description)
+            .where(Movie.id > last_id)
+            .order_by(Movie.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        
+        embedding_list = encode_descriptions(model, [row.description for row in rows], store)
+        try:
+            session.execute(
+                update(Movie),
+                [
+                    {"id": row.id, "embedding": embedding_list[i].tolist()}
+                    for i, row in enumerate(rows)
+                ]
+            )
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Ошибка при обновлении эмбеддингов фильмов после ID {last_id}: {e}")
+            raise
+        
+        last_id = rows[-1].id
+        updated_count += len(rows)
+        logger.info(f"Пересчитаны эмбеддинги {updated_count} фильмов")
+    
+    return updated_count
+
+def rebuild_vector_index(
+    engine: Engine,
+    method: str = "hnsw",
+    lists: int = 100
+) -> None:
+    """
+    Перестроение векторного индекса по movie.embedding без блокировки таблицы.
+    
+    Новый индекс строится через CREATE INDEX CONCURRENTLY под временным именем,
+    затем в одной транзакции старый переименовывается в сторону, а новый получает
+    его имя, поэтому поиск ни в один момент не остается без индекса. Старый индекс
+    удаляется после этого через DROP INDEX CONCURRENTLY. Чтение и запись в movie
+    во время перестроения не блокируются.
+    
+    Args:
+        engine: движок базы данных
+        method: тип индекса ("hnsw" или "ivfflat")
+        lists: количество списков для ivfflat
+    """
+    if method == "hnsw":
+        index_sql = "USING hnsw (embedding vector_cosine_ops)"
+    elif method == "ivfflat":
+        index_sql = f"USING ivfflat (embedding vector_cosine_ops) WITH (lists = {int(lists)})"
+    else:
+        raise ValueError(f"Неизвестный тип векторного индекса: {method}")
+    
+    new_index = f"{MOVIE_EMBEDDING_INDEX}_new"
+    old_index = f"{MOVIE_EMBEDDING_INDEX}_old"
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        # Остатки прерванного перестроения остаются невалидными, удаляем их
+        connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {new_index}"))
+        connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {old_index}"))
+        connection.execute(text(f"CREATE INDEX CONCURRENTLY {new_index} ON movie {index_sql}"))
+    with engine.begin() as connection:
+        connection.execute(text(f"ALTER INDEX IF EXISTS {MOVIE_EMBEDDING_INDEX} RENAME TO {old_index}"))
+        connection.execute(text(f"ALTER INDEX {new_index} RENAME TO {MOVIE_EMBEDDING_INDEX}"))
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {old_index}"))
+    logger.info(f"Векторный индекс {MOVIE_EMBEDDING_INDEX} ({method}) перестроен")
+
+def find_invalid_embeddings(
+    session: Session
+) -> List[Tuple[int, str]]:
+    """
+    Поиск фильмов с пустым эмбеддингом или эмбеддингом неверной размерности.
+    
+    Args:
+        session: сессия базы данных
+    
+    Returns:
+        List[Tuple[int, str]]: Список пар (ID, название)
+    """
+    dim = Movie.__table__.c.embedding.type.dim
+    try:
+        rows = session.exec(
+            select(Movie.id, Movie.title)
+            .where(
+                Movie.embedding.is_(None)
+                | (func.vector_dims(Movie.embedding) != dim)
+            )
+            .order_by(Movie.id)
+        ).all()
+        return [(row.id, row.title) for row in rows]
+    except Exception as e:
+        logger.error(f"Ошибка при проверке эмбеддингов фильмов: {e}")
+        raise
+
+def get_catalog_stats(
+    session: Session
+) -> Dict[str, int]:
+    """
+    Статистика каталога: количество фильмов и размеры таблицы и индексов.
+    
+    Args:
+        session: сессия базы данных
+    
+    Returns:
+        Dict[str, int]: Количество фильмов и размеры в байтах
+    """
+    try:
+        row = session.exec(
+            select(
+                func.count(Movie.id).label("movies"),
+                func.pg_table_size("movie").label("table_bytes"),
+                func.pg_indexes_size("movie").label("index_bytes"),
+                func.coalesce(
+                    func.pg_relation_size(func.to_regclass(MOVIE_EMBEDDING_INDEX)), 0
+                ).label("vector_index_bytes"),
+            )
+        ).one()
+        return dict(row._mapping)
+    except Exception as e:
+        logger.error(f"Ошибка при получении статистики каталога: {e}")
+        raise
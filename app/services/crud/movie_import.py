@@ -0,0 +1,259 @@
+import io
+from pathlib import Path
+from typing import Iterator, Tuple
+
+import numpy as np
+from loguru import logger
+from sqlalchemy import text
+from sqlmodel import Session
+
+from models.movie import Movie
+
+
+COLUMNAR_SUFFIXES = ('.parquet', '.arrow', '.feather', '.ipc')
+REQUIRED_COLUMNS = ('title', 'description', 'year', 'genres', 'embedding')
+
+STAGE_TABLE = "movie_import_stage"
+
+CREATE_STAGE_SQL = f"""
+    CREATE TEMP TABLE IF NOT EXISTS {STAGE_TABLE} (
+        title text,
+        description text,
+        year integer,
+        genres text[],
+        embedding vector({{dim}})
+    ) ON COMMIT DROP
+"""
+
+TRUNCATE_STAGE_SQL = f"TRUNCATE {STAGE_TABLE}"
+
+COPY_STAGE_SQL = f"COPY {STAGE_TABLE} (title, description, year, genres, embedding) FROM STDIN"
+
+# Переносим батч из промежуточной таблицы, пропуская дубликаты так же, как add_movie;
+# повторы (title, year) внутри батча отброшены еще при формировании COPY
+MERGE_STAGE_SQL = f"""
+    INSERT INTO movie (title, description, year, genres, embedding, timestamp)
+    SELECT DISTINCT ON (left(s.description, 1000))
+        left(s.title, 255), left(s.description, 1000), s.year, s.genres, s.embedding, now() at time zone 'utc'
+    FROM {STAGE_TABLE} s
+    WHERE NOT EXISTS (
+        SELECT 1 FROM movie m WHERE m.title = left(s.title, 255) AND m.year = s.year
+    )
+    ON CONFLICT (description) DO NOTHING
+"""
+
+
+def _copy_escape(value: str) -> str:
+    """Экранирует строку для текстового формата COPY"""
+    return (
+        value.replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
+def _array_literal(values) -> str:
+    """Формирует литерал массива Postgres text[]"""
+    if not values:
+        return '{}'
+    items = ('"' + str(v).replace('\\', '\\\\').replace('"', '\\"') + '"' for v in values)
+    return '{' + ','.join(items) + '}'
+
+
+def validate_schema(schema, path: Path, dim: int) -> None:
+    """
+    Проверяет схему файла до чтения данных: наличие колонок и тип embedding.
+
+    Ширина fixed_size_list проверяется здесь, длины обычных списков - в
+    каждом батче (_embedding_matrix).
+
+    Raises:
+        ValueError: Нет колонок, embedding не список чисел или другой размерности
+    """
+    import pyarrow as pa
+
+    missing = set(REQUIRED_COLUMNS) - set(schema.names)
+    if missing:
+        raise ValueError(f"В файле {path.name} нет колонок: {', '.join(sorted(missing))}")
+
+    embedding_type = schema.field('embedding').type
+    if not (
+        pa.types.is_list(embedding_type)
+        or pa.types.is_large_list(embedding_type)
+        or pa.types.is_fixed_size_list(embedding_type)
+    ) or not (
+        pa.types.is_floating(embedding_type.value_type) or pa.types.is_integer(embedding_type.value_type)
+    ):
+        raise ValueError(f"Колонка embedding в {path.name} должна быть списком чисел, а не {embedding_type}")
+    if pa.types.is_fixed_size_list(embedding_type) and embedding_type.list_size != dim:
+        raise ValueError(
+            f"Размерность эмбеддинга {embedding_type.list_size} не совпадает с Vector({dim})"
+        )
+
+
+def _embedding_matrix(column, dim: int) -> np.ndarray:
+    """
+    Проверяет колонку эмбеддингов батча и возвращает ее как матрицу float32.
+
+    Args:
+        column: колонка embedding (list / large_list / fixed_size_list чисел)
+        dim: ожидаемая размерность, совпадающая с Vector(dim) в таблице movie
+
+    Returns:
+        np.ndarray: Матрица (len(column), dim)
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if column.null_count:
+        raise ValueError(f"Колонка embedding содержит {column.null_count} пустых значений")
+
+    if pa.types.is_fixed_size_list(column.type):
+        if column.type.list_size != dim:
+            raise ValueError(
+                f"Размерность эмбеддинга {column.type.list_size} не совпадает с Vector({dim})"
+            )
+    else:
+        lengths = pc.list_value_length(column)
+        if pc.min(lengths).as_py() != dim or pc.max(lengths).as_py() != dim:
+            raise ValueError(
+                f"Размерность эмбеддинга от {pc.min(lengths).as_py()} до {pc.max(lengths).as_py()} "
+                f"не совпадает с Vector({dim})"
+            )
+
+    values = pc.list_flatten(column).to_numpy(zero_copy_only=False)
+    return values.astype(np.float32, copy=False).reshape(len(column), dim)
+
+
+def format_copy_rows(batch, dim: int) -> str:
+    """
+    Преобразует record batch в текстовый формат COPY без создания объектов Movie.
+
+    Строки без названия, описания или года пропускаются, из строк с
+    одинаковыми (title, year) остается первая: add_movie считает их дубликатом.
+
+    Args:
+        batch: pyarrow.RecordBatch с колонками title/description/year/genres/embedding
+        dim: размерность эмбеддинга
+
+    Returns:
+        str: Строки для COPY ... FROM STDIN
+    """
+    titles = batch.column('title').to_pylist()
+    descriptions = batch.column('description').to_pylist()
+    years = batch.column('year').to_pylist()
+    genres = batch.column('genres').to_pylist()
+    embeddings = _embedding_matrix(batch.column('embedding'), dim)
+
+    vector_format = '[' + ','.join(['%.8g'] * dim) + ']'
+    lines = []
+    seen = set()
+    for i in range(batch.num_rows):
+        if not titles[i] or not descriptions[i] or years[i] is None:
+            continue
+        # Ключ совпадает с проверкой в MERGE_STAGE_SQL: название обрезается до 255 символов
+        key = (titles[i][:255], int(years[i]))
+        if key in seen:
+            continue
+        seen.add(key)
+        lines.append('\t'.join((
+            _copy_escape(titles[i]),
+            _copy_escape(descriptions[i]),
+            str(int(years[i])),
+            _copy_escape(_array_literal(genres[i])),
+            vector_format % tuple(embeddings[i].tolist()),
+        )))
+    return '\n'.join(lines) + '\n' if lines else ''
+
+
+def iter_record_batches(path: Path, batch_size: int, dim: int) -> Iterator:
+    """
+    Потоково читает Parquet или Arrow IPC файл по батчам.
+
+    Схема проверяется validate_schema до первого батча.
+
+    Args:
+        path: путь к файлу
+        batch_size: количество строк в батче (для Parquet)
+        dim: размерность эмбеддинга
+
+    Yields:
+        pyarrow.RecordBatch: батч с нужными колонками
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if path.suffix == '.parquet':
+        parquet_file = pq.ParquetFile(path)
+        validate_schema(parquet_file.schema_arrow, path, dim)
+        yield from parquet_file.iter_batches(batch_size=batch_size, columns=list(REQUIRED_COLUMNS))
+        return
+
+    with pa.memory_map(str(path), 'r') as source:
+        try:
+            reader = pa.ipc.open_file(source)
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+            schema = reader.schema
+        except pa.ArrowInvalid:
+            source.seek(0)
+            reader = pa.ipc.open_stream(source)
+            batches = iter(reader)
+            schema = reader.schema
+
+        validate_schema(schema, path, dim)
+        for batch in batches:
+            yield batch.select(list(REQUIRED_COLUMNS))
+
+
+def import_movie_catalog(
+    path: Path,
+    session: Session,
+    batch_size: int = 10000
+) -> Tuple[int, int]:
+    """
+    Импорт каталога фильмов с готовыми эмбеддингами из Parquet/Arrow файла.
+
+    Батчи записываются через COPY во временную таблицу и переносятся в movie
+    одним INSERT ... SELECT с пропуском дубликатов. Весь файл импортируется
+    одной транзакцией: схема проверяется до первого COPY, а ошибка в любом
+    батче (например, эмбеддинг другой длины) откатывает уже перенесенные.
+
+    Args:
+        path: путь к Parquet/Arrow файлу
+        session: сессия базы данных
+        batch_size: количество строк в батче
+
+    Returns:
+        Tuple[int, int]: (прочитано строк, добавлено фильмов)
+    """
+    path = Path(path)
+    dim = Movie.__table__.c.embedding.type.dim
+    total_read = 0
+    total_added = 0
+
+    try:
+        connection = session.connection()
+        connection.execute(text(CREATE_STAGE_SQL.format(dim=dim)))
+        for batch in iter_record_batches(path, batch_size, dim):
+            payload = format_copy_rows(batch, dim)
+            total_read += batch.num_rows
+            if not payload:
+                continue
+
+            cursor = connection.connection.cursor()
+            try:
+                cursor.copy_expert(COPY_STAGE_SQL, io.StringIO(payload))
+            finally:
+                cursor.close()
+            result = connection.execute(text(MERGE_STAGE_SQL))
+            connection.execute(text(TRUNCATE_STAGE_SQL))
+            total_added += max(result.rowcount, 0)
+            logger.info(f"Файл {path.name}: прочитано {total_read}, добавлено {total_added} фильмов")
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        logger.error(f"Ошибка при импорте {path.name}, изменения отменены: {e}")
+        raise
+
+    return total_read, total_added
@@ -0,0 +1,88 @@
+import base64
+from datetime import datetime
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+from sqlalchemy import tuple_
+
+
+class HistoryCursor(NamedTuple):
+    """Позиция в истории: (timestamp, id) последней отданной записи"""
+    timestamp: datetime
+    id: int
+
+
+def encode_cursor(timestamp: datetime, id: int) -> str:
+    """
+    Кодирует позицию в непрозрачную для клиента строку.
+
+    Args:
+        timestamp: время создания последней записи страницы
+        id: id последней записи страницы
+
+    Returns:
+        str: Курсор для параметра cursor следующего запроса
+    """
+    raw = f"{timestamp.isoformat()}|{id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> HistoryCursor:
+    """
+    Разбирает курсор, выданный encode_cursor.
+
+    Args:
+        cursor: курсор из запроса
+
+    Returns:
+        HistoryCursor: Позиция в истории
+
+    Raises:
+        ValueError: Если курсор поврежден
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        timestamp, id = raw.rsplit("|", 1)
+        return HistoryCursor(datetime.fromisoformat(timestamp), int(id))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Некорректный курсор: {cursor}") from e
+
+
+def history_page_statement(statement, model, cursor: Optional[str], limit: int):
+    """
+    Ограничивает запрос истории одной страницей от новых записей к старым.
+
+    Запрашивается limit + 1 строка, чтобы split_page узнал, есть ли следующая
+    страница. Порядок (timestamp, id) совпадает с составными индексами
+    ix_prediction_user_id_timestamp и ix_transaction_wallet_id_timestamp.
+
+    Args:
+        statement: запрос с фильтром по владельцу истории
+        model: модель с колонками timestamp и id
+        cursor: курсор предыдущей страницы или None для первой
+        limit: размер страницы
+
+    Returns:
+        Запрос страницы
+    """
+    if cursor:
+        position = decode_cursor(cursor)
+        statement = statement.where(
+            tuple_(model.timestamp, model.id) < tuple_(position.timestamp, position.id)
+        )
+    return statement.order_by(model.timestamp.desc(), model.id.desc()).limit(limit + 1)
+
+
+def split_page(rows: Sequence, limit: int) -> Tuple[List, Optional[str]]:
+    """
+    Отделяет страницу от лишней строки и формирует курсор следующей страницы.
+
+    Args:
+        rows: результат history_page_statement
+        limit: размер страницы
+
+    Returns:
+        Tuple[List, Optional[str]]: (записи страницы, курсор или None для последней страницы)
+    """
+    page = list(rows[:limit])
+    if len(rows) <= limit:
+        return page, None
+    return page, encode_cursor(page[-1].timestamp, page[-1].id)
@@ -1,9 +1,14 @@
 from typing import List
+from sqlalchemy import insert
+from models.base_model import to_money
+from models.constants import TransactionType
 from models.movie import Movie
 from models.prediction import Prediction
+from models.prediction_movie_link import PredictionMovieLink
 from models.user import User
 from sqlmodel import Session, select
 from services.crud import user as UserService
+from services.crud.wallet import apply_transaction
 from loguru import logger
 from pgvector.sqlalchemy import Vector
 
@@ -17,10 +22,14 @@ def create_prediction(
     session: Session
 ) -> Prediction:
     """
-    Создание экземпляра предсказания модели.
+    Списание стоимости и сохранение предсказания одной транзакцией БД.
+    
+    Как services.crud.aio.prediction.create_prediction: вызывается после
+    получения рекомендаций, связи с фильмами вставляются одним INSERT по ID,
+    объекты после commit не перечитываются.
     
     Args:
-        user: экземпляр пользователя
+        user: экземпляр пользователя с кошельком
         input_text: входящий запрос
         embedding: эмбеддинг входящего запроса
         cost: стоимость предсказания
@@ -29,19 +38,30 @@ def create_prediction(
     
     Returns:
         Prediction: новое предсказание
+
+    Raises:
+        ValueError: Недостаточно средств
     """
-    prediction = Prediction(
-        user_id=user.id,
-        input_text=input_text,
-        embedding=embedding,
-        cost=cost,
-        user=user,
-        movies=movies
-    )
-    
-    session.add(prediction)
-    session.commit()
-    session.refresh(prediction)
+    try:
+        apply_transaction(user.wallet.id, user.id, -cost, TransactionType.PREDICTION, session)
+
+        prediction = Prediction(
+            user_id=user.id,
+            input_text=input_text,
+            embedding=embedding,
+            cost=to_money(cost)
+        )
+        session.add(prediction)
+        session.flush()
+        if movies:
+            session.exec(insert(PredictionMovieLink).values([
+                {"prediction_id": prediction.id, "movie_id": movie.id} for movie in movies
+            ]))
+        session.commit()
+
+    except Exception:
+        session.rollback()
+        raise
 
     return prediction
 
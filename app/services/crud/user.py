@@ -1,6 +1,5 @@
 from models.user import User
 from sqlmodel import Session, select
-from sqlalchemy.orm import selectinload
 from typing import List, Optional
 import bcrypt
 from sqlalchemy import delete
@@ -8,6 +7,7 @@ from models.wallet import Wallet
 from services.crud.wallet import make_transaction
 from models.constants import TransactionCost, TransactionType
 from loguru import logger
+from auth.credential_cache import get_credential_cache
 
 
 def create_user(
@@ -142,9 +142,7 @@ def get_user_by_email(email: str, session: Session) -> Optional[User]:
         Optional[User]: Найденный пользователь или None
     """
     try:
-        statement = select(User).where(User.email == email).options(
-            selectinload(User.predictions)
-        )
+        statement = select(User).where(User.email == email)
         user = session.exec(statement).first()
         return user
     except Exception as e:
@@ -167,6 +165,7 @@ def delete_user(user_id: int, session: Session) -> bool:
         if user:
             session.delete(user)
             session.commit()
+            get_credential_cache().invalidate(user.email)
             logger.info(f"Пользователь {user.email} удален")
             return True
         logger.warning(f"Пользователь с ID {user_id} не найден")
@@ -191,6 +190,7 @@ def delete_all_users(session: Session) -> bool:
         delete_statement = delete(User)
         session.exec(delete_statement)
         session.commit()
+        get_credential_cache().clear()
         logger.info("Все пользователи удалены")
         return True
     except Exception as e:
@@ -1,12 +1,58 @@
+from sqlalchemy import update
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlmodel import Session, select
 from typing import List, Optional
 from loguru import logger
+from models.base_model import to_money
 from models.transaction import Transaction
 from models.wallet import Wallet
 from models.constants import TransactionType
 from services.crud import user as UserService
 
 
+def apply_transaction(
+    wallet_id: int,
+    user_id: int,
+    amount: float,
+    type: TransactionType,
+    session: Session
+) -> float:
+    """
+    Изменяет баланс и записывает транзакцию в текущей транзакции БД, без commit.
+
+    Проверка средств и изменение баланса выполняются одним условным
+    UPDATE ... RETURNING, как в services.crud.aio.wallet.apply_transaction.
+
+    Args:
+        wallet_id: ID кошелька
+        user_id: ID владельца кошелька
+        amount: сумма транзакции (списание - отрицательное значение / пополнение - положительное)
+        type: тип транзакции
+        session: экземпляр сессии БД
+
+    Returns:
+        float: Новый баланс
+
+    Raises:
+        ValueError: Недостаточно средств
+    """
+    money = to_money(amount)
+    statement = (
+        update(Wallet)
+        .where(Wallet.id == wallet_id, Wallet.balance + money >= 0)
+        .values(balance=Wallet.balance + money)
+        .returning(Wallet.balance)
+        .execution_options(synchronize_session=False)
+    )
+    balance = session.exec(statement).scalar_one_or_none()
+    if balance is None:
+        current = session.exec(select(Wallet.balance).where(Wallet.id == wallet_id)).one_or_none()
+        raise ValueError(f"Недостаточно средств. Баланс: {current}, требуется: {abs(money)}")
+
+    session.add(Transaction(user_id=user_id, wallet_id=wallet_id, amount=money, type=type))
+    return balance
+
+
 def make_transaction(
     wallet: Wallet, 
     amount: float,
@@ -20,38 +66,27 @@ def make_transaction(
         wallet: кошелек пользователя
         amount: сумма транзакции (списание - отрицательное значение / пополнение - положительное)
         type: тип транзакции
-        description: описание транзакции в свободной форме
         session: экземпляр сессии БД
     
     Returns:
-        Wallet: кошелек с добавленной транзакцией
+        Wallet: кошелек с обновленным балансом
+
+    Raises:
+        ValueError: Недостаточно средств или ошибка базы
     """
-    # Проверяем, достаточно ли средств для списания
-    if amount < 0 and wallet.balance + amount < 0:
-        raise ValueError(f"Недостаточно средств. Баланс: {wallet.balance}, требуется: {abs(amount)}")
-    
     try:
-        transaction = Transaction(
-            user_id=wallet.user_id,
-            wallet_id=wallet.id,
-            amount=amount,
-            type=type,
-            wallet=wallet,
-            user=wallet.user
-        )
-        
-        wallet.transactions.append(transaction)
-        wallet.balance += amount
-
-        session.add(wallet)
-        session.add(transaction)
+        balance = apply_transaction(wallet.id, wallet.user_id, amount, type, session)
         session.commit()
-        session.refresh(transaction)
-        session.refresh(wallet)
+        # Загруженное значение, а не изменение: следующий flush не перезапишет баланс
+        set_committed_value(wallet, "balance", balance)
 
         logger.info(f"Транзакция выполнена: {amount} для кошелька {wallet.id}. Новый баланс: {wallet.balance}")
         return wallet
-    
+
+    except ValueError:
+        session.rollback()
+        raise
+
     except Exception as e:
         session.rollback()
         logger.error(f"Ошибка при выполнении транзакции: {e}")
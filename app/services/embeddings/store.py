@@ -0,0 +1,212 @@
+import fcntl
+import hashlib
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from loguru import logger
+
+from database.config import get_settings
+
+
+DIGEST_SIZE = 32  # sha256
+
+
+class EmbeddingStore:
+    """
+    Контентно-адресуемое хранилище эмбеддингов на диске.
+
+    Ключ записи - пара (имя модели, sha256(текст)). Для каждой модели хранятся
+    два append-only файла:
+        <model>.f32 - матрица float32 размером (N, dim), читается через memmap
+        <model>.idx - N подряд идущих sha256-дайджестов, номер дайджеста = номер строки
+
+    Сначала дописывается матрица, затем индекс, поэтому индекс никогда не ссылается
+    на строку, которой нет в матрице. Запись защищена flock, так что bootstrap и
+    CLI могут пополнять хранилище одновременно.
+
+    Attributes:
+        model_name (str): Имя модели, для которой хранятся эмбеддинги
+        dim (int): Размерность эмбеддинга
+    """
+
+    def __init__(self, root: Path, model_name: str, dim: int = 384) -> None:
+        self.model_name = model_name
+        self.dim = dim
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+        safe_name = re.sub(r'[^A-Za-z0-9_.-]+', '_', model_name)
+        self.matrix_path = self.root / f"{safe_name}.f32"
+        self.index_path = self.root / f"{safe_name}.idx"
+
+        self._rows: Dict[bytes, int] = {}
+        self._matrix: Optional[np.memmap] = None
+        self._load_index()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @staticmethod
+    def digest(text: str) -> bytes:
+        """Возвращает sha256 текста - адрес эмбеддинга в хранилище"""
+        return hashlib.sha256(text.encode("utf-8")).digest()
+
+    def _load_index(self) -> None:
+        """Читает индексный файл и сопоставляет дайджесты номерам строк матрицы"""
+        if not self.index_path.exists():
+            self._rows = {}
+            self._matrix = None
+            return
+
+        raw = self.index_path.read_bytes()
+        row_size = self.dim * 4
+        matrix_rows = self.matrix_path.stat().st_size // row_size if self.matrix_path.exists() else 0
+        index_rows = min(len(raw) // DIGEST_SIZE, matrix_rows)
+
+        self._rows = {
+            raw[i * DIGEST_SIZE:(i + 1) * DIGEST_SIZE]: i
+            for i in range(index_rows)
+        }
+        self._matrix = None
+
+    def _get_matrix(self) -> Optional[np.memmap]:
+        """Открывает (или переоткрывает после дозаписи) memmap матрицы"""
+        rows = len(self._rows)
+        if rows == 0:
+            return None
+        if self._matrix is None or self._matrix.shape[0] < rows:
+            self._matrix = np.memmap(self.matrix_path, dtype='<f4', mode='r', shape=(rows, self.dim))
+        return self._matrix
+
+    def lookup(self, texts: Sequence[str]) -> Tuple[np.ndarray, List[int]]:
+        """
+        Ищет эмбеддинги текстов в хранилище.
+
+        Args:
+            texts: тексты для поиска
+
+        Returns:
+            Tuple[np.ndarray, List[int]]: (матрица (len(texts), dim), позиции текстов без эмбеддинга)
+        """
+        result = np.zeros((len(texts), self.dim), dtype=np.float32)
+        positions, rows, missing = [], [], []
+        for i, text in enumerate(texts):
+            row = self._rows.get(self.digest(text))
+            if row is None:
+                missing.append(i)
+            else:
+                positions.append(i)
+                rows.append(row)
+
+        if rows:
+            # Читаем строки в порядке их расположения на диске
+            rows_arr = np.asarray(rows)
+            order = np.argsort(rows_arr, kind='stable')
+            matrix = self._get_matrix()
+            result[np.asarray(positions)[order]] = matrix[rows_arr[order]]
+
+        return result, missing
+
+    def put(self, texts: Sequence[str], embeddings: np.ndarray) -> int:
+        """
+        Дописывает новые эмбеддинги в хранилище.
+
+        Args:
+            texts: тексты, для которых посчитаны эмбеддинги
+            embeddings: матрица эмбеддингов (len(texts), dim)
+
+        Returns:
+            int: Количество реально добавленных записей
+        """
+        embeddings = np.asarray(embeddings, dtype='<f4')
+        if embeddings.ndim != 2 or embeddings.shape[1] != self.dim:
+            raise ValueError(
+                f"Ожидалась размерность эмбеддинга {self.dim}, получено {embeddings.shape}"
+            )
+
+        with open(self.index_path, 'ab') as index_file:
+            fcntl.flock(index_file, fcntl.LOCK_EX)
+            try:
+                # Другой процесс мог дописать хранилище, пока мы считали эмбеддинги
+                self._load_index()
+
+                new_digests, new_rows = [], []
+                for i, text in enumerate(texts):
+                    digest = self.digest(text)
+                    if digest in self._rows or digest in new_digests:
+                        continue
+                    new_digests.append(digest)
+                    new_rows.append(i)
+
+                if not new_digests:
+                    return 0
+
+                start = len(self._rows)
+                with open(self.matrix_path, 'r+b' if self.matrix_path.exists() else 'wb') as matrix_file:
+                    # Отбрасываем хвост незавершенной записи, если он есть
+                    matrix_file.truncate(start * self.dim * 4)
+                    matrix_file.seek(0, 2)
+                    matrix_file.write(np.ascontiguousarray(embeddings[new_rows]).tobytes())
+                    matrix_file.flush()
+
+                index_file.truncate(start * DIGEST_SIZE)
+                index_file.write(b''.join(new_digests))
+                index_file.flush()
+
+                for offset, digest in enumerate(new_digests):
+                    self._rows[digest] = start + offset
+                self._matrix = None
+                return len(new_digests)
+            finally:
+                fcntl.flock(index_file, fcntl.LOCK_UN)
+
+    def encode(self, model, texts: Sequence[str], batch_size: int = 64) -> np.ndarray:
+        """
+        Возвращает эмбеддинги текстов, вызывая модель только для отсутствующих в хранилище.
+
+        Args:
+            model: модель с методом encode (SentenceTransformer)
+            texts: тексты для кодирования
+            batch_size: размер батча для модели
+
+        Returns:
+            np.ndarray: Матрица эмбеддингов (len(texts), dim) в порядке texts
+        """
+        result, missing = self.lookup(texts)
+        if missing:
+            # Одинаковые тексты кодируем один раз
+            unique_texts = list(dict.fromkeys(texts[i] for i in missing))
+            encoded = np.asarray(model.encode(unique_texts, batch_size=batch_size), dtype=np.float32)
+            self.put(unique_texts, encoded)
+
+            by_text = {text: encoded[i] for i, text in enumerate(unique_texts)}
+            for i in missing:
+                result[i] = by_text[texts[i]]
+
+        logger.info(
+            f"Хранилище эмбеддингов {self.model_name}: найдено {len(texts) - len(missing)}, "
+            f"посчитано {len(missing)} из {len(texts)}"
+        )
+        return result
+
+
+def get_embedding_store(model_name: str, dim: int = 384) -> EmbeddingStore:
+    """
+    Создает хранилище эмбеддингов для модели в директории из настроек.
+
+    По умолчанию используется app/data/embedding_store, которая переживает
+    пересоздание базы данных.
+
+    Args:
+        model_name: имя модели
+        dim: размерность эмбеддинга
+
+    Returns:
+        EmbeddingStore: хранилище эмбеддингов
+    """
+    root = get_settings().EMBEDDING_STORE_DIR
+    if not root:
+        root = Path(__file__).resolve().parents[2] / 'data' / 'embedding_store'
+    return EmbeddingStore(Path(root), model_name, dim)
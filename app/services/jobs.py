@@ -0,0 +1,89 @@
+"""
+Фоновые задачи рекомендаций.
+
+POST /api/events/prediction/jobs проверяет баланс, создает задачу и сразу
+отвечает ее id; RPC к ML сервису, поиск, списание и сохранение предсказания
+выполняются в задаче asyncio. Результат забирается опросом или через
+Server-Sent Events.
+
+Состояние задач хранится в таблице predictionjob (services.crud.aio.job),
+поэтому опрос и поток событий работают на любом воркере, а не только на
+том, который выполняет задачу. Поток событий перечитывает строку задачи
+каждые JOB_POLL_SECONDS короткой сессией и не держит соединение из пула
+между проверками. Число выполняющихся задач ограничено контролем допуска
+(ML_MAX_IN_FLIGHT) и лимитом на пользователя (JOB_MAX_PENDING_PER_USER, 429
+сверх него). Истекшие задачи удаляются при создании новых и при запуске
+воркера: завершенные через JOB_TTL_SECONDS, а pending спустя столько же
+после создания.
+"""
+import asyncio
+from typing import TYPE_CHECKING, AsyncIterator, Awaitable, Callable, Coroutine, Optional, Set
+from database.config import get_settings
+from models.constants import JobStatus
+
+if TYPE_CHECKING:
+    from models.prediction_job import PredictionJob
+
+DEFAULT_JOB_TTL_SECONDS = 300
+DEFAULT_MAX_PENDING_JOBS = 3
+# Поток событий узнает о завершении задачи на другом воркере с задержкой не больше интервала опроса
+JOB_POLL_SECONDS = 0.5
+# Комментарий SSE раз в 15 секунд не дает прокси закрыть ожидающее соединение
+SSE_HEARTBEAT_SECONDS = 15
+
+# Ссылки на выполняющиеся задачи: event loop хранит только слабые ссылки
+_tasks: Set[asyncio.Task] = set()
+
+
+def spawn(work: Coroutine) -> asyncio.Task:
+    """Запускает выполнение задачи; ссылка хранится до завершения"""
+    task = asyncio.create_task(work)
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return task
+
+
+def job_ttl_seconds() -> float:
+    """Время хранения задачи после завершения по настройкам приложения"""
+    return get_settings().JOB_TTL_SECONDS or DEFAULT_JOB_TTL_SECONDS
+
+
+def max_pending_jobs() -> int:
+    """Лимит выполняющихся задач одного пользователя по настройкам приложения"""
+    return get_settings().JOB_MAX_PENDING_PER_USER or DEFAULT_MAX_PENDING_JOBS
+
+
+async def job_events(
+    load: Callable[[], Awaitable[Optional["PredictionJob"]]],
+    poll_seconds: float = JOB_POLL_SECONDS,
+    heartbeat_seconds: float = SSE_HEARTBEAT_SECONDS
+) -> AsyncIterator[bytes]:
+    """
+    Поток Server-Sent Events задачи.
+
+    Пока задача выполняется, отправляются комментарии-heartbeat; затем одно
+    событие done или failed с задачей в data, после чего поток закрывается.
+    Если задача истекла, поток закрывается без события.
+
+    Args:
+        load: читает текущее состояние задачи или None
+        poll_seconds: интервал чтения задачи
+        heartbeat_seconds: интервал heartbeat
+
+    Yields:
+        bytes: Фрагменты потока text/event-stream
+    """
+    loop = asyncio.get_running_loop()
+    last_sent = loop.time()
+    while True:
+        job = await load()
+        if job is None:
+            return
+        if job.status != JobStatus.PENDING:
+            data = job.to_out().model_dump_json()
+            yield f"event: {JobStatus(job.status).value}\ndata: {data}\n\n".encode()
+            return
+        if loop.time() - last_sent >= heartbeat_seconds:
+            yield b": keep-alive\n\n"
+            last_sent = loop.time()
+        await asyncio.sleep(poll_seconds)
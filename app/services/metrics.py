@@ -0,0 +1,205 @@
+"""
+Метрики задержек в формате Prometheus и фазы запроса для Server-Timing.
+
+Фазы (проверка токена, запросы CRUD сервисов, RPC к ML сервису) замеряются
+через phase() или декоратор timed(). Длительность попадает в гистограмму
+request_phase_duration_seconds и, если фаза выполнялась внутри HTTP запроса,
+в заголовок Server-Timing его ответа.
+
+SQL запросы учитываются хуками engine (database/database.py): каждый
+запрос - фаза "db" и запись в список запросов текущего HTTP запроса.
+
+При нескольких воркерах uvicorn метрики процессов объединяются через
+каталог PROMETHEUS_MULTIPROC_DIR (его задает serve.py).
+"""
+import functools
+import inspect
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, List, Optional, Tuple
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route", "status"],
+)
+PHASE_LATENCY = Histogram(
+    "request_phase_duration_seconds",
+    "Latency of request phases: auth, CRUD services, ML RPC",
+    ["phase"],
+)
+SQL_QUERIES = Histogram(
+    "http_request_sql_queries",
+    "SQL statements executed per HTTP request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, float("inf")),
+)
+ADMISSION_REJECTIONS = Counter(
+    "admission_rejections_total",
+    "Recommendation requests rejected by admission control",
+    ["reason"],
+)
+COALESCED_REQUESTS = Counter(
+    "coalesced_requests_total",
+    "Requests that joined an identical in-flight computation instead of running their own",
+    ["flight"],
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache lookups by cache and result",
+    ["cache", "result"],
+)
+
+# Фазы текущего HTTP запроса: (имя, секунды); None вне запроса
+_request_phases: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_phases", default=None)
+# SQL запросы текущего HTTP запроса: (текст запроса, секунды)
+_request_queries: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_queries", default=None)
+
+
+def start_request() -> List[Tuple[str, float]]:
+    """
+    Начинает сбор фаз для текущего запроса.
+
+    Список общий для задач и потоков run_in_threadpool запроса, так как
+    контекст копируется со ссылкой на него.
+
+    Returns:
+        List[Tuple[str, float]]: Список, в который будут записаны фазы
+    """
+    phases: List[Tuple[str, float]] = []
+    _request_phases.set(phases)
+    _request_queries.set([])
+    return phases
+
+
+def request_queries() -> List[Tuple[str, float]]:
+    """SQL запросы текущего HTTP запроса: (текст запроса, секунды)"""
+    return _request_queries.get() or []
+
+
+def record_phase(name: str, seconds: float) -> None:
+    """
+    Записывает длительность фазы в гистограмму и в фазы текущего запроса.
+
+    Args:
+        name: имя фазы
+        seconds: длительность
+    """
+    PHASE_LATENCY.labels(name).observe(seconds)
+    phases = _request_phases.get()
+    if phases is not None:
+        phases.append((name, seconds))
+
+
+@contextmanager
+def phase(name: str):
+    """
+    Замеряет блок кода как фазу запроса.
+
+    Пример:
+        with phase("ml_rpc"):
+            response = await run_in_threadpool(request_embedding, message)
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(name, time.perf_counter() - start)
+
+
+def timed(name: str) -> Callable:
+    """
+    Декоратор: замеряет вызов синхронной или асинхронной функции как фазу.
+
+    Args:
+        name: имя фазы
+
+    Returns:
+        Callable: Декоратор
+    """
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with phase(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def record_query(statement: str, seconds: float) -> None:
+    """
+    Учитывает выполненный SQL запрос как фазу "db" текущего запроса.
+
+    Args:
+        statement: текст запроса без значений параметров
+        seconds: длительность
+    """
+    record_phase("db", seconds)
+    queries = _request_queries.get()
+    if queries is not None:
+        queries.append((statement, seconds))
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """
+    Учитывает обращение к кэшу.
+
+    Args:
+        cache: имя кэша (basic_auth, etag)
+        hit: попадание или промах
+    """
+    CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+def server_timing(phases: List[Tuple[str, float]], total: float) -> str:
+    """
+    Формирует значение заголовка Server-Timing.
+
+    Повторяющиеся фазы (несколько запросов одного сервиса) суммируются.
+
+    Args:
+        phases: фазы запроса
+        total: полная длительность запроса в секундах
+
+    Returns:
+        str: Например "auth.token;dur=0.4, ml_rpc;dur=120.3, total;dur=131.0"
+    """
+    durations = {}
+    for name, seconds in phases:
+        durations[name] = durations.get(name, 0.0) + seconds
+    durations["total"] = total
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in durations.items())
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    Метрики в текстовом формате Prometheus.
+
+    Returns:
+        Tuple[bytes, str]: (тело ответа, Content-Type)
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
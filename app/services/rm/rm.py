@@ -1,24 +1,61 @@
 import uuid
+import time
 import pika
 import json
+from typing import Optional
+from opentelemetry import propagate
+from opentelemetry.trace import SpanKind
+from services.tracing import tracer
+
+
+ML_TASK_QUEUE = 'ml_task_queue'
+
+
+def connection_parameters(settings) -> pika.ConnectionParameters:
+    """Параметры подключения к RabbitMQ из настроек приложения"""
+    return pika.ConnectionParameters(
+        host=settings.RABBITMQ_HOST,
+        port=settings.RABBITMQ_PORT,
+        virtual_host='/',
+        credentials=pika.PlainCredentials(
+            username=settings.RABBITMQ_USER,
+            password=settings.RABBITMQ_PASSWORD
+        ),
+        heartbeat=30,
+        blocked_connection_timeout=2
+    )
+
+
+def get_queue_depth(settings) -> int:
+    """
+    Число сообщений, ожидающих ml_worker в очереди задач.
+
+    Пассивное объявление не создает очередь: если ml_worker ни разу не
+    запускался, брокер закрывает канал с ошибкой 404.
+
+    Raises:
+        pika.exceptions.AMQPError: Брокер недоступен или очереди нет
+    """
+    connection = pika.BlockingConnection(connection_parameters(settings))
+    try:
+        result = connection.channel().queue_declare(queue=ML_TASK_QUEUE, passive=True)
+        return result.method.message_count
+    finally:
+        connection.close()
 
 
 class MLServiceRpcClient(object):
-    """RPC клиент для взаимодействия с ML сервисом через RabbitMQ"""
+    """
+    RPC клиент для взаимодействия с ML сервисом через RabbitMQ.
+
+    Каждый клиент открывает свое соединение и эксклюзивную очередь ответов,
+    поэтому используется как контекстный менеджер: соединение закрывается и
+    при ошибке или таймауте, а брокер удаляет очередь вместе с поздним ответом.
+    """
     
     def __init__(self, settings) -> None:
         """Инициализирует RPC клиент с настройками RabbitMQ"""
-        self.connection_params = pika.ConnectionParameters(
-            host=settings.RABBITMQ_HOST,
-            port=settings.RABBITMQ_PORT,
-            virtual_host='/',
-            credentials=pika.PlainCredentials(
-                username=settings.RABBITMQ_USER,
-                password=settings.RABBITMQ_PASSWORD
-            ),
-            heartbeat=30,
-            blocked_connection_timeout=2
-        )
+        self.connection_params = connection_parameters(settings)
         self.connection = pika.BlockingConnection(self.connection_params)
         self.channel = self.connection.channel()
         # Declare a private exclusive callback queue for RPC replies
@@ -30,6 +67,18 @@ class MLServiceRpcClient(object):
             on_message_callback=self.on_response,
             auto_ack=True
         )
+
+    def __enter__(self) -> "MLServiceRpcClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Закрывает соединение с брокером вместе с очередью ответов"""
+        if self.connection.is_open:
+            self.connection.close()
+
     def on_response(self, ch, method, props, body):
         """Обрабатывает ответ от ML сервиса"""
         if self.corr_id == props.correlation_id:
@@ -38,19 +87,41 @@ class MLServiceRpcClient(object):
             except Exception:
                 self.response = None
 
-    def call(self, message: str) -> dict:
-        """Выполняет RPC вызов к ML сервису"""
+    def call(self, message: str, timeout: Optional[float] = None) -> dict:
+        """
+        Выполняет RPC вызов к ML сервису.
+
+        Контекст трассы (traceparent) и время отправки передаются в заголовках
+        сообщения: ml_worker продолжает трассу и считает время ожидания в очереди.
+
+        Args:
+            message: текст запроса
+            timeout: максимальное ожидание ответа в секундах; None - без ограничения
+
+        Raises:
+            TimeoutError: Ответ не получен за timeout секунд
+        """
         self.response = None
         self.corr_id = str(uuid.uuid4())
-        self.channel.basic_publish(
-            exchange='',
-            routing_key='ml_task_queue',
-            properties=pika.BasicProperties(
-                reply_to=self.callback_queue,
-                correlation_id=self.corr_id,
-            ),
-            body=json.dumps({"text": message})
-        )
-        while self.response is None:
-            self.connection.process_data_events(time_limit=1)
+        with tracer.start_as_current_span("ml_task_queue send", kind=SpanKind.CLIENT) as span:
+            span.set_attribute("messaging.system", "rabbitmq")
+            span.set_attribute("messaging.destination.name", ML_TASK_QUEUE)
+            span.set_attribute("messaging.message.conversation_id", self.corr_id)
+            headers = {"sent_at_ns": time.time_ns()}
+            propagate.inject(headers)
+            self.channel.basic_publish(
+                exchange='',
+                routing_key=ML_TASK_QUEUE,
+                properties=pika.BasicProperties(
+                    reply_to=self.callback_queue,
+                    correlation_id=self.corr_id,
+                    headers=headers,
+                ),
+                body=json.dumps({"text": message})
+            )
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while self.response is None:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise TimeoutError(f"ML service did not respond in {timeout} seconds")
+                self.connection.process_data_events(time_limit=1)
         return self.response
\ No newline at end of file
@@ -0,0 +1,161 @@
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Tuple
+
+
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def normalize_title(title: str) -> str:
+    """
+    Нормализует название для поиска по префиксу.
+
+    Приводит к нижнему регистру, убирает диакритику и пунктуацию, заменяет
+    "ё" на "е" и схлопывает пробелы: "Amélie (Le Fabuleux...)" -> "amelie le fabuleux".
+
+    Args:
+        title: исходное название
+
+    Returns:
+        str: Нормализованное название
+    """
+    text = unicodedata.normalize("NFKD", title.casefold().replace("ё", "е"))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _NON_WORD.sub(" ", text).strip()
+
+
+class TitlePrefixIndex:
+    """
+    Индекс названий фильмов в памяти для автодополнения.
+
+    Хранит отсортированный список ключей (суффикс названия с начала слова,
+    номер слова, id фильма). Поиск по префиксу - двоичный поиск первого ключа и
+    просмотр соседних, поэтому совпадает и начало названия, и начало любого
+    слова в нем ("matrix" находит "The Matrix").
+
+    Все операции защищены блокировкой: индекс читается из обработчиков API и
+    бота и обновляется при добавлении и удалении фильмов. Изменения из других
+    процессов (воркеры API, бот, CLI) подхватываются периодическим
+    перестроением при смене версии каталога.
+
+    Args:
+        scan_factor: сколько ключей просматривается на один результат перед ранжированием
+    """
+
+    def __init__(self, scan_factor: int = 20) -> None:
+        self.scan_factor = scan_factor
+        self._entries: List[Tuple[str, int, int]] = []
+        self._titles: Dict[int, Tuple[str, int]] = {}
+        self._lock = threading.Lock()
+        self.loaded = False
+        # Версия каталога, по которой построен индекс (см. services.crud.movie.refresh_title_index)
+        self.version = None
+
+    def __len__(self) -> int:
+        return len(self._titles)
+
+    def __contains__(self, movie_id: int) -> bool:
+        return movie_id in self._titles
+
+    @staticmethod
+    def _keys(movie_id: int, title: str) -> List[Tuple[str, int, int]]:
+        """Ключи фильма: по одному на каждое слово нормализованного названия"""
+        words = normalize_title(title).split()
+        return [(" ".join(words[i:]), i, movie_id) for i in range(len(words))]
+
+    def build(self, movies: Iterable[Tuple[int, str, int]]) -> None:
+        """
+        Полностью перестраивает индекс.
+
+        Args:
+            movies: кортежи (id, название, год)
+        """
+        titles = {}
+        entries = []
+        for movie_id, title, year in movies:
+            titles[movie_id] = (title, year)
+            entries.extend(self._keys(movie_id, title))
+        entries.sort()
+        with self._lock:
+            self._entries = entries
+            self._titles = titles
+            self.loaded = True
+
+    def add(self, movie_id: int, title: str, year: int) -> None:
+        """
+        Добавляет фильм в индекс или обновляет его название.
+
+        Args:
+            movie_id: ID фильма
+            title: название
+            year: год выхода
+        """
+        with self._lock:
+            self._remove_locked(movie_id)
+            self._titles[movie_id] = (title, year)
+            for key in self._keys(movie_id, title):
+                insort(self._entries, key)
+
+    def remove(self, movie_id: int) -> bool:
+        """
+        Удаляет фильм из индекса.
+
+        Args:
+            movie_id: ID фильма
+
+        Returns:
+            bool: True если фильм был в индексе
+        """
+        with self._lock:
+            return self._remove_locked(movie_id)
+
+    def _remove_locked(self, movie_id: int) -> bool:
+        """Удаляет ключи фильма; вызывается под блокировкой"""
+        stored = self._titles.pop(movie_id, None)
+        if stored is None:
+            return False
+        for key in self._keys(movie_id, stored[0]):
+            position = bisect_left(self._entries, key)
+            if position < len(self._entries) and self._entries[position] == key:
+                del self._entries[position]
+        return True
+
+    def lookup(self, prefix: str, limit: int = 10) -> List[Dict]:
+        """
+        Ищет фильмы, у которых название или одно из слов начинается с префикса.
+
+        Совпадения с начала названия идут первыми, затем более короткие названия.
+
+        Args:
+            prefix: введенный текст
+            limit: максимальное количество результатов
+
+        Returns:
+            List[Dict]: Словари с полями id, title, year
+        """
+        prefix = normalize_title(prefix)
+        if not prefix or limit <= 0:
+            return []
+
+        with self._lock:
+            position = bisect_left(self._entries, (prefix,))
+            end = min(position + limit * self.scan_factor, len(self._entries))
+            best: Dict[int, Tuple[int, int, str]] = {}
+            for key, word, movie_id in self._entries[position:end]:
+                if not key.startswith(prefix):
+                    break
+                title, _ = self._titles[movie_id]
+                rank = (word, len(title), title)
+                if movie_id not in best or rank < best[movie_id]:
+                    best[movie_id] = rank
+            ranked = sorted(best.items(), key=lambda item: item[1])[:limit]
+            return [
+                {"id": movie_id, "title": self._titles[movie_id][0], "year": self._titles[movie_id][1]}
+                for movie_id, _ in ranked
+            ]
+
+
+# Индекс процесса: строится при старте API и бота, обновляется сервисом фильмов и периодической проверкой каталога
+title_index = TitlePrefixIndex()
@@ -0,0 +1,123 @@
+"""
+Объединение одинаковых одновременных вычислений (single flight).
+
+Первый вызов с ключом выполняет вычисление, вызовы с тем же ключом, пришедшие
+до его завершения, получают тот же результат или ту же ошибку. Результат не
+кэшируется: после завершения следующий вызов вычисляет заново.
+
+Используется для рекомендаций: одинаковые запросы разных пользователей
+(или повторы клиента) делят один RPC к ML сервису и один векторный поиск,
+а списание и запись Prediction выполняются для каждого пользователя.
+"""
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+from services.metrics import COALESCED_REQUESTS
+
+T = TypeVar("T")
+
+
+def normalize_message(message: str) -> str:
+    """Ключ текста запроса: без различий в регистре и пробелах"""
+    return " ".join(message.split()).casefold()
+
+
+class SingleFlight:
+    """
+    Объединение вызовов в event loop процесса.
+
+    Вычисление выполняется в отдельной задаче: отмена одного из ожидающих
+    (клиент закрыл соединение) не прерывает его для остальных.
+
+    Args:
+        name: имя для метрики coalesced_requests_total
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, work: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """
+        Выполняет work или присоединяется к уже выполняющемуся вызову с тем же ключом.
+
+        Args:
+            key: ключ вычисления
+            work: функция, возвращающая корутину вычисления
+
+        Returns:
+            Tuple[T, bool]: Результат и признак того, что вызов был присоединен
+        """
+        task = self._calls.get(key)
+        if task is not None:
+            COALESCED_REQUESTS.labels(self.name).inc()
+            return await asyncio.shield(task), True
+
+        task = asyncio.ensure_future(work())
+        self._calls[key] = task
+        task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task), False
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Ошибка уже передана ожидающим; не даем asyncio сообщить о ней повторно
+            task.exception()
+
+
+class _Call:
+    """Вычисление, выполняющееся в одном из потоков"""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+
+
+class ThreadSingleFlight:
+    """
+    Объединение вызовов из разных потоков (обработчики Telegram бота).
+
+    Args:
+        name: имя для метрики coalesced_requests_total
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, work: Callable[[], T]) -> Tuple[T, bool]:
+        """
+        Выполняет work или ждет уже выполняющийся вызов с тем же ключом.
+
+        Args:
+            key: ключ вычисления
+            work: функция вычисления
+
+        Returns:
+            Tuple[T, bool]: Результат и признак того, что вызов был присоединен
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            COALESCED_REQUESTS.labels(self.name).inc()
+            call.done.wait()
+        else:
+            try:
+                call.result = work()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result, not leader
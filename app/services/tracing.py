@@ -0,0 +1,62 @@
+"""
+Трассировка запросов OpenTelemetry.
+
+Span HTTP запроса создает TracingMiddleware, RPC к ML сервису -
+MLServiceRpcClient, который передает контекст трассы (W3C traceparent) в
+заголовках AMQP сообщения; ml_worker продолжает ту же трассу.
+
+Экспорт включается настройками: OTEL_EXPORTER_OTLP_ENDPOINT - в OTLP/HTTP
+коллектор (например, локальный Jaeger или otel-collector), TRACE_EXPORT_FILE -
+в файл JSON lines. Без них спаны не записываются.
+"""
+import os
+from typing import Optional
+from opentelemetry import trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+from database.config import get_settings
+
+tracer = trace.get_tracer("movie-recommender")
+
+
+def file_span_exporter(path: str) -> ConsoleSpanExporter:
+    """
+    Экспорт спанов в файл, по одному JSON объекту на строку.
+
+    Args:
+        path: путь к файлу
+
+    Returns:
+        ConsoleSpanExporter: Экспортер, пишущий в файл
+    """
+    return ConsoleSpanExporter(
+        out=open(path, "a", buffering=1, encoding="utf-8"),
+        formatter=lambda span: span.to_json(indent=None) + os.linesep,
+    )
+
+
+def setup_tracing(service_name: str, export_file: Optional[str] = None) -> bool:
+    """
+    Настраивает экспорт спанов процесса.
+
+    Args:
+        service_name: имя сервиса в трассах
+        export_file: файл для спанов; по умолчанию TRACE_EXPORT_FILE
+
+    Returns:
+        bool: True если экспорт включен
+    """
+    export_file = export_file or get_settings().TRACE_EXPORT_FILE
+    endpoint = os.environ.get("OTEL_EXPORTER_OTLP_ENDPOINT")
+    if not export_file and not endpoint:
+        return False
+
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    if endpoint:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    if export_file:
+        provider.add_span_processor(BatchSpanProcessor(file_span_exporter(export_file)))
+    trace.set_tracer_provider(provider)
+    return True
@@ -1,29 +1,41 @@
 // Utility functions
-function setCreds(e, p) {
+// Храним только токен доступа из /api/users/signin, пароль в браузере не сохраняется
+function setCreds(e, token) {
   try {
     localStorage.setItem('email', e);
-    localStorage.setItem('password', p);
+    localStorage.setItem('token', token);
+    localStorage.removeItem('password');
   } catch (_) {}
 }
 
 function getCreds() {
   try {
     return {
-      email: localStorage.getItem('email') || document.getElementById('email').value,
-      password: localStorage.getItem('password') || document.getElementById('password').value
+      email: localStorage.getItem('email') || '',
+      token: localStorage.getItem('token') || ''
     };
   } catch (_) {
-    return {
-      email: document.getElementById('email').value,
-      password: document.getElementById('password').value
-    };
+    return {email: '', token: ''};
   }
 }
 
 function authHeader() {
   const c = getCreds();
-  if (!c.email || !c.password) return {};
-  return {'Authorization': 'Basic ' + btoa(c.email + ':' + c.password)};
+  if (!c.token) return {};
+  return {'Authorization': 'Bearer ' + c.token};
+}
+
+// Вход: пароль проверяется один раз, дальше запросы идут с токеном
+async function requestToken(e, p) {
+  const r = await fetch('/api/users/signin', {
+    method: 'POST',
+    headers: {'Content-Type': 'application/json'},
+    body: JSON.stringify({email: e, password: p})
+  });
+  if (!r.ok) return false;
+  const d = await r.json();
+  setCreds(e, d.access_token);
+  return true;
 }
 
 function setText(id, t) {
@@ -106,9 +118,9 @@ async function signup() {
     body: JSON.stringify({email: e, password: p})
   });
   
-  setCreds(e, p);
-  setText('auth_msg', r.ok ? 'Signed up' : 'Signup failed');
-  if (r.ok) {
+  const ok = r.ok && await requestToken(e, p);
+  setText('auth_msg', ok ? 'Signed up' : 'Signup failed');
+  if (ok) {
     showAuthStatus(e);
     getBalance();
   } else {
@@ -123,15 +135,9 @@ async function signin() {
         p = document.getElementById('password').value;
   if (!e || !p) return setText('auth_msg', 'Enter email & password');
   
-  const r = await fetch('/api/users/signin', {
-    method: 'POST',
-    headers: {'Content-Type': 'application/json'},
-    body: JSON.stringify({email: e, password: p})
-  });
-  
-  setCreds(e, p);
-  setText('auth_msg', r.ok ? 'Signed in' : 'Signin failed');
-  if (r.ok) {
+  const ok = await requestToken(e, p);
+  setText('auth_msg', ok ? 'Signed in' : 'Signin failed');
+  if (ok) {
     showAuthStatus(e);
     getBalance();
   } else {
@@ -145,6 +151,7 @@ async function signin() {
 async function getBalance() {
   setText('balance_error', '');
   const r = await fetch('/api/users/balance', {headers: authHeader()});
+  if (r.status === 401) return openAuthModal('Session expired. Please sign in again');
   if (!r.ok) return setText('balance_error', 'Unable to fetch balance');
   
   try {
@@ -192,6 +199,50 @@ function renderMovies(list) {
   `).join('');
 }
 
+// Prediction jobs
+// EventSource не передает заголовок Authorization, поэтому поток читается через fetch
+async function streamJob(id) {
+  const r = await fetch(`/api/events/prediction/jobs/${id}/events`, {headers: authHeader()});
+  if (!r.ok || !r.body) throw new Error(`stream failed: ${r.status}`);
+  
+  const reader = r.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  while (true) {
+    const {value, done} = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, {stream: true});
+    let end;
+    while ((end = buffer.indexOf('\n\n')) !== -1) {
+      const event = buffer.slice(0, end);
+      buffer = buffer.slice(end + 2);
+      const data = event.split('\n').filter(line => line.startsWith('data: ')).map(line => line.slice(6)).join('\n');
+      if (data) return JSON.parse(data);
+    }
+  }
+  throw new Error('stream closed before result');
+}
+
+async function pollJob(id, intervalMs = 1000, attempts = 120) {
+  for (let i = 0; i < attempts; i++) {
+    const r = await fetch(`/api/events/prediction/jobs/${id}`, {headers: authHeader()});
+    if (!r.ok) throw new Error(`job status failed: ${r.status}`);
+    const job = await r.json();
+    if (job.status !== 'pending') return job;
+    await new Promise(resolve => setTimeout(resolve, intervalMs));
+  }
+  throw new Error('Timed out waiting for recommendations');
+}
+
+async function waitForJob(id) {
+  try {
+    return await streamJob(id);
+  } catch (e) {
+    // Прокси без поддержки потоков: опрашиваем состояние задачи
+    return await pollJob(id);
+  }
+}
+
 // Prediction functions
 async function newPrediction() {
   setText('pred_error', '');
@@ -204,7 +255,8 @@ async function newPrediction() {
   document.getElementById('pred_error').className = 'info'; // Меняем класс на info для "Processing..."
   
   try {
-    const r = await fetch(`/api/events/prediction/new?message=${encodeURIComponent(msg)}&top=10`, {
+    // Задача создается сразу, рекомендации приходят событием, когда готовы
+    const r = await fetch(`/api/events/prediction/jobs?message=${encodeURIComponent(msg)}&top=10`, {
       method: 'POST',
       headers: authHeader()
     });
@@ -253,11 +305,26 @@ async function newPrediction() {
         return;
       }
       
+      if (r.status === 503) {
+        // Перегрузка: средства не списаны, можно повторить позже
+        document.getElementById('pred_error').className = 'error';
+        return setText('pred_error', 'Service is busy, please try again in a few seconds');
+      }
+      
       document.getElementById('pred_error').className = 'error';
       return setText('pred_error', `Error: ${err}`);
     }
     
-    const data = await r.json();
+    const job = await waitForJob((await r.json()).id);
+    if (job.status === 'failed') {
+      document.getElementById('pred_error').className = 'error';
+      if (job.error_status === 503 || job.error_status === 504) {
+        return setText('pred_error', 'Service is busy, please try again in a few seconds');
+      }
+      return setText('pred_error', `Error: ${job.error}`);
+    }
+    
+    const data = job.result;
     if (data.length === 0) {
       document.getElementById('pred_error').className = 'error';
       return setText('pred_error', 'No recommendations found');
@@ -282,6 +349,7 @@ async function newPrediction() {
 function logout() {
   try {
     localStorage.removeItem('email');
+    localStorage.removeItem('token');
     localStorage.removeItem('password');
   } catch (_) {}
   
@@ -343,18 +411,11 @@ function openAuthModal(message) {
       return;
     }
     
-    const r = await fetch('/api/users/signin', {
-      method: 'POST',
-      headers: {'Content-Type': 'application/json'},
-      body: JSON.stringify({email: e, password: p})
-    });
-    
-    if (!r.ok) {
+    if (!await requestToken(e, p)) {
       document.getElementById('m_msg').textContent = 'Signin failed';
       return;
     }
     
-    setCreds(e, p);
     showAuthStatus(e);
     getBalance();
     document.body.removeChild(modal);
@@ -365,18 +426,44 @@ function openAuthModal(message) {
   };
 }
 
+// Title autocomplete
+let suggestTimer = null;
+let suggestSeq = 0;
+
+function suggestTitles() {
+  clearTimeout(suggestTimer);
+  suggestTimer = setTimeout(async function() {
+    const q = document.getElementById('title_search').value.trim();
+    const list = document.getElementById('title_suggestions');
+    if (!q) {
+      list.innerHTML = '';
+      return;
+    }
+    // Ответы на устаревшие запросы игнорируются
+    const seq = ++suggestSeq;
+    try {
+      const r = await fetch(`/api/movies/autocomplete?q=${encodeURIComponent(q)}&limit=10`);
+      if (!r.ok || seq !== suggestSeq) return;
+      const items = await r.json();
+      list.innerHTML = '';
+      items.forEach(function(m) {
+        const option = document.createElement('option');
+        option.value = m.title;
+        option.label = String(m.year);
+        list.appendChild(option);
+      });
+    } catch (_) {}
+  }, 150);
+}
+
 // Initialize on page load
 function init() {
-  let e = '', p = '';
-  try {
-    e = localStorage.getItem('email') || '';
-    p = localStorage.getItem('password') || '';
-  } catch (_) {
-    e = '';
-    p = '';
-  }
+  var ts = document.getElementById('title_search');
+  if (ts) ts.addEventListener('input', suggestTitles);
+
+  const {email: e, token} = getCreds();
   
-  if (e && p) {
+  if (e && token) {
     showAuthStatus(e);
     getBalance();
     var bc = document.getElementById('balance_card');
@@ -395,6 +482,7 @@ function init() {
 window.setCreds = setCreds;
 window.getCreds = getCreds;
 window.authHeader = authHeader;
+window.requestToken = requestToken;
 window.setText = setText;
 window.setHTML = setHTML;
 window.showAuthStatus = showAuthStatus;
@@ -407,4 +495,5 @@ window.renderMovies = renderMovies;
 window.newPrediction = newPrediction;
 window.logout = logout;
 window.openAuthModal = openAuthModal;
+window.suggestTitles = suggestTitles;
 window.init = init;
@@ -2,11 +2,15 @@
 Конфигурация pytest для тестов
 """
 import pytest
+from types import SimpleNamespace
 from fastapi.testclient import TestClient
 from fastapi import FastAPI
-from sqlalchemy.orm import Session
-from sqlalchemy.pool import StaticPool
-from sqlmodel import SQLModel, create_engine
+from sqlalchemy import MetaData
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import Session, configure_mappers
+from sqlalchemy.pool import NullPool, StaticPool
+from sqlmodel import SQLModel, Session as AppSession, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 import json
 from datetime import datetime
 import bcrypt
@@ -43,6 +47,90 @@ def session_fixture():
         yield session
 
 
+# Таблицы моделей приложения, которые создаются в SQLite: movie использует ARRAY
+APP_TABLES = ("user", "wallet", "transaction", "prediction", "predictionmovielink", "predictionjob")
+
+
+@pytest.fixture(name="app_models", scope="session")
+def app_models_fixture():
+    """
+    Модели и CRUD сервисы приложения для тестов на SQLite.
+
+    Тестовые модели simple_factory уже объявили таблицы user, wallet и другие
+    в SQLModel.metadata, поэтому модели приложения импортируются в отдельную
+    MetaData.
+    """
+    saved = SQLModel.metadata
+    SQLModel.metadata = MetaData()
+    try:
+        # services.crud.user импортирует wallet, поэтому он первый, как в приложении
+        from services.crud import user, wallet, prediction, movie, movie_import
+        from services.crud.aio import job, wallet as aio_wallet, prediction as aio_prediction, movie as aio_movie
+        from models.movie import Movie
+        from models.prediction_job import PredictionJob
+        from models.prediction_movie_link import PredictionMovieLink
+        from models.prediction import Prediction
+        from models.transaction import Transaction
+        from models.user import User
+        from models.wallet import Wallet
+        configure_mappers()
+        return SimpleNamespace(
+            metadata=SQLModel.metadata,
+            User=User,
+            Wallet=Wallet,
+            Transaction=Transaction,
+            Prediction=Prediction,
+            Movie=Movie,
+            PredictionMovieLink=PredictionMovieLink,
+            PredictionJob=PredictionJob,
+            WalletService=wallet,
+            PredictionService=prediction,
+            MovieService=movie,
+            MovieImport=movie_import,
+            AsyncWalletService=aio_wallet,
+            AsyncPredictionService=aio_prediction,
+            AsyncMovieService=aio_movie,
+            JobService=job,
+        )
+    finally:
+        SQLModel.metadata = saved
+
+
+@pytest.fixture(name="app_engine")
+def app_engine_fixture(app_models):
+    """Таблицы моделей приложения в тестовой базе SQLite"""
+    engine = create_engine(
+        "sqlite:///testing.db",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    tables = [app_models.metadata.tables[name] for name in APP_TABLES]
+    app_models.metadata.drop_all(engine, tables=tables)
+    app_models.metadata.create_all(engine, tables=tables)
+    yield engine
+    app_models.metadata.drop_all(engine, tables=tables)
+    engine.dispose()
+
+
+@pytest.fixture(name="app_session")
+def app_session_fixture(app_engine):
+    """Сессия SQLModel, как у синхронных сервисов приложения"""
+    with AppSession(app_engine) as session:
+        yield session
+
+
+@pytest.fixture(name="new_app_async_session")
+def new_app_async_session_fixture(app_engine):
+    """
+    Фабрика асинхронных сессий на той же базе, как new_async_session приложения.
+
+    Соединения не переиспользуются: каждый тест запускает свой event loop.
+    """
+    pytest.importorskip("aiosqlite")
+    engine = create_async_engine("sqlite+aiosqlite:///testing.db", poolclass=NullPool)
+    return lambda: AsyncSession(engine, expire_on_commit=False)
+
+
 @pytest.fixture(name="client")
 def client_fixture():
     """Фикстура для создания тестового клиента"""
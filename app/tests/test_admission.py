@@ -0,0 +1,80 @@
+import asyncio
+import pytest
+from services.admission import AdmissionController, Overloaded
+
+
+def create_controller(depth=0, checked_out=0, **options):
+    """Создает контроллер с подставленными глубиной очереди и занятостью пула"""
+    calls = []
+
+    def probe():
+        calls.append(1)
+        if isinstance(depth, Exception):
+            raise depth
+        return depth
+
+    controller = AdmissionController(
+        depth_probe=probe,
+        pool_checked_out=lambda: checked_out,
+        pool_capacity=15,
+        **options,
+    )
+    return controller, calls
+
+
+class TestAdmission:
+    """Тесты для контроля допуска запросов рекомендаций"""
+
+    @pytest.mark.parametrize(
+        "depth, checked_out, reason",
+        [
+            (50, 0, "ML queue is full"),
+            (ConnectionError("refused"), 0, "ML queue is unavailable"),
+            (0, 15, "Database connection pool is exhausted"),
+        ],
+    )
+    def test_rejects_overloaded_signals(self, depth, checked_out, reason):
+        """Тест отказа с Retry-After при перегрузке очереди или пула"""
+        controller, _ = create_controller(depth, checked_out, max_queue_depth=50, retry_after=7)
+
+        async def enter():
+            async with controller.slot():
+                pass
+
+        with pytest.raises(Overloaded) as error:
+            asyncio.run(enter())
+        assert error.value.reason == reason
+        assert error.value.retry_after == 7
+        assert controller.in_flight == 0
+
+    def test_limits_requests_in_flight(self):
+        """Тест ограничения числа одновременных запросов к ML сервису"""
+        controller, _ = create_controller(max_in_flight=2)
+        results = []
+
+        async def request():
+            try:
+                async with controller.slot():
+                    await asyncio.sleep(0.05)
+                    results.append("ok")
+            except Overloaded:
+                results.append("rejected")
+
+        async def main():
+            await asyncio.gather(*(request() for _ in range(5)))
+
+        asyncio.run(main())
+        assert sorted(results) == ["ok", "ok", "rejected", "rejected", "rejected"]
+        assert controller.in_flight == 0
+
+    def test_queue_depth_is_cached(self):
+        """Тест одной проверки брокера на одновременные запросы"""
+        controller, calls = create_controller(depth=3)
+
+        async def main():
+            return await asyncio.gather(*(controller.signals() for _ in range(10)))
+
+        signals = asyncio.run(main())
+        assert len(calls) == 1
+        assert signals[0].to_dict()["ready"] is True
+        assert signals[0].queue_depth == 3
@@ -0,0 +1,95 @@
+import gzip
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+from middleware.compression import CompressionMiddleware, choose_encoding
+from routes.api.conditional import etag_matches, make_etag
+
+
+LARGE = "movie " * 1000
+
+
+def create_compressed_app():
+    """Создает тестовое приложение со сжатием ответов"""
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/large")
+    async def large():
+        return PlainTextResponse(LARGE, headers={"ETag": '"abc"'})
+
+    @app.get("/small")
+    async def small():
+        return PlainTextResponse("ok")
+
+    @app.get("/image")
+    async def image():
+        return PlainTextResponse(LARGE, media_type="image/png")
+
+    @app.get("/stream")
+    async def stream():
+        return StreamingResponse(iter([LARGE, LARGE]), media_type="text/plain")
+
+    @app.get("/events")
+    async def events():
+        return StreamingResponse(iter([f"data: {LARGE}\n\n"]), media_type="text/event-stream")
+
+    return app
+
+
+class TestCompressionMiddleware:
+    """Тесты для middleware сжатия ответов"""
+
+    def test_large_response_gzipped(self):
+        """Тест сжатия большого текстового ответа с ослаблением ETag"""
+        client = TestClient(create_compressed_app())
+        response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["etag"] == 'W/"abc"'
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert response.text == LARGE
+
+    def test_small_and_binary_not_compressed(self):
+        """Тест ответов, которые не сжимаются"""
+        client = TestClient(create_compressed_app())
+
+        small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+        image = client.get("/image", headers={"Accept-Encoding": "gzip"})
+        events = client.get("/events", headers={"Accept-Encoding": "gzip"})
+        identity = client.get("/large", headers={"Accept-Encoding": "identity"})
+
+        assert "content-encoding" not in small.headers
+        assert "content-encoding" not in image.headers
+        assert "content-encoding" not in events.headers
+        assert "content-encoding" not in identity.headers
+        assert identity.headers["etag"] == '"abc"'
+
+    def test_streaming_response_gzipped(self):
+        """Тест потокового сжатия ответа из нескольких сообщений"""
+        client = TestClient(create_compressed_app())
+        with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+            raw = b"".join(response.iter_raw())
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        assert gzip.decompress(raw).decode() == LARGE * 2
+
+    def test_choose_encoding(self):
+        """Тест разбора Accept-Encoding"""
+        assert choose_encoding("gzip, deflate") == "gzip"
+        assert choose_encoding("gzip;q=0, deflate") is None
+        assert choose_encoding("") is None
+
+
+def test_etag_matches():
+    """Тест слабого сравнения If-None-Match"""
+    etag = make_etag("balance", 1, 20.0)
+
+    assert etag == make_etag("balance", 1, 20.0)
+    assert etag != make_etag("balance", 1, 25.0)
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
+    assert not etag_matches(None, etag)
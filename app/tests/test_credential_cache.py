@@ -0,0 +1,61 @@
+from auth.credential_cache import VerifiedCredentialCache
+
+
+HASH = "$2b$12$abcdefghijklmnopqrstuuN0vHqUTf1m3bS1XfJ3q8cFz7n0m9tWe"
+
+
+class TestVerifiedCredentialCache:
+    """Тесты для кэша проверенных учетных данных HTTP Basic"""
+
+    def test_hit_after_add(self):
+        """Тест попадания в кэш для тех же email, пароля и хеша"""
+        cache = VerifiedCredentialCache(b"key", ttl_seconds=60)
+        cache.add("a@b.com", "Secret123", HASH, now=0)
+
+        assert cache.check("a@b.com", "Secret123", HASH, now=10) is True
+        assert cache.check("a@b.com", "Wrong123", HASH, now=10) is False
+        assert cache.check("c@d.com", "Secret123", HASH, now=10) is False
+
+    def test_entry_expires(self):
+        """Тест истечения записи по TTL"""
+        cache = VerifiedCredentialCache(b"key", ttl_seconds=60)
+        cache.add("a@b.com", "Secret123", HASH, now=0)
+
+        assert cache.check("a@b.com", "Secret123", HASH, now=60) is False
+        assert len(cache) == 0
+
+    def test_password_change_misses(self):
+        """Тест промаха после смены хеша пароля в базе"""
+        cache = VerifiedCredentialCache(b"key", ttl_seconds=60)
+        cache.add("a@b.com", "Secret123", HASH, now=0)
+
+        assert cache.check("a@b.com", "Secret123", HASH + "x", now=1) is False
+        assert cache.check("a@b.com", "Secret123", HASH, now=1) is False
+
+    def test_invalidate_and_clear(self):
+        """Тест явной инвалидации записей пользователя и очистки кэша"""
+        cache = VerifiedCredentialCache(b"key", ttl_seconds=60)
+        cache.add("a@b.com", "Secret123", HASH, now=0)
+        cache.add("a@b.com", "Other123", HASH, now=0)
+        cache.add("c@d.com", "Secret123", HASH, now=0)
+
+        cache.invalidate("a@b.com")
+        assert cache.check("a@b.com", "Secret123", HASH, now=1) is False
+        assert cache.check("a@b.com", "Other123", HASH, now=1) is False
+        assert cache.check("c@d.com", "Secret123", HASH, now=1) is True
+
+        cache.clear()
+        assert len(cache) == 0
+
+    def test_lru_eviction(self):
+        """Тест вытеснения давно не использованных записей"""
+        cache = VerifiedCredentialCache(b"key", ttl_seconds=60, max_entries=2)
+        cache.add("a@b.com", "Secret123", HASH, now=0)
+        cache.add("c@d.com", "Secret123", HASH, now=0)
+        assert cache.check("a@b.com", "Secret123", HASH, now=1) is True
+
+        cache.add("e@f.com", "Secret123", HASH, now=2)
+
+        assert len(cache) == 2
+        assert cache.check("c@d.com", "Secret123", HASH, now=3) is False
+        assert cache.check("a@b.com", "Secret123", HASH, now=3) is True
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from services.embeddings.store import EmbeddingStore
+
+
+class FakeModel:
+    """Модель-заглушка, считающая вызовы encode"""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+        self.encoded = []
+
+    def encode(self, texts, batch_size=64):
+        self.encoded.extend(texts)
+        return np.array([[float(len(t))] * self.dim for t in texts], dtype=np.float32)
+
+
+class TestEmbeddingStore:
+    """Тесты для контентно-адресуемого хранилища эмбеддингов"""
+
+    def test_encode_uses_model_only_for_new_texts(self, tmp_path):
+        """Тест повторного кодирования: модель вызывается только для новых описаний"""
+        store = EmbeddingStore(tmp_path, "test-model")
+        model = FakeModel()
+
+        first = store.encode(model, ["a", "bb"])
+        second = store.encode(model, ["bb", "ccc", "a"])
+
+        assert model.encoded == ["a", "bb", "ccc"]
+        assert first.shape == (2, 384)
+        assert second[0][0] == 2.0
+        assert second[1][0] == 3.0
+        assert second[2][0] == 1.0
+
+    def test_store_survives_reopen(self, tmp_path):
+        """Тест чтения хранилища после перезапуска процесса"""
+        EmbeddingStore(tmp_path, "test-model").encode(FakeModel(), ["hello", "world!"])
+
+        reopened = EmbeddingStore(tmp_path, "test-model")
+        result, missing = reopened.lookup(["world!", "unknown", "hello"])
+
+        assert len(reopened) == 2
+        assert missing == [1]
+        assert result[0][0] == 6.0
+        assert result[2][0] == 5.0
+
+    def test_models_are_isolated(self, tmp_path):
+        """Тест разделения эмбеддингов разных моделей"""
+        EmbeddingStore(tmp_path, "model-a").encode(FakeModel(), ["text"])
+
+        _, missing = EmbeddingStore(tmp_path, "model-b").lookup(["text"])
+        assert missing == [0]
+
+    def test_duplicate_texts_encoded_once(self, tmp_path):
+        """Тест дедупликации одинаковых описаний внутри батча"""
+        store = EmbeddingStore(tmp_path, "test-model")
+        model = FakeModel()
+
+        result = store.encode(model, ["same", "same"])
+
+        assert model.encoded == ["same"]
+        assert len(store) == 1
+        assert np.array_equal(result[0], result[1])
+
+    def test_wrong_dimension_rejected(self, tmp_path):
+        """Тест проверки размерности эмбеддинга"""
+        store = EmbeddingStore(tmp_path, "test-model")
+
+        with pytest.raises(ValueError):
+            store.put(["text"], np.zeros((1, 128), dtype=np.float32))
+
+    def test_truncated_tail_is_ignored(self, tmp_path):
+        """Тест восстановления после оборванной записи матрицы"""
+        store = EmbeddingStore(tmp_path, "test-model")
+        store.encode(FakeModel(), ["first"])
+        with open(store.index_path, "ab") as index_file:
+            index_file.write(EmbeddingStore.digest("second"))
+
+        reopened = EmbeddingStore(tmp_path, "test-model")
+        _, missing = reopened.lookup(["first", "second"])
+
+        assert len(reopened) == 1
+        assert missing == [1]
@@ -0,0 +1,148 @@
+import pytest
+from datetime import datetime, timedelta
+from models.constants import JobStatus
+from services.jobs import job_events
+
+
+async def collect(stream) -> list:
+    """Собирает фрагменты потока событий"""
+    return [chunk async for chunk in stream]
+
+
+class TestJobTable:
+    """Тесты для таблицы фоновых задач рекомендаций"""
+
+    def create_user(self, app_models, session, balance: float = 0.0):
+        """Создает владельца задач с кошельком"""
+        user = app_models.User(email="jobs@example.com", password_hash="-")
+        session.add(user)
+        session.flush()
+        session.add(app_models.Wallet(user_id=user.id, balance=balance))
+        session.commit()
+        return user
+
+    async def test_job_visible_to_owner_from_any_session(self, app_models, app_session, new_app_async_session):
+        """Тест доступа к задаче только ее владельцу, в том числе из другой сессии (воркера)"""
+        jobs = app_models.JobService
+        user_id = self.create_user(app_models, app_session).id
+
+        async with new_app_async_session() as session:
+            job = await jobs.create_job(user_id, 300, 3, session)
+        async with new_app_async_session() as session:
+            found = await jobs.get_job(job.id, user_id, 300, session)
+            assert found.id == job.id and found.status == JobStatus.PENDING
+            assert await jobs.get_job(job.id, user_id + 1, 300, session) is None
+            assert await jobs.get_job("missing", user_id, 300, session) is None
+
+    async def test_pending_jobs_limited_per_user(self, app_models, app_session, new_app_async_session):
+        """Тест лимита выполняющихся задач: сверх него TooManyJobs, после завершения снова можно"""
+        jobs = app_models.JobService
+        user_id = self.create_user(app_models, app_session).id
+
+        async with new_app_async_session() as session:
+            first_id = (await jobs.create_job(user_id, 300, 2, session)).id
+            await jobs.create_job(user_id, 300, 2, session)
+            with pytest.raises(jobs.TooManyJobs):
+                await jobs.create_job(user_id, 300, 2, session)
+
+            await jobs.fail_job(first_id, 504, "timeout", 300, session)
+            assert await jobs.create_job(user_id, 300, 2, session)
+
+    async def test_finish_and_fail_complete_pending_job_once(self, app_models, app_session, new_app_async_session):
+        """Тест сохранения результата и ошибки; завершенная задача не перезаписывается"""
+        jobs = app_models.JobService
+        user_id = self.create_user(app_models, app_session).id
+
+        async with new_app_async_session() as session:
+            done = await jobs.create_job(user_id, 300, 3, session)
+            failed = await jobs.create_job(user_id, 300, 3, session)
+            assert await jobs.finish_job(done.id, [{"id": 7, "title": "Solaris"}], 300, session)
+            await session.commit()
+            assert await jobs.fail_job(failed.id, 504, "timeout", 300, session)
+            assert not await jobs.fail_job(done.id, 500, "late", 300, session)
+
+        async with new_app_async_session() as session:
+            done = await jobs.get_job(done.id, user_id, 300, session)
+            failed = await jobs.get_job(failed.id, user_id, 300, session)
+
+        assert done.status == JobStatus.DONE
+        assert done.result == [{"id": 7, "title": "Solaris"}]
+        assert done.finished_at is not None
+        assert failed.status == JobStatus.FAILED
+        assert (failed.error_status, failed.error) == (504, "timeout")
+
+    async def test_result_rolled_back_with_failed_debit(self, app_models, app_session, new_app_async_session):
+        """Тест результата задачи в транзакции списания: без средств задача остается pending"""
+        jobs = app_models.JobService
+        user = self.create_user(app_models, app_session, balance=5.0)
+        user_id, wallet_id = user.id, user.wallet.id
+
+        async with new_app_async_session() as session:
+            job_id = (await jobs.create_job(user_id, 300, 3, session)).id
+            assert await jobs.finish_job(job_id, [{"id": 7}], 300, session)
+            with pytest.raises(ValueError):
+                await app_models.AsyncPredictionService.create_prediction(
+                    user_id, wallet_id, "space", [0.1] * 384, 10.0, [], session
+                )
+            assert (await jobs.get_job(job_id, user_id, 300, session)).status == JobStatus.PENDING
+
+    async def test_expired_job_not_finished(self, app_models, app_session, new_app_async_session):
+        """Тест завершения истекшей pending задачи: False, и результат не сохраняется"""
+        jobs = app_models.JobService
+        user_id = self.create_user(app_models, app_session).id
+        app_session.add(app_models.PredictionJob(
+            id="stale", user_id=user_id, created_at=datetime.utcnow() - timedelta(hours=1)
+        ))
+        app_session.commit()
+
+        async with new_app_async_session() as session:
+            assert not await jobs.finish_job("stale", [{"id": 7}], 300, session)
+            assert not await jobs.fail_job("stale", 504, "timeout", 300, session)
+
+    async def test_expired_jobs_hidden_and_purged(self, app_models, app_session, new_app_async_session):
+        """Тест истечения завершенных задач и зависших pending после ttl"""
+        jobs = app_models.JobService
+        PredictionJob = app_models.PredictionJob
+        user_id = self.create_user(app_models, app_session).id
+        hour_ago = datetime.utcnow() - timedelta(hours=1)
+        app_session.add_all([
+            PredictionJob(id="finished", user_id=user_id, status=JobStatus.DONE,
+                          created_at=hour_ago, finished_at=hour_ago),
+            PredictionJob(id="stale", user_id=user_id, created_at=hour_ago),
+            PredictionJob(id="recent", user_id=user_id, status=JobStatus.DONE,
+                          created_at=hour_ago, finished_at=datetime.utcnow()),
+        ])
+        app_session.commit()
+
+        async with new_app_async_session() as session:
+            assert await jobs.get_job("finished", user_id, 300, session) is None
+            assert await jobs.get_job("stale", user_id, 300, session) is None
+            assert (await jobs.get_job("recent", user_id, 300, session)).id == "recent"
+            assert await jobs.purge_expired_jobs(300, session) == 2
+
+        remaining = {job.id for job in app_session.exec(PredictionJob.__table__.select())}
+        assert remaining == {"recent"}
+
+    async def test_events_stream_heartbeat_then_result(self, app_models):
+        """Тест потока событий: heartbeat, пока задача выполняется, затем результат"""
+        job = app_models.PredictionJob(id="job", user_id=1)
+        states = iter([None, None, None])
+
+        async def load():
+            if next(states, "done") == "done":
+                job.status = JobStatus.DONE
+                job.result = [{"id": 7, "title": "Solaris"}]
+            return job
+
+        chunks = await collect(job_events(load, poll_seconds=0.01, heartbeat_seconds=0))
+
+        assert chunks[0] == b": keep-alive\n\n"
+        assert chunks[-1].startswith(b"event: done\ndata: {")
+        assert b'"title":"Solaris"' in chunks[-1]
+
+    async def test_events_stream_closes_when_job_expires(self):
+        """Тест закрытия потока без события, если задача истекла"""
+        async def load():
+            return None
+
+        assert await collect(job_events(load, poll_seconds=0.01)) == []
@@ -0,0 +1,138 @@
+import asyncio
+import json
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from loguru import logger
+from sqlalchemy import create_engine, text
+from database.database import instrument_engine
+from middleware.timing import TimingMiddleware
+from services.metrics import (
+    phase,
+    record_query,
+    render_metrics,
+    request_queries,
+    server_timing,
+    start_request,
+    timed,
+)
+
+
+def create_timed_app():
+    """Создает тестовое приложение с замером фаз"""
+    app = FastAPI()
+    app.add_middleware(TimingMiddleware, timing_detail=True)
+
+    @timed("test.lookup")
+    async def lookup(item_id: int) -> int:
+        return item_id
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        with phase("test.auth"):
+            pass
+        await lookup(item_id)
+        await lookup(item_id)
+        return {"id": item_id}
+
+    return app
+
+
+def create_sql_app():
+    """Создает тестовое приложение с отладочным заголовком SQL запросов"""
+    app = FastAPI()
+    app.add_middleware(TimingMiddleware, query_count_warning=1, sql_debug_header=True, timing_detail=True)
+
+    @app.get("/orders")
+    async def list_orders():
+        record_query("SELECT * FROM orders", 0.002)
+        record_query("SELECT * FROM items WHERE order_id = $1", 0.001)
+        return []
+
+    return app
+
+
+class TestMetrics:
+    """Тесты для замера фаз запроса и метрик Prometheus"""
+
+    def test_server_timing_sums_repeated_phases(self):
+        """Тест суммирования повторяющихся фаз в Server-Timing"""
+        header = server_timing([("db", 0.001), ("ml_rpc", 0.1204), ("db", 0.002)], 0.125)
+
+        assert header == "db;dur=3.0, ml_rpc;dur=120.4, total;dur=125.0"
+
+    def test_timed_records_request_phases(self):
+        """Тест записи фаз синхронных и асинхронных функций в текущий запрос"""
+        @timed("test.sync")
+        def sync_call():
+            return 1
+
+        @timed("test.async")
+        async def async_call():
+            return 2
+
+        phases = start_request()
+        assert sync_call() == 1
+        assert asyncio.run(async_call()) == 2
+
+        assert [name for name, _ in phases] == ["test.sync", "test.async"]
+
+    def test_middleware_emits_server_timing_and_metrics(self):
+        """Тест заголовка Server-Timing и гистограммы по шаблону маршрута"""
+        client = TestClient(create_timed_app())
+        response = client.get("/items/7")
+
+        timing = response.headers["server-timing"]
+        assert timing.startswith("test.auth;dur=")
+        assert "test.lookup;dur=" in timing and timing.count("test.lookup") == 1
+        assert "total;dur=" in timing
+
+        content, content_type = render_metrics()
+        assert content_type.startswith("text/plain")
+        assert b'route="/items/{item_id}"' in content
+        assert b'phase="test.lookup"' in content
+
+    def test_server_timing_hides_phases_by_default(self):
+        """Тест: без timing_detail Server-Timing содержит только total"""
+        app = FastAPI()
+        app.add_middleware(TimingMiddleware)
+
+        @app.get("/login")
+        async def login():
+            with phase("user.check_password"):
+                pass
+            return {}
+
+        timing = TestClient(app).get("/login").headers["server-timing"]
+        assert timing.startswith("total;dur=")
+        assert "check_password" not in timing
+
+    def test_engine_hooks_record_queries_without_parameters(self):
+        """Тест учета SQL запросов и журнала медленных запросов без значений параметров"""
+        engine = create_engine("sqlite://")
+        instrument_engine(engine, slow_query_ms=0)
+        messages = []
+        handler = logger.add(messages.append, level="WARNING")
+        try:
+            start_request()
+            with engine.connect() as conn:
+                conn.execute(text("SELECT :secret"), {"secret": "hunter2"})
+        finally:
+            logger.remove(handler)
+
+        assert [sql for sql, _ in request_queries()] == ["SELECT ?"]
+        assert any("1 parameters redacted" in message for message in messages)
+        assert not any("hunter2" in message for message in messages)
+
+    def test_debug_header_returns_query_list(self):
+        """Тест списка SQL запросов в ответе по заголовку X-Debug-SQL"""
+        client = TestClient(create_sql_app())
+
+        response = client.get("/orders", headers={"X-Debug-SQL": "1"})
+        queries = json.loads(response.headers["x-sql-queries"])
+        assert [query["sql"] for query in queries] == [
+            "SELECT * FROM orders",
+            "SELECT * FROM items WHERE order_id = $1",
+        ]
+        assert "db;dur=3.0" in response.headers["server-timing"]
+
+        assert "x-sql-queries" not in client.get("/orders").headers
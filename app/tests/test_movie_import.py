@@ -0,0 +1,119 @@
+from types import SimpleNamespace
+import pyarrow as pa
+import pytest
+
+DIM = 384
+
+
+class FakeCursor:
+    """Курсор psycopg2, запоминающий данные COPY"""
+
+    def __init__(self, copies: list) -> None:
+        self.copies = copies
+
+    def copy_expert(self, sql, file):
+        self.copies.append(file.read())
+
+    def close(self):
+        pass
+
+
+class FakeImportSession:
+    """Сессия, которая запоминает SQL, COPY и исход транзакции"""
+
+    def __init__(self) -> None:
+        self.sql = []
+        self.copies = []
+        self.committed = False
+        self.rolled_back = False
+        self.connection_ = SimpleNamespace(
+            execute=self.execute,
+            connection=SimpleNamespace(cursor=lambda: FakeCursor(self.copies)),
+        )
+
+    def connection(self):
+        return self.connection_
+
+    def execute(self, statement):
+        self.sql.append(str(statement))
+        return SimpleNamespace(rowcount=1)
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        self.rolled_back = True
+
+
+def movie_batch(titles, years, embeddings, embedding_type=None) -> pa.RecordBatch:
+    """Батч каталога с заданными названиями, годами и эмбеддингами"""
+    return pa.record_batch({
+        "title": titles,
+        "description": [f"Description of {title} long enough" for title in titles],
+        "year": years,
+        "genres": [["drama"]] * len(titles),
+        "embedding": pa.array(embeddings, type=embedding_type or pa.list_(pa.float32())),
+    })
+
+
+def write_arrow(path, batches) -> None:
+    """Записывает батчи в Arrow IPC файл"""
+    with pa.ipc.new_file(str(path), batches[0].schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+
+
+class TestMovieImport:
+    """Тесты импорта каталога из Arrow: проверка до записи, одна транзакция, дубликаты"""
+
+    def test_wrong_fixed_size_width_rejected_before_copy(self, app_models, tmp_path):
+        """Тест отказа по ширине fixed_size_list до первого COPY"""
+        path = tmp_path / "catalog.arrow"
+        write_arrow(path, [movie_batch(["Solaris"], [1972], [[0.1] * 3], pa.list_(pa.float32(), 3))])
+        session = FakeImportSession()
+
+        with pytest.raises(ValueError, match="Vector"):
+            app_models.MovieImport.import_movie_catalog(path, session)
+
+        assert session.copies == []
+        assert not session.committed and session.rolled_back
+
+    def test_bad_vector_in_later_batch_imports_nothing(self, app_models, tmp_path):
+        """Тест отката всего файла, если эмбеддинг другой длины во втором батче"""
+        path = tmp_path / "catalog.arrow"
+        write_arrow(path, [
+            movie_batch(["Solaris"], [1972], [[0.1] * DIM]),
+            movie_batch(["Stalker"], [1979], [[0.1] * (DIM - 1)]),
+        ])
+        session = FakeImportSession()
+
+        with pytest.raises(ValueError, match="Vector"):
+            app_models.MovieImport.import_movie_catalog(path, session)
+
+        assert len(session.copies) == 1
+        assert not session.committed and session.rolled_back
+
+    def test_file_committed_once(self, app_models, tmp_path):
+        """Тест импорта нескольких батчей одной транзакцией"""
+        path = tmp_path / "catalog.arrow"
+        write_arrow(path, [
+            movie_batch(["Solaris"], [1972], [[0.1] * DIM]),
+            movie_batch(["Stalker"], [1979], [[0.2] * DIM]),
+        ])
+        session = FakeImportSession()
+
+        assert app_models.MovieImport.import_movie_catalog(path, session) == (2, 2)
+        assert len(session.copies) == 2
+        assert session.committed and not session.rolled_back
+        assert sum("TRUNCATE" in sql for sql in session.sql) == 2
+
+    def test_duplicate_title_year_in_batch_copied_once(self, app_models):
+        """Тест удаления повторов (title, year) внутри батча до COPY"""
+        batch = movie_batch(
+            ["Solaris", "Solaris", "Solaris"], [1972, 1972, 2002], [[0.1] * DIM, [0.2] * DIM, [0.3] * DIM]
+        )
+
+        lines = app_models.MovieImport.format_copy_rows(batch, DIM).splitlines()
+
+        assert [line.split("\t")[:3:2] for line in lines] == [["Solaris", "1972"], ["Solaris", "2002"]]
+        assert lines[0].endswith("[0.1" + ",0.1" * (DIM - 1) + "]")
@@ -0,0 +1,95 @@
+from types import SimpleNamespace
+from sqlalchemy.dialects import postgresql
+from sqlmodel import select
+
+
+def compile_sql(statement) -> str:
+    """SQL запроса в диалекте Postgres"""
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def selected_sql(statement) -> str:
+    """Часть SELECT запроса до FROM"""
+    return compile_sql(statement).split("\nFROM ")[0]
+
+
+class CapturingSession:
+    """Сессия, которая запоминает выполненные запросы и возвращает заданный результат"""
+
+    def __init__(self, result=None) -> None:
+        self.statements = []
+        self.result = result
+
+    def exec(self, statement):
+        self.statements.append(statement)
+        return SimpleNamespace(one=lambda: self.result, all=lambda: [])
+
+
+class AsyncCapturingSession(CapturingSession):
+    """Асинхронный вариант CapturingSession"""
+
+    async def exec(self, statement):
+        return super().exec(statement)
+
+
+class TestEmbeddingNotLoaded:
+    """Тесты того, что запросы без векторного поиска не читают колонку эмбеддинга"""
+
+    def test_embedding_deferred_in_model_queries(self, app_models):
+        """Тест отложенной загрузки эмбеддинга фильма и предсказания"""
+        for model in (app_models.Movie, app_models.Prediction):
+            assert model.__mapper__.attrs.embedding.deferred
+            assert "embedding" not in selected_sql(select(model))
+
+    def test_count_movies_reads_no_rows(self, app_models):
+        """Тест подсчета фильмов одним count(*) без колонок фильма"""
+        session = CapturingSession(result=3)
+
+        assert app_models.MovieService.count_movies(session) == 3
+        sql = compile_sql(session.statements[0])
+        assert "count(*)" in sql
+        assert "embedding" not in sql and "movie.title" not in sql
+
+    def test_movies_exist_reads_no_rows(self, app_models):
+        """Тест проверки наличия фильмов через EXISTS без колонок фильма"""
+        session = CapturingSession(result=True)
+
+        assert app_models.MovieService.movies_exist(session) is True
+        sql = compile_sql(session.statements[0])
+        assert "EXISTS" in sql
+        assert "embedding" not in sql
+
+    def assert_similar_movies_projection(self, statement):
+        """Эмбеддинг только в ORDER BY, в выборке колонки MovieOut"""
+        assert "embedding" not in selected_sql(statement)
+        assert "embedding" in compile_sql(statement).split("ORDER BY")[1]
+        assert {column.name for column in statement.selected_columns} == {"id", "title", "description", "year", "genres"}
+
+    def test_similar_movies_projection_without_embedding(self, app_models):
+        """Тест векторного поиска без чтения эмбеддингов фильмов"""
+        session = CapturingSession()
+
+        assert app_models.MovieService.search_similar_movies([0.1] * 384, 5, session) == []
+        self.assert_similar_movies_projection(session.statements[0])
+
+    async def test_async_similar_movies_projection_without_embedding(self, app_models):
+        """Тест асинхронного векторного поиска без чтения эмбеддингов фильмов"""
+        session = AsyncCapturingSession()
+
+        assert await app_models.AsyncMovieService.search_similar_movies([0.1] * 384, 5, session) == []
+        self.assert_similar_movies_projection(session.statements[0])
+
+
+class TestTitleQueries:
+    """Тесты запросов по названию фильма"""
+
+    def test_movies_by_title_use_trigram_operator(self, app_models):
+        """Тест поиска по названию через индексируемый оператор pg_trgm вместо ILIKE"""
+        session = CapturingSession()
+
+        assert app_models.MovieService.get_movies_by_title("solaris", session) == []
+        threshold_sql, sql = (compile_sql(statement) for statement in session.statements)
+        assert "set_config" in threshold_sql
+        assert "<%" in sql.split("WHERE")[1]
+        assert "ILIKE" not in sql.upper()
+        assert "LIMIT" in sql
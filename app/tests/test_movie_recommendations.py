@@ -1,5 +1,8 @@
 import pytest
+from types import SimpleNamespace
 from fastapi.testclient import TestClient
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
 import json
 
 
@@ -143,4 +146,112 @@ class TestMovieRecommendations:
         embedding_from_model = json.loads(mock_movie.embedding)
         
         assert genres_from_model == mock_movie_data["genres"]
-        assert embedding_from_model == mock_movie_data["embedding"]
\ No newline at end of file
+        assert embedding_from_model == mock_movie_data["embedding"]
+
+class TestCreatePrediction:
+    """Тесты сохранения предсказания вместе со списанием одной транзакцией БД"""
+
+    EMBEDDING = [0.1, 0.2, 0.3, 0.4] * 96
+    MOVIES = [SimpleNamespace(id=1), SimpleNamespace(id=2)]
+
+    def create_user(self, app_models, session, balance: float = 30.0):
+        """Создает пользователя с кошельком"""
+        user = app_models.User(email="prediction@example.com", password_hash="-")
+        session.add(user)
+        session.flush()
+        session.add(app_models.Wallet(user_id=user.id, balance=balance))
+        session.commit()
+        return user
+
+    def saved(self, app_models, session, user) -> dict:
+        """Баланс и число строк, сохраненных для пользователя"""
+        session.expire_all()
+        return {
+            "balance": session.exec(
+                select(app_models.Wallet.balance).where(app_models.Wallet.user_id == user.id)
+            ).one(),
+            "transactions": len(session.exec(select(app_models.Transaction)).all()),
+            "predictions": len(session.exec(select(app_models.Prediction.id)).all()),
+            "links": len(session.exec(select(app_models.PredictionMovieLink)).all()),
+        }
+
+    def test_debit_prediction_and_links_commit_together(self, app_models, app_session):
+        """Списание, предсказание и связи с фильмами сохраняются вместе"""
+        user = self.create_user(app_models, app_session)
+
+        prediction = app_models.PredictionService.create_prediction(
+            user, "space", self.EMBEDDING, 10.0, self.MOVIES, app_session
+        )
+
+        assert prediction.id is not None
+        assert self.saved(app_models, app_session, user) == {
+            "balance": 20.0, "transactions": 1, "predictions": 1, "links": 2
+        }
+
+    def test_failed_link_insert_commits_nothing(self, app_models, app_session):
+        """Ошибка вставки связей откатывает списание и запись журнала"""
+        user = self.create_user(app_models, app_session)
+
+        with pytest.raises(IntegrityError):
+            app_models.PredictionService.create_prediction(
+                user, "space", self.EMBEDDING, 10.0, self.MOVIES * 2, app_session
+            )
+
+        assert self.saved(app_models, app_session, user) == {
+            "balance": 30.0, "transactions": 0, "predictions": 0, "links": 0
+        }
+
+    def test_insufficient_funds_writes_no_prediction(self, app_models, app_session):
+        """Нехватка средств: ValueError и ни одной записи"""
+        user = self.create_user(app_models, app_session, balance=5.0)
+
+        with pytest.raises(ValueError, match="Недостаточно средств"):
+            app_models.PredictionService.create_prediction(
+                user, "space", self.EMBEDDING, 10.0, self.MOVIES, app_session
+            )
+
+        assert self.saved(app_models, app_session, user) == {
+            "balance": 5.0, "transactions": 0, "predictions": 0, "links": 0
+        }
+
+    async def test_async_debit_prediction_and_links_commit_together(self, app_models, app_session, new_app_async_session):
+        """Асинхронно: списание, предсказание и связи сохраняются вместе"""
+        user = self.create_user(app_models, app_session)
+
+        async with new_app_async_session() as session:
+            prediction = await app_models.AsyncPredictionService.create_prediction(
+                user.id, user.wallet.id, "space", self.EMBEDDING, 10.0, self.MOVIES, session
+            )
+
+        assert prediction.id is not None
+        assert self.saved(app_models, app_session, user) == {
+            "balance": 20.0, "transactions": 1, "predictions": 1, "links": 2
+        }
+
+    async def test_async_failed_link_insert_commits_nothing(self, app_models, app_session, new_app_async_session):
+        """Асинхронно: ошибка вставки связей откатывает списание и запись журнала"""
+        user = self.create_user(app_models, app_session)
+
+        async with new_app_async_session() as session:
+            with pytest.raises(IntegrityError):
+                await app_models.AsyncPredictionService.create_prediction(
+                    user.id, user.wallet.id, "space", self.EMBEDDING, 10.0, self.MOVIES * 2, session
+                )
+
+        assert self.saved(app_models, app_session, user) == {
+            "balance": 30.0, "transactions": 0, "predictions": 0, "links": 0
+        }
+
+    async def test_async_insufficient_funds_writes_no_prediction(self, app_models, app_session, new_app_async_session):
+        """Асинхронно: нехватка средств дает ValueError и ни одной записи"""
+        user = self.create_user(app_models, app_session, balance=5.0)
+
+        async with new_app_async_session() as session:
+            with pytest.raises(ValueError, match="Недостаточно средств"):
+                await app_models.AsyncPredictionService.create_prediction(
+                    user.id, user.wallet.id, "space", self.EMBEDDING, 10.0, self.MOVIES, session
+                )
+
+        assert self.saved(app_models, app_session, user) == {
+            "balance": 5.0, "transactions": 0, "predictions": 0, "links": 0
+        }
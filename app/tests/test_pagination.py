@@ -0,0 +1,33 @@
+from datetime import datetime
+from types import SimpleNamespace
+import pytest
+from services.crud.pagination import HistoryCursor, decode_cursor, encode_cursor, split_page
+
+
+class TestHistoryCursor:
+    """Тесты для курсоров постраничной истории"""
+
+    def test_round_trip(self):
+        """Тест восстановления позиции из курсора"""
+        timestamp = datetime(2025, 8, 19, 10, 0, 0, 123456)
+        cursor = encode_cursor(timestamp, 42)
+
+        assert decode_cursor(cursor) == HistoryCursor(timestamp, 42)
+
+    def test_invalid_cursor(self):
+        """Тест ошибки на поврежденном курсоре"""
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor")
+        with pytest.raises(ValueError):
+            decode_cursor(encode_cursor(datetime(2025, 1, 1), 1)[:-3])
+
+    def test_split_page(self):
+        """Тест курсора следующей страницы по последней записи страницы"""
+        rows = [SimpleNamespace(timestamp=datetime(2025, 1, 1, 0, 0, i), id=i) for i in (3, 2, 1)]
+
+        page, cursor = split_page(rows, 2)
+        assert [row.id for row in page] == [3, 2]
+        assert decode_cursor(cursor) == HistoryCursor(rows[1].timestamp, 2)
+
+        page, cursor = split_page(rows, 3)
+        assert len(page) == 3 and cursor is None
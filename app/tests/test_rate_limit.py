@@ -0,0 +1,69 @@
+import pytest
+from auth.rate_limit import MemoryRateLimiter, SQLiteRateLimiter
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_limiter(request, tmp_path):
+    """Фабрика ограничителей обоих типов с одинаковыми параметрами"""
+    def factory(**kwargs):
+        if request.param == "sqlite":
+            return SQLiteRateLimiter(str(tmp_path / "limits.sqlite3"), **kwargs)
+        return MemoryRateLimiter(**kwargs)
+    return factory
+
+
+class TestRateLimiter:
+    """Тесты для ограничителей попыток входа"""
+
+    def test_limit_reached(self, make_limiter):
+        """Тест срабатывания лимита после limit событий в окне"""
+        limiter = make_limiter(limit=3, window_seconds=100)
+        for second in range(3):
+            assert limiter.is_limited("a@b.com", now=1000 + second) is False
+            limiter.hit("a@b.com", now=1000 + second)
+
+        assert limiter.is_limited("a@b.com", now=1010) is True
+        assert limiter.is_limited("c@d.com", now=1010) is False
+
+    def test_previous_window_decays(self, make_limiter):
+        """Тест учета предыдущего окна пропорционально перекрытию"""
+        limiter = make_limiter(limit=3, window_seconds=100)
+        for _ in range(4):
+            limiter.hit("a@b.com", now=1090)
+
+        # 4 * (1 - 30/100) = 2.8 < 3 на 1130, но 4 * 0.8 = 3.2 на 1120
+        assert limiter.is_limited("a@b.com", now=1120) is True
+        assert limiter.is_limited("a@b.com", now=1130) is False
+        assert limiter.is_limited("a@b.com", now=1300) is False
+
+    def test_reset(self, make_limiter):
+        """Тест сброса счетчиков ключа"""
+        limiter = make_limiter(limit=1, window_seconds=100)
+        limiter.hit("a@b.com", now=1000)
+        limiter.reset("a@b.com")
+
+        assert limiter.is_limited("a@b.com", now=1001) is False
+
+    def test_idle_keys_evicted(self, make_limiter):
+        """Тест вытеснения давно не использованных ключей сверх max_keys"""
+        limiter = make_limiter(limit=1, window_seconds=100, max_keys=2)
+        limiter.hit("a", now=1000)
+        limiter.hit("b", now=1001)
+        limiter.hit("c", now=1002)
+
+        assert len(limiter) == 2
+        assert limiter.is_limited("a", now=1003) is False
+        assert limiter.is_limited("c", now=1003) is True
+
+
+def test_sqlite_limiter_shared_between_instances(tmp_path):
+    """Тест общих счетчиков для ограничителей разных процессов на одном файле"""
+    path = str(tmp_path / "limits.sqlite3")
+    first = SQLiteRateLimiter(path, limit=2, window_seconds=100)
+    second = SQLiteRateLimiter(path, limit=2, window_seconds=100)
+
+    first.hit("a@b.com", now=1000)
+    second.hit("a@b.com", now=1001)
+
+    assert first.is_limited("a@b.com", now=1002) is True
+    assert second.is_limited("a@b.com", now=1002) is True
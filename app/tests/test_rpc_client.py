@@ -0,0 +1,76 @@
+from types import SimpleNamespace
+import pytest
+from services.rm import rm
+from services.rm.rm import MLServiceRpcClient
+
+SETTINGS = SimpleNamespace(
+    RABBITMQ_HOST="localhost", RABBITMQ_PORT=5672, RABBITMQ_USER="guest", RABBITMQ_PASSWORD="guest"
+)
+
+
+class FakeChannel:
+    """Канал, который принимает сообщения, но ответов не получает"""
+
+    def __init__(self) -> None:
+        self.published = []
+
+    def queue_declare(self, queue, exclusive=False, passive=False):
+        return SimpleNamespace(method=SimpleNamespace(queue="amq.gen-reply", message_count=0))
+
+    def basic_consume(self, queue, on_message_callback, auto_ack):
+        pass
+
+    def basic_publish(self, exchange, routing_key, properties, body):
+        self.published.append(body)
+
+
+class FakeConnection:
+    """Соединение с брокером, запоминающее закрытие"""
+    created = []
+
+    def __init__(self, params) -> None:
+        self.is_open = True
+        self._channel = FakeChannel()
+        FakeConnection.created.append(self)
+
+    def channel(self):
+        return self._channel
+
+    def process_data_events(self, time_limit=None):
+        pass
+
+    def close(self):
+        self.is_open = False
+
+
+@pytest.fixture(name="connections")
+def connections_fixture(monkeypatch):
+    """Подменяет соединение pika и возвращает список созданных соединений"""
+    FakeConnection.created = []
+    monkeypatch.setattr(rm.pika, "BlockingConnection", FakeConnection)
+    return FakeConnection.created
+
+
+class TestMLServiceRpcClient:
+    """Тесты для RPC клиента ML сервиса"""
+
+    def test_timed_out_call_closes_connection(self, connections):
+        """Тест закрытия соединения и очереди ответов, когда ML сервис не ответил"""
+        with pytest.raises(TimeoutError):
+            with MLServiceRpcClient(SETTINGS) as client:
+                client.call("space", timeout=0.01)
+
+        assert len(connections) == 1
+        assert connections[0]._channel.published
+        assert not connections[0].is_open
+
+    def test_answered_call_closes_connection(self, connections):
+        """Тест закрытия соединения после полученного ответа"""
+        with MLServiceRpcClient(SETTINGS) as client:
+            client.connection.process_data_events = lambda time_limit=None: client.on_response(
+                None, None, SimpleNamespace(correlation_id=client.corr_id), b'{"request_embedding": [0.1]}'
+            )
+            response = client.call("space", timeout=1)
+
+        assert response == {"request_embedding": [0.1]}
+        assert not connections[0].is_open
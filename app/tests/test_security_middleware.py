@@ -0,0 +1,64 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from loguru import logger
+from middleware.security import SecurityMiddleware
+
+
+def create_secured_app(log_sample_rate: float = 0.0):
+    """Создает тестовое приложение с middleware безопасности"""
+    app = FastAPI()
+    app.add_middleware(SecurityMiddleware, log_sample_rate=log_sample_rate)
+
+    @app.get("/health")
+    async def health_check():
+        return {"status": "healthy"}
+
+    return app
+
+
+class TestSecurityMiddleware:
+    """Тесты для middleware безопасности"""
+
+    def test_security_headers_added(self):
+        """Тест заголовков безопасности в обычном ответе"""
+        response = TestClient(create_secured_app()).get("/health")
+
+        assert response.status_code == 200
+        assert response.headers["x-content-type-options"] == "nosniff"
+        assert response.headers["x-frame-options"] == "DENY"
+        assert response.headers["referrer-policy"] == "strict-origin-when-cross-origin"
+
+    def test_suspicious_header_rejected(self):
+        """Тест отказа при подделанном заголовке прокси"""
+        response = TestClient(create_secured_app()).get("/health", headers={"X-Forwarded-For": "1.2.3.4"})
+
+        assert response.status_code == 400
+        assert response.text == "Suspicious request"
+        assert response.headers["x-frame-options"] == "DENY"
+
+    def test_long_path_and_query_rejected(self):
+        """Тест отказа при слишком длинном пути или строке запроса"""
+        client = TestClient(create_secured_app())
+
+        assert client.get("/" + "a" * 201).text == "Path too long"
+        assert client.get("/health", params={"q": "x" * 1001}).text == "Query parameters too long"
+
+    def test_zero_sample_rate_disables_request_log(self):
+        """Тест: при доле 0 обычные запросы не пишутся в журнал, а 1 пишет каждый"""
+        messages = []
+        sink = logger.add(lambda message: messages.append(message.record["message"]), level="INFO")
+        try:
+            TestClient(create_secured_app(0.0)).get("/health")
+            assert not [m for m in messages if m.startswith("Request:")]
+
+            TestClient(create_secured_app(1.0)).get("/health")
+            assert "Request: GET /health" in messages
+        finally:
+            logger.remove(sink)
+
+    @pytest.mark.parametrize("rate", [-0.1, 1.5])
+    def test_sample_rate_out_of_range_rejected(self, rate):
+        """Тест отказа при доле вне диапазона 0..1"""
+        with pytest.raises(ValueError):
+            TestClient(create_secured_app(rate)).get("/health")
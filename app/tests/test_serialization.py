@@ -0,0 +1,62 @@
+import json
+from datetime import datetime
+from types import SimpleNamespace
+import pytest
+from starlette.requests import Request
+from models import MovieOut, PredictionOut
+from routes.api.serialization import MOVIE_LIST, PREDICTION_LIST, build_include, render
+
+
+MOVIE = SimpleNamespace(id=1, title="Матрица", description="Фантастический боевик", year=1999, genres=["фантастика"])
+
+
+def make_request(accept: str = "application/json") -> Request:
+    """Создает запрос с заданным заголовком Accept"""
+    return Request({"type": "http", "headers": [(b"accept", accept.encode())]})
+
+
+class TestSparseFields:
+    """Тесты для параметра fields"""
+
+    def test_top_level_fields(self):
+        """Тест ответа только с выбранными полями фильма"""
+        include = build_include(MovieOut, "id, title")
+        response = render(make_request(), MOVIE_LIST, [MOVIE], include)
+
+        assert json.loads(response.body) == [{"id": 1, "title": "Матрица"}]
+        assert response.media_type == "application/json"
+
+    def test_nested_fields(self):
+        """Тест выбора полей вложенных фильмов предсказания"""
+        prediction = SimpleNamespace(
+            id=5, timestamp=datetime(2025, 8, 19), user_id=1,
+            input_text="фантастические фильмы", cost=10.0, movies=[MOVIE]
+        )
+        include = build_include(PredictionOut, "id,movies.title")
+        response = render(make_request(), PREDICTION_LIST, [prediction], include)
+
+        assert json.loads(response.body) == [{"id": 5, "movies": [{"title": "Матрица"}]}]
+
+    def test_all_fields_by_default(self):
+        """Тест полного ответа без параметра fields"""
+        response = render(make_request(), MOVIE_LIST, [MOVIE], build_include(MovieOut, None))
+
+        assert json.loads(response.body)[0]["description"] == "Фантастический боевик"
+
+    def test_unknown_field(self):
+        """Тест ошибки на неизвестном поле"""
+        with pytest.raises(ValueError):
+            build_include(MovieOut, "id,rating")
+        with pytest.raises(ValueError):
+            build_include(PredictionOut, "movies.rating")
+        with pytest.raises(ValueError):
+            build_include(MovieOut, "title.id")
+
+
+def test_msgpack_negotiation():
+    """Тест ответа MessagePack по заголовку Accept"""
+    msgpack = pytest.importorskip("msgpack")
+    response = render(make_request("application/msgpack"), MOVIE_LIST, [MOVIE], build_include(MovieOut, "id,year"))
+
+    assert response.media_type == "application/msgpack"
+    assert msgpack.unpackb(response.body) == [{"id": 1, "year": 1999}]
@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from services.singleflight import SingleFlight, ThreadSingleFlight, normalize_message
+
+
+class TestSingleFlight:
+    """Тесты для объединения одинаковых одновременных вычислений"""
+
+    def test_concurrent_calls_share_one_computation(self):
+        """Тест одного вычисления на одновременные вызовы с одним ключом"""
+        flight = SingleFlight("test")
+        calls = []
+
+        async def work(value):
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            return value * 2
+
+        async def main():
+            same = [flight.do("a", lambda: work(1)) for _ in range(3)]
+            return await asyncio.gather(*same, flight.do("b", lambda: work(5)))
+
+        results = asyncio.run(main())
+        assert [result for result, _ in results] == [2, 2, 2, 10]
+        assert [coalesced for _, coalesced in results] == [False, True, True, False]
+        assert calls == [1, 5]
+
+    def test_error_shared_and_not_cached(self):
+        """Тест передачи ошибки всем ожидающим и повторного вычисления после нее"""
+        flight = SingleFlight("test")
+        attempts = []
+
+        async def work():
+            attempts.append(1)
+            await asyncio.sleep(0.01)
+            if len(attempts) == 1:
+                raise TimeoutError("no reply")
+            return "ok"
+
+        async def main():
+            first = await asyncio.gather(flight.do("k", work), flight.do("k", work), return_exceptions=True)
+            second = await flight.do("k", work)
+            return first, second
+
+        first, second = asyncio.run(main())
+        assert all(isinstance(error, TimeoutError) for error in first)
+        assert second == ("ok", False)
+
+    def test_cancelled_leader_does_not_cancel_followers(self):
+        """Тест продолжения вычисления после отмены первого вызова"""
+        flight = SingleFlight("test")
+
+        async def work():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        async def main():
+            leader = asyncio.ensure_future(flight.do("k", work))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(flight.do("k", work))
+            await asyncio.sleep(0)
+            leader.cancel()
+            return await follower
+
+        assert asyncio.run(main()) == ("done", True)
+
+    def test_thread_calls_share_one_computation(self):
+        """Тест одного вычисления на одновременные вызовы из потоков"""
+        flight = ThreadSingleFlight("test")
+        calls = []
+        started = threading.Barrier(4)
+
+        def work():
+            calls.append(1)
+            time.sleep(0.05)
+            return "movies"
+
+        def call():
+            started.wait()
+            return flight.do("k", work)
+
+        with ThreadPoolExecutor(4) as pool:
+            results = list(pool.map(lambda _: call(), range(4)))
+
+        assert [result for result, _ in results] == ["movies"] * 4
+        assert len(calls) == 1
+        assert sum(coalesced for _, coalesced in results) == 3
+
+    @pytest.mark.parametrize("message", ["Space opera", "  space   OPERA "])
+    def test_normalize_message(self, message):
+        """Тест ключа запроса без учета регистра и пробелов"""
+        assert normalize_message(message) == "space opera"
@@ -0,0 +1,64 @@
+from services.search.title_index import TitlePrefixIndex, normalize_title
+
+
+MOVIES = [
+    (1, "The Matrix", 1999),
+    (2, "The Matrix Reloaded", 2003),
+    (3, "Matrioshka", 2015),
+    (4, "Amélie", 2001),
+    (5, "Ёлки", 2010),
+]
+
+
+def build_index() -> TitlePrefixIndex:
+    index = TitlePrefixIndex()
+    index.build(MOVIES)
+    return index
+
+
+class TestTitlePrefixIndex:
+    """Тесты для индекса автодополнения названий"""
+
+    def test_normalize_title(self):
+        """Тест нормализации: регистр, диакритика, пунктуация, ё"""
+        assert normalize_title("  Amélie: Le Fabuleux!  ") == "amelie le fabuleux"
+        assert normalize_title("Ёлки-2") == "елки 2"
+
+    def test_lookup_matches_title_and_word_prefixes(self):
+        """Тест поиска по началу названия и по началу слова внутри названия"""
+        index = build_index()
+
+        assert [m["id"] for m in index.lookup("matri")] == [3, 1, 2]
+        assert [m["id"] for m in index.lookup("reloa")] == [2]
+        assert index.lookup("the m")[0] == {"id": 1, "title": "The Matrix", "year": 1999}
+
+    def test_lookup_is_normalized(self):
+        """Тест поиска без учета регистра и диакритики"""
+        index = build_index()
+
+        assert [m["id"] for m in index.lookup("AMELIE")] == [4]
+        assert [m["id"] for m in index.lookup("елк")] == [5]
+
+    def test_lookup_respects_limit_and_empty_prefix(self):
+        """Тест ограничения количества подсказок и пустого ввода"""
+        index = build_index()
+
+        assert len(index.lookup("m", limit=2)) == 2
+        assert index.lookup("  ") == []
+        assert index.lookup("zzz") == []
+
+    def test_add_and_remove(self):
+        """Тест обновления индекса при добавлении, переименовании и удалении фильма"""
+        index = build_index()
+
+        index.add(6, "Matrix Resurrections", 2021)
+        assert 6 in [m["id"] for m in index.lookup("resur")]
+
+        index.add(6, "Something Else", 2021)
+        assert index.lookup("resur") == []
+        assert [m["id"] for m in index.lookup("someth")] == [6]
+
+        assert index.remove(1) is True
+        assert index.remove(1) is False
+        assert 1 not in [m["id"] for m in index.lookup("matrix")]
+        assert len(index) == 5
@@ -0,0 +1,56 @@
+import pytest
+from auth.token import MIN_SECRET_BYTES, TokenSigner
+
+
+SECRET = b"0123456789abcdef0123456789abcdef"
+HASH = "$2b$12$abcdefghijklmnopqrstuuN0vHqUTf1m3bS1XfJ3q8cFz7n0m9tWe"
+
+
+class TestTokenSigner:
+    """Тесты для подписанных токенов доступа"""
+
+    def test_issue_and_verify(self):
+        """Тест выпуска и проверки токена"""
+        signer = TokenSigner(SECRET, ttl_seconds=60)
+        token = signer.issue(42, HASH, now=1000)
+
+        claims = signer.verify(token, now=1030)
+
+        assert claims.user_id == 42
+        assert claims.expires_at == 1060
+        assert claims.fingerprint == TokenSigner.fingerprint(HASH)
+
+    def test_expired_token_is_rejected(self):
+        """Тест отклонения истекшего токена"""
+        signer = TokenSigner(SECRET, ttl_seconds=60)
+        token = signer.issue(42, HASH, now=1000)
+
+        assert signer.verify(token, now=1060) is None
+
+    def test_tampered_token_is_rejected(self):
+        """Тест отклонения токена с измененными данными или чужой подписью"""
+        signer = TokenSigner(SECRET, ttl_seconds=60)
+        token = signer.issue(42, HASH, now=1000)
+        forged = TokenSigner(SECRET, ttl_seconds=60).issue(43, HASH, now=1000)
+
+        payload, signature = token.split(".")
+        assert signer.verify(forged.split(".")[0] + "." + signature, now=1000) is None
+        assert TokenSigner(SECRET[::-1], ttl_seconds=60).verify(token, now=1000) is None
+
+    def test_malformed_token_is_rejected(self):
+        """Тест отклонения токенов неверного формата"""
+        signer = TokenSigner(SECRET)
+
+        assert signer.verify("") is None
+        assert signer.verify("abc") is None
+        assert signer.verify("a.b.c") is None
+
+    def test_password_change_changes_fingerprint(self):
+        """Тест привязки токена к текущему хешу пароля"""
+        assert TokenSigner.fingerprint(HASH) != TokenSigner.fingerprint(HASH + "x")
+
+    @pytest.mark.parametrize("secret", [b"change-me", b"CHANGE-ME", b"secret", b"x" * (MIN_SECRET_BYTES - 1)])
+    def test_placeholder_or_short_secret_is_refused(self, secret):
+        """Тест отказа подписывать токены ключом-заглушкой или коротким ключом"""
+        with pytest.raises(ValueError, match="SECRET_KEY"):
+            TokenSigner(secret)
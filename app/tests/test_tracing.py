@@ -0,0 +1,74 @@
+import json
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from opentelemetry import propagate, trace
+from pika import data
+from middleware.tracing import TracingMiddleware, current_trace_id
+from services.tracing import setup_tracing
+
+CLIENT_TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+
+@pytest.fixture(scope="module")
+def spans_file(tmp_path_factory):
+    """Файл, в который экспортируются спаны тестов"""
+    path = tmp_path_factory.mktemp("traces") / "spans.jsonl"
+    assert setup_tracing("test-api", export_file=str(path))
+    return path
+
+
+def read_spans(path) -> list:
+    """Сбрасывает буфер экспорта и читает спаны из файла"""
+    trace.get_tracer_provider().force_flush()
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def create_traced_app():
+    """Создает тестовое приложение, которое передает контекст трассы как RPC клиент"""
+    app = FastAPI()
+    app.add_middleware(TracingMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        headers = {"sent_at_ns": 1}
+        propagate.inject(headers)
+        # Заголовки проходят то же кодирование AMQP, что и в basic_publish
+        encoded = []
+        data.encode_table(encoded, headers)
+        received, _ = data.decode_table(b"".join(encoded), 0)
+        return {"trace_id": current_trace_id(), "headers": received}
+
+    return app
+
+
+class TestTracing:
+    """Тесты для трассировки запросов и передачи контекста в сообщениях"""
+
+    def test_context_survives_amqp_headers(self, spans_file):
+        """Тест продолжения трассы клиента через заголовки AMQP сообщения"""
+        client = TestClient(create_traced_app())
+        response = client.get(
+            "/items/3",
+            headers={"traceparent": f"00-{CLIENT_TRACE_ID}-00f067aa0ba902b7-01"},
+        )
+
+        body = response.json()
+        assert body["trace_id"] == CLIENT_TRACE_ID
+        remote = trace.get_current_span(propagate.extract(body["headers"])).get_span_context()
+        assert format(remote.trace_id, "032x") == CLIENT_TRACE_ID
+        assert remote.is_remote
+
+    def test_server_span_exported_with_route(self, spans_file):
+        """Тест экспорта спана запроса с шаблоном маршрута в файл"""
+        TestClient(create_traced_app()).get("/items/5")
+
+        spans = [span for span in read_spans(spans_file) if span["name"] == "GET /items/{item_id}"]
+        assert spans
+        assert spans[-1]["kind"] == "SpanKind.SERVER"
+        assert spans[-1]["attributes"]["http.status_code"] == 200
+        assert spans[-1]["resource"]["attributes"]["service.name"] == "test-api"
+
+    def test_no_trace_id_without_span(self):
+        """Тест пустого идентификатора вне запроса"""
+        assert current_trace_id() == ""
@@ -1,5 +1,9 @@
 import pytest
+from decimal import Decimal
 from fastapi.testclient import TestClient
+from sqlmodel import select
+from models.base_model import to_money
+from models.constants import TransactionType
 
 
 class TestWalletOperations:
@@ -94,4 +98,130 @@ class TestWalletOperations:
         assert transaction1.amount == 25.0
         assert transaction2.amount == 75.0
         assert transaction1.type == "WITHDRAWAL"
-        assert transaction2.type == "DEPOSIT"
\ No newline at end of file
+        assert transaction2.type == "DEPOSIT"
+
+
+class TestMoney:
+    """Тесты округления денежных сумм"""
+
+    def test_float_sum_is_exact_in_cents(self):
+        """Сумма float с ошибкой представления приводится к копейкам"""
+        assert to_money(0.1 + 0.2) == Decimal("0.30")
+
+    def test_rounds_half_up(self):
+        """Половина копейки округляется вверх по модулю"""
+        assert to_money(5.555) == Decimal("5.56")
+        assert to_money(-5.555) == Decimal("-5.56")
+
+    def test_integer_amount(self):
+        """Целая сумма получает две цифры после запятой"""
+        assert str(to_money(-10)) == "-10.00"
+
+
+class TestApplyTransaction:
+    """Тесты атомарного списания сервисами кошелька приложения на SQLite"""
+
+    def create_wallet(self, app_models, session, balance: float = 30.0):
+        """Создает пользователя с кошельком и возвращает кошелек"""
+        user = app_models.User(email="wallet@example.com", password_hash="-")
+        session.add(user)
+        session.flush()
+        wallet = app_models.Wallet(user_id=user.id, balance=balance)
+        session.add(wallet)
+        session.commit()
+        return wallet
+
+    def ledger(self, app_models, session) -> list:
+        """Все транзакции журнала"""
+        return session.exec(select(app_models.Transaction)).all()
+
+    def balance(self, app_models, session, wallet_id: int) -> float:
+        """Баланс кошелька, прочитанный из базы"""
+        session.expire_all()
+        return session.exec(select(app_models.Wallet.balance).where(app_models.Wallet.id == wallet_id)).one()
+
+    def test_overdraft_changes_nothing(self, app_models, app_session):
+        """Списание больше баланса: ValueError, баланс прежний, транзакции нет"""
+        wallet = self.create_wallet(app_models, app_session)
+
+        with pytest.raises(ValueError, match="Недостаточно средств"):
+            app_models.WalletService.apply_transaction(
+                wallet.id, wallet.user_id, -50.0, TransactionType.PREDICTION, app_session
+            )
+        app_session.commit()
+
+        assert self.balance(app_models, app_session, wallet.id) == 30.0
+        assert self.ledger(app_models, app_session) == []
+
+    def test_debit_returns_balance_and_adds_one_transaction(self, app_models, app_session):
+        """Списание возвращает новый баланс и записывает ровно одну транзакцию"""
+        wallet = self.create_wallet(app_models, app_session)
+
+        balance = app_models.WalletService.apply_transaction(
+            wallet.id, wallet.user_id, -10.0, TransactionType.PREDICTION, app_session
+        )
+        app_session.commit()
+
+        ledger = self.ledger(app_models, app_session)
+        assert balance == 20.0
+        assert self.balance(app_models, app_session, wallet.id) == 20.0
+        assert [(t.wallet_id, t.amount, t.type) for t in ledger] == [(wallet.id, -10.0, TransactionType.PREDICTION)]
+
+    def test_make_transaction_keeps_committed_balance(self, app_models, app_session):
+        """После списания wallet.balance равен сохраненному значению и не перезаписывается"""
+        wallet = self.create_wallet(app_models, app_session)
+
+        app_models.WalletService.make_transaction(wallet, -10.0, TransactionType.PREDICTION, app_session)
+
+        assert wallet.balance == 20.0
+        assert wallet not in app_session.dirty
+        app_session.commit()
+        assert self.balance(app_models, app_session, wallet.id) == 20.0
+
+        with pytest.raises(ValueError, match="Недостаточно средств"):
+            app_models.WalletService.make_transaction(wallet, -50.0, TransactionType.PREDICTION, app_session)
+        assert self.balance(app_models, app_session, wallet.id) == 20.0
+        assert len(self.ledger(app_models, app_session)) == 1
+
+    async def test_async_overdraft_changes_nothing(self, app_models, app_session, new_app_async_session):
+        """Асинхронное списание больше баланса: ValueError, баланс прежний, транзакции нет"""
+        wallet = self.create_wallet(app_models, app_session)
+
+        async with new_app_async_session() as session:
+            with pytest.raises(ValueError, match="Недостаточно средств"):
+                await app_models.AsyncWalletService.apply_transaction(
+                    wallet.id, wallet.user_id, -50.0, TransactionType.PREDICTION, session
+                )
+            await session.commit()
+
+        assert self.balance(app_models, app_session, wallet.id) == 30.0
+        assert self.ledger(app_models, app_session) == []
+
+    async def test_async_debit_returns_balance_and_adds_one_transaction(self, app_models, app_session, new_app_async_session):
+        """Асинхронное списание возвращает новый баланс и записывает ровно одну транзакцию"""
+        wallet = self.create_wallet(app_models, app_session)
+
+        async with new_app_async_session() as session:
+            balance = await app_models.AsyncWalletService.apply_transaction(
+                wallet.id, wallet.user_id, -10.0, TransactionType.PREDICTION, session
+            )
+            await session.commit()
+
+        ledger = self.ledger(app_models, app_session)
+        assert balance == 20.0
+        assert self.balance(app_models, app_session, wallet.id) == 20.0
+        assert [(t.wallet_id, t.amount, t.type) for t in ledger] == [(wallet.id, -10.0, TransactionType.PREDICTION)]
+
+    async def test_async_make_transaction_keeps_committed_balance(self, app_models, app_session, new_app_async_session):
+        """После асинхронного списания wallet.balance равен сохраненному значению"""
+        wallet_id = self.create_wallet(app_models, app_session).id
+
+        async with new_app_async_session() as session:
+            wallet = await session.get(app_models.Wallet, wallet_id)
+            await app_models.AsyncWalletService.make_transaction(wallet, -10.0, TransactionType.PREDICTION, session)
+            assert wallet not in session.dirty
+            await session.commit()
+            assert wallet.balance == 20.0
+
+        assert self.balance(app_models, app_session, wallet_id) == 20.0
+        assert len(self.ledger(app_models, app_session)) == 1
@@ -8,6 +8,9 @@ class Settings(BaseSettings):
     RABBITMQ_PASSWORD: Optional[str] = None
     RABBITMQ_HOST: Optional[str] = None
     RABBITMQ_PORT: Optional[str] = None
+    
+    # Tracing settings
+    TRACE_EXPORT_FILE: Optional[str] = None
         
     model_config = SettingsConfigDict(
         env_file=".env",
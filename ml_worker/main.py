@@ -3,9 +3,12 @@ import time
 import json
 import sys
 from loguru import logger
+from opentelemetry import propagate
+from opentelemetry.trace import SpanKind, Status, StatusCode
 from constants import ModelTypes
 from config import get_settings
 from embedding import EmbeddingGenerator
+from tracing import setup_tracing, tracer
 
 
 # Настройка логирования
@@ -17,6 +20,7 @@ embedding_generator = EmbeddingGenerator(ModelTypes.MULTILINGUAL.value)
 
 # Подключение к RabbitMQ (как в учебном примере)
 settings = get_settings()
+setup_tracing("ml-worker", settings.TRACE_EXPORT_FILE)
 connection = pika.BlockingConnection(pika.ConnectionParameters(
     host=settings.RABBITMQ_HOST,
     port=settings.RABBITMQ_PORT,
@@ -41,20 +45,39 @@ def get_embedding(input_text: str):
 
 def send_result_to_queue(result_data, properties):
     """Отправка результата в очередь результатов"""
-    try:        
-        channel.basic_publish(
-            exchange='',
-            routing_key=properties.reply_to,
-            body=json.dumps(result_data),
-            properties=pika.BasicProperties(
-                correlation_id=properties.correlation_id
+    try:
+        with tracer.start_as_current_span("publish", kind=SpanKind.PRODUCER):
+            channel.basic_publish(
+                exchange='',
+                routing_key=properties.reply_to,
+                body=json.dumps(result_data),
+                properties=pika.BasicProperties(
+                    correlation_id=properties.correlation_id
+                )
             )
-        )
         logger.info(f"Result sent to queue: {result_data}")
     except Exception as e:
         logger.error(f"Error sending result to queue: {e}")
 
+def record_queue_wait(headers: dict) -> None:
+    """Span ожидания в очереди: от отправки клиентом (заголовок sent_at_ns) до получения"""
+    sent_at = headers.get("sent_at_ns")
+    if isinstance(sent_at, int):
+        tracer.start_span("queue_wait", start_time=sent_at).end()
+
 def on_request(ch, method, properties, body):
+    # Продолжаем трассу API из заголовков сообщения (traceparent)
+    headers = properties.headers or {}
+    with tracer.start_as_current_span(
+        "ml_task_queue process", context=propagate.extract(headers), kind=SpanKind.CONSUMER
+    ) as span:
+        span.set_attribute("messaging.system", "rabbitmq")
+        span.set_attribute("messaging.message.conversation_id", properties.correlation_id or "")
+        record_queue_wait(headers)
+        if not handle_request(ch, method, properties, body):
+            span.set_status(Status(StatusCode.ERROR))
+
+def handle_request(ch, method, properties, body) -> bool:
     try:
         logger.info(f"Received message: {body}")
         
@@ -71,7 +94,10 @@ def on_request(ch, method, properties, body):
         # Обработка рекомендации
         start_time = time.time()
         try:
-            request_embedding = get_embedding(input_text)
+            # encode включает токенизацию и прогон модели
+            with tracer.start_as_current_span("encode") as span:
+                span.set_attribute("input.length", len(input_text))
+                request_embedding = get_embedding(input_text)
         except Exception as e:
             logger.error(f"Embedding generation error: {e}")
             raise
@@ -88,10 +114,12 @@ def on_request(ch, method, properties, body):
         
         # Подтверждение обработки
         ch.basic_ack(delivery_tag=method.delivery_tag)
+        return True
         
     except Exception as e:
         logger.error(f"Error processing message: {e}")
         ch.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
+        return False
 
 channel.basic_qos(prefetch_count=1)
 channel.basic_consume(
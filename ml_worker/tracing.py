@@ -0,0 +1,44 @@
+"""
+Трассировка обработки сообщений OpenTelemetry.
+
+Повторяет app/services/tracing.py: у ml_worker отдельный образ и код app в
+него не попадает. Экспорт - OTEL_EXPORTER_OTLP_ENDPOINT (OTLP/HTTP) и/или
+TRACE_EXPORT_FILE (JSON lines); без них спаны не записываются.
+"""
+import os
+from typing import Optional
+from opentelemetry import trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+tracer = trace.get_tracer("ml-worker")
+
+
+def setup_tracing(service_name: str, export_file: Optional[str] = None) -> bool:
+    """
+    Настраивает экспорт спанов процесса.
+
+    Args:
+        service_name: имя сервиса в трассах
+        export_file: файл для спанов в формате JSON lines
+
+    Returns:
+        bool: True если экспорт включен
+    """
+    endpoint = os.environ.get("OTEL_EXPORTER_OTLP_ENDPOINT")
+    if not export_file and not endpoint:
+        return False
+
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    if endpoint:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    if export_file:
+        exporter = ConsoleSpanExporter(
+            out=open(export_file, "a", buffering=1, encoding="utf-8"),
+            formatter=lambda span: span.to_json(indent=None) + os.linesep,
+        )
+        provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    return True